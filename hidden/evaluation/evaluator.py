@@ -1,159 +1,392 @@
 import random
-from typing import Dict, List, Tuple
+from array import array
+from collections.abc import Mapping
+from itertools import chain
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
 
 from public.lib.interfaces import (
-    CityGraph, ProxyData, SimulationResult, 
-    ResourceTypes, ResourceUsage
+    CityGraph, ProxyData, SimulationResult, SimulationResults,
+    ResourceTypes, ResourceType, ResourceUsage, FailureReason, EventTrace
 )
+from hidden.generation.obstacles_gen import true_state_arrays
+from hidden.rng import component_rngs, keyed_rng
+
+RADIATION_LIMIT = 0.35  # Lowered from 0.4
+ZOMBIE_LIMIT = 0.45  # Lowered from 0.5
+
+class ScenarioHazards:
+    """
+    Hazards of one scenario as arrays, built once to score many plans:
+    radiation and zombie masks per node index, blockages and lengths per
+    edge id. Works for CityGraph cities and memory-mapped StoredCity ones.
+    Read-only once built, apart from lookup caches filled on first use, so
+    one instance can be shared by threads (a race only fills an entry twice).
+    """
+
+    def __init__(self, city, true_state: Dict):
+        """
+        Args:
+            city: The city layout (CityGraph or StoredCity)
+            true_state: The true state of obstacles
+        """
+        self.city = city
+        self.extraction_nodes = set(city.extraction_nodes)
+        metrics = getattr(city, 'metrics', None)
+        if metrics is not None:
+            self._adjacency = metrics.adjacency
+            self.weights = metrics.weights
+            self._csr = (self._adjacency.indptr, self._adjacency.indices, self._adjacency.entry_edge)
+            radiation, zombies, blocked = true_state_arrays(city, true_state)
+        else:  # StoredCity: nodes are the indices and the true state is held as arrays
+            self._adjacency = None
+            self.weights = city.weights
+            self._csr = (city.indptr, city.indices, city.entry_edge)
+            radiation, zombies, blocked = true_state['radiation'], true_state['zombies'], true_state['blocked']
+        self._index: Dict = None  # Node id -> index, for node_index(); built on first use
+        self._roads: Dict[int, Dict[int, int]] = {}  # Node index -> {neighbour index: edge id}, filled on use
+        self.radiation = np.asarray(radiation) > RADIATION_LIMIT  # Per node index
+        self.zombies = np.asarray(zombies) > ZOMBIE_LIMIT
+        self.blocked = np.asarray(blocked) > 0  # Per edge id
+        self.exits = np.zeros(len(self.radiation), dtype=bool)  # Extraction points, per node index
+        self.exits[self.node_indices(list(self.extraction_nodes))] = True
+
+    def node_indices(self, nodes: Sequence[int]) -> np.ndarray:
+        """Index of every node id; KeyError for ids not in the city"""
+        if self._adjacency is not None:
+            indices = self._adjacency.node_indices(nodes)
+        else:
+            indices = np.asarray(nodes, dtype=np.int64)
+            indices = np.where((indices >= 0) & (indices < len(self.radiation)), indices, -1)
+        unknown = np.flatnonzero(indices < 0)
+        if len(unknown):
+            raise KeyError(nodes[unknown[0]])
+        return indices
+
+    def edge_ids(self, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+        """Edge id of every (u, v) node index pair, -1 where there is no edge"""
+        if self._adjacency is not None:
+            return self._adjacency.edge_ids(u, v)
+        return self.city.edge_ids(u, v)
+
+    def node_index(self, node: int) -> int:
+        """Index of one node id in O(1); KeyError if it is not in the city"""
+        nodes = self._adjacency.nodes if self._adjacency is not None else range(len(self.radiation))
+        if isinstance(nodes, range):  # Dense ids 0..n-1
+            if isinstance(node, (int, np.integer)) and 0 <= node < len(nodes):
+                return int(node)
+            raise KeyError(node)
+        if self._index is None:
+            self._index = {node: i for i, node in enumerate(nodes)}
+        return self._index[node]
+
+    def road(self, u: int, v: int) -> int:
+        """Edge id of the road between node indices u and v, -1 if there is none (O(1) once u is seen)"""
+        roads = self._roads.get(u)
+        if roads is None:
+            indptr, indices, entry_edge = self._csr
+            start, stop = int(indptr[u]), int(indptr[u + 1])
+            roads = self._roads[u] = dict(zip(indices[start:stop].tolist(), entry_edge[start:stop].tolist()))
+        return roads.get(v, -1)
+
+# Resource whose lack ends a walk with each FailureReason
+_DEATHS = {FailureReason.NO_RADIATION_SUITS: ResourceType.RADIATION_SUITS,
+           FailureReason.NO_AMMO: ResourceType.AMMO,
+           FailureReason.NO_EXPLOSIVES: ResourceType.EXPLOSIVES}
+
+class PlanState:
+    """
+    Immutable evaluation state of a partial plan, for searches that grow
+    paths one node at a time. extend() returns a new state in O(1) and
+    leaves this one as it was, so the branches of a search share their
+    common prefix (every state links to its parent instead of copying it).
+
+    The walk follows evaluate(): a road is checked for blockages right
+    before the hazards of the node it leaves from, and the first road is
+    never checked. The hazards of the last node are therefore settled only
+    when the next node is known; `feasible`, resource_usage() and
+    failure_reason already account for them.
+
+    Missing roads are handled as evaluate() handles them: the walk goes on
+    over them, and only the last one added ends it, at its first place in
+    the path after the first road (at the last node if the first road is
+    its only place, where evaluate() raises IndexError). Outcomes of paths with missing
+    roads walk back through the parents, in O(n_nodes).
+    """
+    __slots__ = ('hazards', 'allocated', 'parent', 'node', 'index', 'n_nodes', 'length', 'paid', 'failure',
+                 'missing')
+
+    def __init__(self, hazards: ScenarioHazards, allocated: Tuple[int, ...], parent: "PlanState", node: int,
+                 index: int, length: float, paid: Tuple[int, ...], failure: Tuple, missing: Tuple = None):
+        self.hazards = hazards
+        self.allocated = allocated  # Per ResourceType code
+        self.parent = parent
+        self.node = node  # Last node id of the path
+        self.index = index  # Its node index
+        self.n_nodes = 1 if parent is None else parent.n_nodes + 1
+        self.length = length  # Accumulated road length, added in path order as evaluate() adds it
+        self.paid = paid  # Hazards overcome so far, per ResourceType code (last node not included)
+        self.failure = failure  # (FailureReason, *node ids) once a hazard has ended the walk, else None
+        self.missing = missing  # ((u, v), road position, previous) of the last missing road, else None
+
+    @classmethod
+    def start(cls, hazards: ScenarioHazards, resources: Dict[str, int], max_resources: int = 0,
+              node: int = None) -> "PlanState":
+        """
+        State of a plan that is still at its first node (the city's
+        starting node by default). Allocations above max_resources fail
+        right away, as in evaluate().
+        """
+        node = hazards.city.starting_node if node is None else node
+        allocated = [0] * len(ResourceType)
+        for rt, amount in resources.items():
+            if rt in ResourceTypes.all_types():
+                allocated[ResourceType.parse(rt)] = amount
+        failure = (FailureReason.EXCESS_RESOURCES,) if sum(resources.values()) > max_resources else None
+        return cls(hazards, tuple(allocated), None, node, hazards.node_index(node), 0.0,
+                   (0,) * len(ResourceType), failure)
+
+    def _pay(self, paid: Tuple[int, ...], rt: ResourceType, reason: FailureReason, *args) -> Tuple:
+        """(paid, failure) after meeting one hazard that takes a unit of rt"""
+        if paid[rt] >= self.allocated[rt]:
+            return paid, (reason, *args)
+        return paid[:rt] + (paid[rt] + 1,) + paid[rt + 1:], None
+
+    def _settle(self, paid: Tuple[int, ...]) -> Tuple:
+        """(paid, failure) after the hazards of the last node"""
+        failure = None
+        if self.hazards.radiation[self.index]:
+            paid, failure = self._pay(paid, ResourceType.RADIATION_SUITS, FailureReason.NO_RADIATION_SUITS, self.node)
+        if failure is None and self.hazards.zombies[self.index]:
+            paid, failure = self._pay(paid, ResourceType.AMMO, FailureReason.NO_AMMO, self.node)
+        return paid, failure
+
+    def _cross(self, paid: Tuple[int, ...], node: int, edge: int) -> Tuple:
+        """(paid, failure) after the road from the last node to `node` (edge id, -1 if missing)"""
+        if edge >= 0 and self.parent is not None and self.hazards.blocked[edge]:
+            return self._pay(paid, ResourceType.EXPLOSIVES, FailureReason.NO_EXPLOSIVES,
+                             *sorted((self.node, node)))
+        return paid, None
+
+    def extend(self, node: int) -> "PlanState":
+        """
+        State of the path with one more node. A failed plan stays failed but
+        its path and length keep growing, as evaluate() measures the whole
+        path. KeyError if the node is not in the city.
+        """
+        hazards = self.hazards
+        index = hazards.node_index(node)
+        edge = hazards.road(self.index, index)
+        length = self.length + float(hazards.weights[edge]) if edge >= 0 else self.length
+        paid, failure, missing = self.paid, self.failure, self.missing
+        if edge < 0:
+            missing = ((self.node, node), self.n_nodes - 1, missing)
+        if failure is None:
+            paid, failure = self._cross(paid, node, edge)
+            if failure is None:
+                paid, failure = self._settle(paid)
+        return PlanState(hazards, self.allocated, self, node, index, length, paid, failure, missing)
+
+    def _outcome(self) -> Tuple:
+        """(paid, failure) of the walk so far, last node included"""
+        if self.missing is None:
+            return self._settle(self.paid) if self.failure is None else (self.paid, self.failure)
+        # The walk stops right before the hazards of the node at the first
+        # place of the last missing road, unless a hazard ended it earlier
+        pair, stop = self.missing[0], self.n_nodes - 1
+        entry = self.missing
+        while entry is not None:
+            if entry[0] == pair and entry[1] >= 1:
+                stop = entry[1]
+            entry = entry[2]
+        state = self
+        while state.n_nodes > stop + 1:
+            state = state.parent
+        before = state.parent  # Its node's hazards come after the stop, the road to state's node before
+        paid, failure = before.paid, before.failure
+        if failure is None:
+            paid, failure = before._cross(paid, state.node, self.hazards.road(before.index, state.index))
+        return paid, failure or (FailureReason.MISSING_EDGE, *pair)
+
+    @property
+    def feasible(self) -> bool:
+        """Whether the team survives the path so far with its allocation"""
+        return self.missing is None and self._outcome()[1] is None
+
+    @property
+    def failure_reason(self) -> Tuple:
+        """(FailureReason, *node ids) of the walk so far; SUCCESS while feasible"""
+        return self._outcome()[1] or (FailureReason.SUCCESS,)
+
+    def resource_usage(self) -> ResourceUsage:
+        """Resources allocated, used, needed and effectively used so far"""
+        paid, failure = self._outcome()
+        usage = ResourceUsage()
+        counts = usage.counts
+        counts[ResourceUsage.ALLOCATED] = self.allocated
+        if failure is not None and failure[0] in (FailureReason.EXCESS_RESOURCES, FailureReason.MISSING_EDGE):
+            counts[ResourceUsage.USED] = self.allocated  # Lose all the resources
+        else:
+            counts[ResourceUsage.USED] = paid
+        if failure is None or failure[0] is not FailureReason.EXCESS_RESOURCES:
+            counts[ResourceUsage.NEEDED] = paid
+            counts[ResourceUsage.EFFECTIVE_USES] = paid
+            if failure is not None and failure[0] in _DEATHS:
+                counts[ResourceUsage.NEEDED, _DEATHS[failure[0]]] += 1
+        return usage
+
+    def path(self) -> List[int]:
+        """Node ids of the path, walked back through the parents in O(n_nodes)"""
+        path, state = [], self
+        while state is not None:
+            path.append(state.node)
+            state = state.parent
+        return path[::-1]
 
 class PathEvaluator:
     """Evaluates the success of an evacuation path"""
     
     def __init__(self, seed: int = None):
-        if seed is not None:
-            random.seed(seed)
+        self.reseed(seed)
+
+    def reseed(self, seed: int = None):
+        """Restart this evaluator's private random streams from `seed`"""
+        self.seed = seed
+        self.rng, self.np_rng = component_rngs(seed, 'evaluator')
+
+    def plan_rng(self, *key: int) -> random.Random:
+        """
+        Time noise stream of one evaluation, derived from this evaluator's
+        seed and `key` only (e.g. run and plan indices). Evaluations given
+        such streams get the same results whatever the order or thread
+        they run in.
+        """
+        return keyed_rng(self.seed, 'evaluator', *key)
             
-    def _check_resource_usage(self, path: List[int], resources: Dict[str, int], max_resources:int,
-                              unexisting_edge = None) -> Tuple[bool, str, ResourceUsage, List[Tuple[int, str]]]:
-        """Check if resources are sufficient for the given path."""
+    @staticmethod
+    def _check_resource_usage(path: List[int], resources: Dict[str, int], max_resources:int,
+                              node_radiation, node_zombies, blocked_steps: List[bool],
+                              unexisting_edge = None) -> Tuple[bool, Tuple, ResourceUsage, EventTrace]:
+        """
+        Check if resources are sufficient for the given path.
+        The reason is a (FailureReason, *node ids) tuple; the walk is
+        recorded as an EventTrace, with no messages formatted here.
+        node_radiation and node_zombies are the true levels by node id and
+        blocked_steps[i] whether the road from path[i] to path[i+1] is blocked.
+        """
         resource_usage = ResourceUsage()
-        events = []  # List of (step_number, event_description)
+        counts = [[0] * len(ResourceType) for _ in range(4)]
+        allocated, used, needed, effective_uses = counts
+        flags, radiation, zombies = bytearray(), array('d'), array('d')  # One entry per step
+        
+        def finish(success: bool, reason: Tuple):
+            resource_usage.counts[:] = counts
+            return success, reason, resource_usage, EventTrace(path, flags, radiation, zombies, reason[0])
         
         # Initialize allocated resources
-        total_allocated_resources = 0
-        for rt, amount in resources.items():
-            total_allocated_resources+= amount
-            resource_usage.allocated[rt] = amount
-            resource_usage.used[rt] = 0
-            resource_usage.needed[rt] = 0
-            resource_usage.effective_uses[rt] = 0
-        
-        # Log mission start
-        events.append((0, f"Mission started at node {path[0]}"))
-        if total_allocated_resources > max_resources:
-            events.append((1, f'Mission Failed, you exceeded the amout of allowed resources and your team was killed by the population due to their greed.'))
-            for rt, amount in resources.items(): # Loose all the reources
-                resource_usage.allocated[rt] = amount
-                resource_usage.used[rt] = amount
-                resource_usage.needed[rt] = 0
-                resource_usage.effective_uses[rt] = 0
-            return False, f"Your team was killed due to excesive greed by the population in at the start", resource_usage, events
+        known = {ResourceType.parse(rt): amount for rt, amount in resources.items()
+                 if rt in ResourceTypes.all_types()}
+        for rt, amount in known.items():
+            allocated[rt] = amount
         
+        if sum(resources.values()) > max_resources:
+            for rt, amount in known.items(): # Loose all the reources
+                used[rt] = amount
+            return finish(False, (FailureReason.EXCESS_RESOURCES,))
+        
+        SUITS, AMMO, EXPLOSIVES = ResourceType.RADIATION_SUITS, ResourceType.AMMO, ResourceType.EXPLOSIVES
         
         # Track resource usage at each node
         for i, node in enumerate(path, 1):
-            events.append((i, f"Arrived at node {node}"))
-           
-            
             if (unexisting_edge):
                 n1, n2 = path[i], path[i+1]
                 if (unexisting_edge[0]==n1) and (unexisting_edge[1]==n2):
-                    events.append((i, f"Unexistent path from node {n1} to {n2}"))
-                    for rt, amount in resources.items(): # Loose all the reources
-                        resource_usage.allocated[rt] = amount
-                        resource_usage.used[rt] = amount
-                    return False, f"Unexistent path from node {n1} to {n2}", resource_usage, events
+                    flags.append(0)
+                    radiation.append(float('nan'))
+                    zombies.append(float('nan'))
+                    for rt, amount in known.items(): # Loose all the reources
+                        used[rt] = amount
+                    return finish(False, (FailureReason.MISSING_EDGE, n1, n2))
             
+            flag = 0
+            flags.append(flag)
+            radiation.append(node_radiation[node])
+            zombies.append(node_zombies[node])
             
             # Check radiation suit usage
-            if self.radiation[node] > 0.35:  # Lowered from 0.4
-                events.append((i, f"High radiation detected (level: {self.radiation[node]:.2f})"))
-                resource_usage.needed['radiation_suits'] += 1
-                if resource_usage.allocated['radiation_suits'] <= resource_usage.used['radiation_suits']:
-                    events.append((i, f"TEAM DIED - Ran out of radiation suits"))
-                    return False, f"Ran out of radiation suits at node {node}", resource_usage, events
-                resource_usage.used['radiation_suits'] += 1
-                resource_usage.effective_uses['radiation_suits'] += 1
-                events.append((i, f"Used radiation suit successfully"))
+            if radiation[-1] > RADIATION_LIMIT:
+                flag |= EventTrace.RADIATION
+                flags[-1] = flag
+                needed[SUITS] += 1
+                if allocated[SUITS] <= used[SUITS]:
+                    return finish(False, (FailureReason.NO_RADIATION_SUITS, node))
+                used[SUITS] += 1
+                effective_uses[SUITS] += 1
                 
             # Check ammo usage for zombies
-            if self.zombies[node] > 0.45:  # Lowered from 0.5
-                events.append((i, f"Zombie horde encountered (level: {self.zombies[node]:.2f})"))
-                resource_usage.needed['ammo'] += 1
-                if resource_usage.allocated['ammo'] <= resource_usage.used['ammo']:
-                    events.append((i, f"TEAM DIED - Ran out of ammo"))
-                    return False, f"Ran out of ammo at node {node}", resource_usage, events
-                # 35% chance ammo fails to clear zombies (increased from 20%)
-                # if random.random() < 0.35:
-                #     events.append((i, f"TEAM DIED - Ammo failed to clear zombies"))
-                #     return False, f"Ammo failed to clear zombies at node {node}", resource_usage, events
-                resource_usage.used['ammo'] += 1
-                resource_usage.effective_uses['ammo'] += 1
-                events.append((i, f"Used ammo successfully against zombies"))
+            if zombies[-1] > ZOMBIE_LIMIT:
+                flag |= EventTrace.ZOMBIES
+                flags[-1] = flag
+                needed[AMMO] += 1
+                if allocated[AMMO] <= used[AMMO]:
+                    return finish(False, (FailureReason.NO_AMMO, node))
+                used[AMMO] += 1
+                effective_uses[AMMO] += 1
                 
             # Check explosives for blockages
             if i < len(path) - 1:
-                edge = tuple(sorted((path[i], path[i+1])))
-                if edge in self.blockages and self.blockages[edge]:
-                    events.append((i, f"Path blocked to node {path[i+1]} (blockage detected)"))
-                    resource_usage.needed['explosives'] += 1
-                    if resource_usage.allocated['explosives'] <= resource_usage.used['explosives']:
-                        events.append((i, f"TEAM DIED - Ran out of explosives"))
-                        return False, f"Ran out of explosives at edge {edge}", resource_usage, events
-                    # 25% chance explosives fail (increased from 10%)
-                    # if random.random() < 0.25:
-                    #     events.append((i, f"TEAM DIED - Explosives failed to clear blockage"))
-                    #     return False, f"Explosives failed to clear blockage at edge {edge}", resource_usage, events
-                    resource_usage.used['explosives'] += 1
-                    resource_usage.effective_uses['explosives'] += 1
-                    events.append((i, f"Used explosives successfully to clear path"))
-                
-            # # Random events that consume resources
-            # if random.random() < 0.15:  # 15% chance of unexpected zombie encounter
-            #     events.append((i, f"Surprise zombie encounter!"))
-            #     resource_usage.needed['ammo'] += 1
-            #     if resource_usage.allocated['ammo'] <= resource_usage.used['ammo']:
-            #         events.append((i, f"TEAM DIED - No ammo for surprise zombie encounter"))
-            #         return False, f"Ran out of ammo during surprise zombie encounter at node {node}", resource_usage, events
-            #     resource_usage.used['ammo'] += 1
-            #     resource_usage.effective_uses['ammo'] += 1
-            #     events.append((i, f"Successfully handled surprise zombie encounter"))
-                
-            # if random.random() < 0.1:  # 10% chance of radiation leak
-            #     events.append((i, f"Unexpected radiation leak detected!"))
-            #     resource_usage.needed['radiation_suits'] += 1
-            #     if resource_usage.allocated['radiation_suits'] <= resource_usage.used['radiation_suits']:
-            #         events.append((i, f"TEAM DIED - No suits for radiation leak"))
-            #         return False, f"Ran out of suits during radiation leak at node {node}", resource_usage, events
-            #     resource_usage.used['radiation_suits'] += 1
-            #     resource_usage.effective_uses['radiation_suits'] += 1
-            #     events.append((i, f"Successfully protected against radiation leak"))
-            
-            if i < len(path) - 1:
-                events.append((i, f"Moving to node {path[i+1]}"))
+                if blocked_steps[i]:
+                    flags[-1] = flag | EventTrace.BLOCKAGE
+                    needed[EXPLOSIVES] += 1
+                    if allocated[EXPLOSIVES] <= used[EXPLOSIVES]:
+                        return finish(False, (FailureReason.NO_EXPLOSIVES, *sorted((path[i], path[i+1]))))
+                    used[EXPLOSIVES] += 1
+                    effective_uses[EXPLOSIVES] += 1
         
-        # Log successful completion
-        events.append((len(path), f"Successfully reached extraction point at node {path[-1]}"))
-        return True, "Successfully reached extraction point", resource_usage, events
+        return finish(True, (FailureReason.SUCCESS,))
         
     def evaluate(self, path: List[int], resources: Dict[str, int],
-                city: CityGraph, true_state: Dict, max_resources:int=0) -> SimulationResult:
+                city: CityGraph, true_state: Dict, max_resources:int=0,
+                rng: random.Random = None) -> SimulationResult:
         """
-        Evaluate a proposed evacuation plan
+        Evaluate a proposed evacuation plan. The result depends only on the
+        arguments and the draws of `rng`: nothing is stored on the
+        evaluator, so one instance can serve concurrent calls.
         
         Args:
             path: List of node IDs in the path
             resources: Dict of resources allocated
             city: The city layout
             true_state: The true state of obstacles
+            rng: Stream of the time noise, one per call (e.g. from
+                 plan_rng) for order-independent results. Without it the
+                 evaluator's own stream is used (legacy): shared by all
+                 calls, so results depend on their order.
             
         Returns:
             SimulationResult with metrics
         """
+        rng = self.rng if rng is None else rng
         result = SimulationResult()
         
-        # Store true state data for resource checking
-        self.radiation = true_state['radiation']
-        self.zombies = true_state['zombies']
-        self.blockages = true_state['blockages']
+        # True state read for this path only
+        blocked = true_state.get('blocked')
+        if blocked is not None:  # Road of every step read by edge id
+            edges = city.edge_ids(path[:-1], path[1:])
+            blocked_steps = ((edges >= 0) & (np.asarray(blocked)[np.maximum(edges, 0)] > 0)).tolist()
+        else:
+            blockages = true_state['blockages']
+            blocked_steps = [bool(blockages.get(tuple(sorted(edge)), False)) for edge in zip(path, path[1:])]
         
         # Calculate path length
         path_length = 0
         unexisting_edge = False
+        weights = city.edge_weights(path[:-1], path[1:]).tolist()  # One array lookup for the whole path
         for i in range(len(path) - 1):
             n1, n2 = path[i], path[i+1]
-            if city.graph.has_edge(n1, n2):
-                path_length += city.graph[n1][n2]['weight']
+            weight = weights[i]
+            if weight == weight:  # Not NaN
+                path_length += weight
             else:
                 # Handle the case where nodes are not connected
                 unexisting_edge = (n1,n2)
@@ -162,23 +395,26 @@ class PathEvaluator:
         reaches_extraction = path[-1] in city.extraction_nodes
         
         # Check resource usage
-        resources_sufficient, failure_reason, resource_usage, events = self._check_resource_usage(path, resources, max_resources, unexisting_edge=unexisting_edge)
+        resources_sufficient, failure_reason, resource_usage, trace = self._check_resource_usage(
+            path, resources, max_resources, true_state['radiation'], true_state['zombies'], blocked_steps,
+            unexisting_edge=unexisting_edge)
             
         # Determine success and failure reason
         success = (reaches_extraction) and ((resources_sufficient) and (not unexisting_edge))
         
         if not reaches_extraction:
-            failure_reason = "Path does not reach extraction point"
-            events[-1] = (len(path), f"FAILED - Path does not reach extraction point ended at node {path[-1]}")
+            failure_reason = (FailureReason.NO_EXTRACTION,)
+            trace.reached_extraction = False
             for rt, amount in resources.items(): # Loose all the reources
-                        resource_usage.allocated[rt] = amount
-                        resource_usage.used[rt] = amount
+                if rt in ResourceTypes.all_types():
+                    resource_usage.allocated[rt] = amount
+                    resource_usage.used[rt] = amount
                 
         # Calculate time taken (affected by obstacles and resource usage)
         base_time = path_length
-        total_obstacles = sum(resource_usage.needed.values())  # Count total obstacles encountered
+        total_obstacles = int(resource_usage.counts[ResourceUsage.NEEDED].sum())  # Count total obstacles encountered
         obstacle_delay = total_obstacles * 0.5  # Each obstacle adds 50% time
-        time_taken = base_time * (1 + obstacle_delay + random.uniform(0, 0.2))
+        time_taken = base_time * (1 + obstacle_delay + rng.uniform(0, 0.2))
         
         result.set_metrics(
             success=success,
@@ -187,7 +423,183 @@ class PathEvaluator:
             obstacles=total_obstacles,
             resources=resource_usage,
             failure_reason=failure_reason,
-            events=events
+            trace=trace
+        )
+        
+        return result
+
+    def evaluate_state(self, state: PlanState, rng: random.Random = None) -> SimulationResult:
+        """
+        Result of the plan a PlanState was grown to, as evaluate() would
+        return it for state.path() (without the events), drawing the same
+        time noise from `rng` (the evaluator's shared stream if None, legacy).
+        Paths whose last missing road is only their first road, where
+        evaluate() raises IndexError, fail with MISSING_EDGE on that road.
+        """
+        rng = self.rng if rng is None else rng
+        resource_usage = state.resource_usage()
+        failure_reason = state.failure_reason
+        success = failure_reason[0] is FailureReason.SUCCESS
+        if not state.hazards.exits[state.index]:
+            success = False
+            failure_reason = (FailureReason.NO_EXTRACTION,)
+            resource_usage.counts[ResourceUsage.USED] = resource_usage.counts[ResourceUsage.ALLOCATED]
+        
+        total_obstacles = int(resource_usage.counts[ResourceUsage.NEEDED].sum())
+        time_taken = state.length * (1 + total_obstacles * 0.5 + rng.uniform(0, 0.2))
+        
+        result = SimulationResult()
+        result.set_metrics(
+            success=success,
+            path_length=state.length,
+            time=time_taken,
+            obstacles=total_obstacles,
+            resources=resource_usage,
+            failure_reason=failure_reason
         )
+        return result
+
+    def evaluate_many(self, paths: Sequence[List[int]], allocations, city: CityGraph, true_state: Dict,
+                      max_resources: int = 0, hazards: ScenarioHazards = None,
+                      rng: random.Random = None) -> SimulationResults:
+        """
+        Score many plans against one scenario at once, e.g. the candidates
+        of a plan search. Every run is what evaluate() would return for
+        that plan, called on the plans in order (same time noise draws),
+        without the events. Hazards are read from masks built once (pass
+        `hazards` to reuse them across calls) and resources from prefix
+        counts over the steps of all the plans.
+        
+        evaluate() raises IndexError for a plan whose missing road it runs
+        past looking for; here such a plan fails with MISSING_EDGE on its
+        last step.
+        
+        Args:
+            paths: Node IDs of every path (at least one node each)
+            allocations: Resources of every plan, or one dict for all of them
+            city: The city layout
+            true_state: The true state of obstacles
+            hazards: ScenarioHazards of this city and true state, if built already
+            rng: Stream of the time noise, one draw per plan in order
+                 (the evaluator's shared stream if None, legacy)
+            
+        Returns:
+            SimulationResults with one run per plan, in order
+        """
+        if hazards is None:
+            hazards = ScenarioHazards(city, true_state)
+        n_plans = len(paths)
+        if isinstance(allocations, Mapping):
+            allocations = [allocations] * n_plans
+        lengths = np.fromiter((len(path) for path in paths), dtype=np.int64, count=n_plans)
+        if n_plans and lengths.min() == 0:
+            raise IndexError("Every path needs at least one node")
+        
+        # Flat steps of all the plans: step j arrives at ids[j], the pos[j]-th node of plan[j]
+        ids = list(chain.from_iterable(paths))
+        nodes = hazards.node_indices(ids)
+        starts = np.cumsum(lengths) - lengths
+        plan = np.repeat(np.arange(n_plans), lengths)
+        pos = np.arange(len(ids)) - starts[plan]
+        
+        # Road from every step's node to the next one (-1 past the end or if missing)
+        has_next = pos < lengths[plan] - 1
+        roads = np.flatnonzero(has_next)
+        edges = np.full(len(ids), -1, dtype=np.int64)
+        edges[roads] = hazards.edge_ids(nodes[roads], nodes[roads + 1])
+        
+        # Path lengths: row sums accumulated left to right, in path order as evaluate() adds them
+        steps = np.zeros((n_plans, max(int(lengths.max(initial=1)) - 1, 1)))
+        found = edges[roads] >= 0
+        steps[plan[roads[found]], pos[roads[found]]] = hazards.weights[edges[roads[found]]]
+        path_length = np.cumsum(steps, axis=1)[:, -1]
+        
+        # Resources of every distinct allocation (plans of a search often share one dict)
+        distinct = {id(resources): resources for resources in allocations}
+        row = {key: i for i, key in enumerate(distinct)}
+        which = np.fromiter((row[id(resources)] for resources in allocations), dtype=np.int64, count=n_plans)
+        labels = [rt.label for rt in ResourceType]
+        allocated = np.array([[resources.get(label, 0) for label in labels] for resources in distinct.values()],
+                             dtype=np.int64).reshape(-1, len(labels))[which]
+        greedy = np.array([sum(resources.values()) for resources in distinct.values()])[which] > max_resources
+        
+        # Hazards met at every step, in the order evaluate() checks them. The
+        # road checked at a step is the one leaving the next node.
+        kinds = [(hazards.radiation[nodes], ResourceType.RADIATION_SUITS),
+                 (hazards.zombies[nodes], ResourceType.AMMO),
+                 (np.zeros(len(ids), dtype=bool), ResourceType.EXPLOSIVES)]
+        ahead = np.flatnonzero(has_next[1:] & (pos[1:] > 0))
+        kinds[2][0][ahead] = (edges[ahead + 1] >= 0) & hazards.blocked[np.maximum(edges[ahead + 1], 0)]
+        
+        # Every walk ends at the first event with key 4 * pos + kind: kind 0 a
+        # missing road, 1-3 running out of the resource of that hazard
+        never = np.iinfo(np.int64).max
+        end = np.full(n_plans, never)
+        for kind, (met, rt) in enumerate(kinds, 1):
+            total = np.cumsum(met)
+            count = total - (total[starts] - met[starts])[plan]  # Hazards met so far in the plan
+            dies = met & (count > allocated[plan, rt])
+            np.minimum.at(end, plan[dies], 4 * pos[dies] + kind)
+        
+        # A missing road ends the walk at the first step that looks ahead at
+        # it: step s looks at the road leaving node s (pos s). evaluate() keeps
+        # the last missing road of the path, and past the end looks no more.
+        missing = np.flatnonzero(has_next & (edges < 0))
+        unexisting = missing[np.append(plan[missing][1:] != plan[missing][:-1], True)] if len(missing) else missing
+        lost = plan[unexisting]  # Plans with a missing road
+        gap_u, gap_v = np.full(n_plans, -1), np.full(n_plans, -1)
+        gap_u[lost], gap_v[lost] = nodes[unexisting], nodes[unexisting + 1]
+        looks = np.flatnonzero(has_next & (pos > 0))
+        looks = looks[(nodes[looks] == gap_u[plan[looks]]) & (nodes[looks + 1] == gap_v[plan[looks]])]
+        seen = np.full(n_plans, never)
+        seen[lost] = 4 * (lengths[lost] - 2)  # Not found: step len(path) - 1, where evaluate() fails
+        np.minimum.at(seen, plan[looks], 4 * (pos[looks] - 1))
+        end = np.minimum(end, seen)
+        
+        # Resources at the end of every walk
+        counts = np.zeros((n_plans, 4, len(ResourceType)), dtype=np.int64)
+        counts[:, ResourceUsage.ALLOCATED] = allocated
+        ended = end != never
+        end_kind = np.where(ended, end % 4, -1)
+        for kind, (met, rt) in enumerate(kinds, 1):
+            needed = np.bincount(plan[met & (4 * pos + kind <= end[plan])], minlength=n_plans)
+            used = needed - (end_kind == kind)
+            counts[:, ResourceUsage.NEEDED, rt] = needed
+            counts[:, ResourceUsage.USED, rt] = used
+            counts[:, ResourceUsage.EFFECTIVE_USES, rt] = used
+        
+        failure = np.full(n_plans, FailureReason.SUCCESS, dtype=np.uint8)
+        failure_args = np.full((n_plans, 2), -1, dtype=np.int64)
+        last = starts + np.where(ended, end // 4, 0)  # Step where every walk ended
+        for kind, reason in enumerate([FailureReason.MISSING_EDGE, FailureReason.NO_RADIATION_SUITS,
+                                       FailureReason.NO_AMMO, FailureReason.NO_EXPLOSIVES]):
+            failure[end_kind == kind] = reason
+        lost = end_kind == 0  # Missing roads lose all the resources
+        counts[lost, ResourceUsage.USED] = allocated[lost]
+        broken = unexisting[lost[plan[unexisting]]]
+        failure_args[plan[broken]] = np.reshape([(ids[j], ids[j + 1]) for j in broken.tolist()], (-1, 2))
+        node_deaths = np.flatnonzero((end_kind == 1) | (end_kind == 2))
+        failure_args[node_deaths, 0] = [ids[j] for j in last[node_deaths].tolist()]
+        road_deaths = np.flatnonzero(end_kind == 3)
+        failure_args[road_deaths] = np.reshape([sorted((ids[j + 1], ids[j + 2])) for j in last[road_deaths].tolist()],
+                                               (-1, 2))
+        
+        failure[greedy] = FailureReason.EXCESS_RESOURCES
+        failure_args[greedy] = -1
+        counts[greedy, ResourceUsage.USED] = allocated[greedy]
+        counts[greedy, ResourceUsage.NEEDED] = 0
+        counts[greedy, ResourceUsage.EFFECTIVE_USES] = 0
+        
+        reaches_extraction = hazards.exits[nodes[starts + lengths - 1]]
+        success = reaches_extraction & (failure == FailureReason.SUCCESS)
+        astray = ~reaches_extraction
+        failure[astray] = FailureReason.NO_EXTRACTION
+        failure_args[astray] = -1
+        counts[astray, ResourceUsage.USED] = allocated[astray]
         
-        return result 
\ No newline at end of file
+        obstacles = counts[:, ResourceUsage.NEEDED].sum(axis=1)
+        draw = (self.rng if rng is None else rng).random
+        noise = 0.2 * np.array([draw() for _ in range(n_plans)])  # uniform(0, 0.2) per plan, as evaluate() draws it
+        time_taken = path_length * (1 + obstacles * 0.5 + noise)
+        return SimulationResults.from_columns(success, path_length, time_taken, obstacles, failure,
+                                              failure_args, counts)
@@ -1,17 +1,103 @@
-import random
 import networkx as nx
 import numpy as np
-from typing import Tuple, List
+from typing import Iterator, Sequence, Tuple, List
 
 from public.lib.interfaces import CityGraph
+from public.lib.components import ComponentIndex, component_labels
+from hidden.rng import component_rngs
+from hidden.generation.spatial import k_nearest_neighbors, batched_k_nearest_neighbors, link_components
+from hidden.generation.topologies import TOPOLOGIES
+
+
+def index_components(positions: np.ndarray, edge_u: np.ndarray, edge_v: np.ndarray,
+                     connected: bool = False) -> Tuple[ComponentIndex, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Union-find component index of a layout given as arrays. With `connected`,
+    short links (see link_components) first join all components into one.
+
+    Returns:
+        Tuple of (ComponentIndex, link_u, link_v, link_distances); the links
+        are empty unless `connected` had to add them
+    """
+    n_nodes = len(positions)
+    labels = component_labels(n_nodes, edge_u, edge_v)
+    if connected and n_nodes > 1:
+        link_u, link_v, link_dist = link_components(positions, labels)
+        labels = component_labels(n_nodes, np.concatenate([np.arange(n_nodes), link_u]),
+                                  np.concatenate([labels, link_v]))
+    else:
+        link_u = link_v = np.empty(0, dtype=np.int64)
+        link_dist = np.empty(0)
+    return ComponentIndex(labels), link_u, link_v, link_dist
+
+
+class CityBatch:
+    """
+    Many city layouts stored as flat arrays.
+    CityGraph objects are only built when a city is requested.
+    """
+
+    def __init__(self, sizes: np.ndarray, positions: np.ndarray, nearest: np.ndarray,
+                 distances: np.ndarray, starting_nodes: np.ndarray,
+                 extraction_nodes: np.ndarray, max_resources: np.ndarray,
+                 connected: bool = False):
+        self.sizes = sizes  # Nodes per city
+        self.offsets = np.concatenate(([0], np.cumsum(sizes)))  # City i owns rows offsets[i]:offsets[i+1]
+        self.positions = positions  # (total_nodes, 2)
+        self.nearest = nearest  # (total_nodes, 3) local neighbour ids, -1 if missing
+        self.distances = distances  # (total_nodes, 3) matching edge weights
+        self.starting_nodes = starting_nodes  # (n_cities,)
+        self.extraction_nodes = extraction_nodes  # (n_cities, 2)
+        self.max_resources = max_resources  # (n_cities,)
+        self.connected = connected  # Link components when a city is materialized
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    def __getitem__(self, index: int) -> Tuple[CityGraph, int]:
+        """Materialize one city, same format as CityGenerator.generate"""
+        nodes = slice(self.offsets[index], self.offsets[index + 1])
+        positions = self.positions[nodes]
+        found = self.nearest[nodes] >= 0
+        sources = np.repeat(np.arange(len(positions)), found.shape[1]).reshape(found.shape)
+        components, link_u, link_v, link_dist = index_components(positions, sources[found],
+                                                                 self.nearest[nodes][found], self.connected)
+        city = CityGraph.from_arrays(positions, np.concatenate([sources[found], link_u]),
+                                     np.concatenate([self.nearest[nodes][found], link_v]),
+                                     np.concatenate([self.distances[nodes][found], link_dist]))
+        city.metrics.set_components(components)
+
+        city.set_starting_node(int(self.starting_nodes[index]))
+        for node in self.extraction_nodes[index].tolist():
+            city.add_extraction_node(node)
+        return city, int(self.max_resources[index])
+
+    def __iter__(self) -> Iterator[Tuple[CityGraph, int]]:
+        for index in range(len(self)):
+            yield self[index]
 
 class CityGenerator:
     """Generates the city layout"""
     
-    def __init__(self, seed: int = None):
-        if seed is not None:
-            random.seed(seed)
-            np.random.seed(seed)
+    def __init__(self, seed: int = None, topology: str = 'random', connected: bool = False):
+        """
+        Args:
+            seed: Random seed for reproducibility
+            topology: 'random' (points joined to their 3 nearest neighbours)
+                      or one of TOPOLOGIES: 'grid', 'delaunay', 'districts'
+            connected: Join disconnected parts of every city with short extra
+                       roads, so every node can reach every other one
+        """
+        if topology != 'random' and topology not in TOPOLOGIES:
+            raise ValueError(f"Unknown topology '{topology}', expected 'random' or one of "
+                             f"{sorted(TOPOLOGIES)}")
+        self.topology = topology
+        self.connected = connected
+        self.reseed(seed)
+
+    def reseed(self, seed: int = None):
+        """Restart this generator's private random streams from `seed`"""
+        self.rng, self.np_rng = component_rngs(seed, 'city')
             
     def calculate_max_resources(self, n_nodes: int) -> int:
         """
@@ -21,15 +107,20 @@ class CityGenerator:
         - Sometimes just enough (need perfect allocation)
         - Sometimes more than needed (test efficiency)
         """
+        return self._draw_max_resources(self.rng, n_nodes)
+
+    @staticmethod
+    def _draw_max_resources(rng, n_nodes: int) -> int:
+        """calculate_max_resources drawing from `rng`"""
         # Base calculation using graph size
         base = max(2, int(np.log2(n_nodes) * 2))
         
         # Add randomization to create different scenarios
-        scenario_type = random.random()
+        scenario_type = rng.random()
         
         if scenario_type < 0.2:  # 20% chance of impossible scenario
             # Reduce resources to make it impossible
-            max_resources = max(1, base - random.randint(2, 4))
+            max_resources = max(1, base - rng.randint(2, 4))
             
         elif scenario_type < 0.5:  # 30% chance of challenging scenario
             # Just enough resources if used perfectly
@@ -37,50 +128,128 @@ class CityGenerator:
             
         elif scenario_type < 0.8:  # 30% chance of normal scenario
             # Slightly more resources than minimum needed
-            max_resources = base + random.randint(1, 3)
+            max_resources = base + rng.randint(1, 3)
             
         else:  # 20% chance of abundant resources
             # Test efficiency with extra resources
-            max_resources = base + random.randint(4, 6)
+            max_resources = base + rng.randint(4, 6)
             
         return max_resources
+
+    @staticmethod
+    def _draw_positions(rng, n_nodes: int) -> np.ndarray:
+        """(n_nodes, 2) uniform positions in [0, 100), x then y of every node"""
+        return np.array([rng.uniform(0, 100) for _ in range(2 * n_nodes)]).reshape(-1, 2)
+
+    @staticmethod
+    def _draw_evacuation(rng, n_nodes: int) -> Tuple[int, List[int]]:
+        """Random start node and 2 distinct extraction nodes"""
+        start = rng.randint(0, n_nodes-1)
+        available_nodes = list(set(range(n_nodes)) - {start})
+        return start, rng.sample(available_nodes, 2)
+
+    @staticmethod
+    def _max_resources_from_draws(n_nodes: np.ndarray, scenario_type: np.ndarray,
+                                  extra: np.ndarray) -> np.ndarray:
+        """
+        Vectorized calculate_max_resources over uniform draws in [0, 1).
+        `extra` picks the random adjustment within each scenario's range.
+        """
+        base = np.maximum(2, (np.log2(n_nodes) * 2).astype(np.int64))
+        return np.select(
+            [scenario_type < 0.2, scenario_type < 0.5, scenario_type < 0.8],
+            [np.maximum(1, base - (2 + (extra * 3).astype(np.int64))),  # Impossible
+             base,  # Challenging
+             base + 1 + (extra * 3).astype(np.int64)],  # Normal
+            base + 4 + (extra * 3).astype(np.int64)  # Abundant
+        )
+
+    def generate_batch(self, sizes: Sequence[int], seeds: Sequence[int]) -> CityBatch:
+        """
+        Generate many random city layouts. City i is the one generate()
+        builds after reseed(seeds[i]): its positions, start and extraction
+        nodes and max resources are drawn in a Python loop, city by city
+        from its own 'city' stream, so a batch holds the same scenarios as
+        generating its cities one at a time. Only the neighbour search runs
+        once for the whole batch.
+
+        Args:
+            sizes: Number of nodes of every city (at least 3)
+            seeds: Random seed of every city
+
+        Returns:
+            CityBatch; indexing it yields (CityGraph, max_resources) like generate
+        """
+        if self.topology != 'random':
+            raise ValueError("generate_batch only builds the 'random' topology")
+        sizes = np.asarray(sizes, dtype=np.int64)
+        if len(sizes) != len(seeds):
+            raise ValueError("sizes and seeds must have the same length")
+        if len(sizes) and sizes.min() < 3:
+            raise ValueError("Cities need at least 3 nodes (start + 2 extraction points)")
+
+        # Draws of every city in generate()'s order: positions, start and
+        # extraction nodes, max resources
+        positions, start, extraction, max_resources = [], [], [], []
+        for n_nodes, seed in zip(sizes.tolist(), seeds):
+            rng, _ = component_rngs(seed, 'city')
+            positions.append(self._draw_positions(rng, n_nodes))
+            city_start, city_extraction = self._draw_evacuation(rng, n_nodes)
+            start.append(city_start)
+            extraction.append(city_extraction)
+            max_resources.append(self._draw_max_resources(rng, n_nodes))
+        positions = np.concatenate(positions) if positions else np.empty((0, 2))
+
+        nearest, distances = batched_k_nearest_neighbors(positions, sizes, k=3)
+
+        return CityBatch(sizes, positions, nearest, distances, np.array(start, dtype=np.int64),
+                         np.array(extraction, dtype=np.int64).reshape(-1, 2),
+                         np.array(max_resources, dtype=np.int64), self.connected)
             
     def generate(self, n_nodes: int) -> Tuple[CityGraph, int]:
         """
-        Generate a random city layout
+        Generate a city layout of the configured topology
         
         Returns:
             Tuple of (CityGraph, max_resources)
         """
-        city = CityGraph()
+        if self.topology != 'random':
+            return self._generate_topology(n_nodes)
         
         # Generate random positions
-        positions = [(random.uniform(0, 100), random.uniform(0, 100)) 
-                    for _ in range(n_nodes)]
-        
-        # Add nodes
-        for i in range(n_nodes):
-            city.add_node(i, positions[i])
+        positions = self._draw_positions(self.rng, n_nodes)
             
         # Add edges (connect to 3 nearest neighbors)
-        for i in range(n_nodes):
-            distances = [(j, np.sqrt((positions[i][0] - positions[j][0])**2 + 
-                                   (positions[i][1] - positions[j][1])**2))
-                        for j in range(n_nodes) if j != i]
-            nearest = sorted(distances, key=lambda x: x[1])[:3]
-            for j, dist in nearest:
-                city.add_edge(i, j, dist)
+        nearest, distances = k_nearest_neighbors(positions, k=3)
+        edge_u, edge_v = np.repeat(np.arange(n_nodes), nearest.shape[1]), nearest.ravel()
+        
+        # Component index (and links between components in connected mode)
+        components, link_u, link_v, link_dist = index_components(positions, edge_u, edge_v, self.connected)
+        city = CityGraph.from_arrays(positions, np.concatenate([edge_u, link_u]),
+                                     np.concatenate([edge_v, link_v]),
+                                     np.concatenate([distances.ravel(), link_dist]))
+        city.metrics.set_components(components)
                 
-        # Set starting node (random)
-        city.set_starting_node(random.randint(0, n_nodes-1))
+        return city, self._place_evacuation(city, n_nodes)
+    
+    def _generate_topology(self, n_nodes: int) -> Tuple[CityGraph, int]:
+        """Build one of the array TOPOLOGIES straight into an array layout"""
+        positions, edge_u, edge_v = TOPOLOGIES[self.topology](n_nodes, self.np_rng)
+        components, link_u, link_v, _ = index_components(positions, edge_u, edge_v, self.connected)
+        edge_u, edge_v = np.concatenate([edge_u, link_u]), np.concatenate([edge_v, link_v])
+        weights = np.hypot(*(positions[edge_u] - positions[edge_v]).T)
         
-        # Set extraction nodes (2 random nodes)
-        available_nodes = list(set(range(n_nodes)) - {city.starting_node})
-        extraction_nodes = random.sample(available_nodes, 2)
+        city = CityGraph.from_arrays(positions, edge_u, edge_v, weights)
+        city.metrics.set_components(components)
+        return city, self._place_evacuation(city, n_nodes)
+    
+    def _place_evacuation(self, city: CityGraph, n_nodes: int) -> int:
+        """Pick the start and extraction nodes; returns max resources"""
+        # Set starting node and extraction nodes (2 random nodes)
+        start, extraction_nodes = self._draw_evacuation(self.rng, n_nodes)
+        city.set_starting_node(start)
         for node in extraction_nodes:
             city.add_extraction_node(node)
             
         # Calculate max resources for this city
-        max_resources = self.calculate_max_resources(n_nodes)
-            
-        return city, max_resources 
\ No newline at end of file
+        return self.calculate_max_resources(n_nodes)
@@ -0,0 +1,79 @@
+import time
+import numpy as np
+from typing import Dict
+
+from hidden.generation.city_gen import CityGenerator
+from hidden.generation.obstacles_gen import TrueStateGenerator
+from hidden.generation.proxy_gen import ProxyGenerator
+
+def ks_statistic(a: np.ndarray, b: np.ndarray) -> float:
+    """Two-sample Kolmogorov-Smirnov statistic (max distance between the empirical CDFs)"""
+    a, b = np.sort(a), np.sort(b)
+    values = np.concatenate([a, b])
+    cdf_a = np.searchsorted(a, values, side='right') / len(a)
+    cdf_b = np.searchsorted(b, values, side='right') / len(b)
+    return float(np.max(np.abs(cdf_a - cdf_b)))
+
+def _compare(exact: np.ndarray, approx: np.ndarray) -> Dict[str, float]:
+    diff = np.abs(exact - approx)
+    return {
+        'mean_abs_diff': float(diff.mean()),
+        'max_abs_diff': float(diff.max()),
+        'ks': ks_statistic(exact, approx)
+    }
+
+def betweenness_drift(n_nodes: int, samples: int, n_cities: int = 10, seed: int = 0) -> Dict:
+    """
+    Measure how far sampled betweenness moves generated scenarios away from
+    exact mode.
+
+    Every city gets its true state and proxies twice, exact and sampled, from
+    identically seeded generators. The random draws are the same in both
+    modes, so every difference comes from the approximation.
+
+    Args:
+        n_nodes: Nodes per city
+        samples: Sampled source nodes for the approximate mode
+        n_cities: Number of cities to compare
+        seed: Base seed, city i uses seed + i
+
+    Returns:
+        Dict with:
+        - betweenness / zombies: mean_abs_diff, max_abs_diff and ks over all nodes
+        - proxies: the same per node and edge indicator
+        - exact_time / approx_time: true state + proxy generation seconds
+    """
+    values = {'exact': {}, 'approx': {}}
+    timings = {'exact': 0.0, 'approx': 0.0}
+
+    def collect(mode: str, name: str, data):
+        values[mode].setdefault(name, []).extend(float(v) for v in data)
+
+    for i in range(n_cities):
+        city, _ = CityGenerator(seed + i).generate(n_nodes)
+        for mode, k in (('exact', None), ('approx', samples)):
+            start = time.perf_counter()
+            true_state = TrueStateGenerator(seed + i, betweenness_samples=k).generate(city)
+            proxy = ProxyGenerator(seed=seed + i, betweenness_samples=k).generate(city, true_state)
+            timings[mode] += time.perf_counter() - start
+
+            nodes = city.nodes()
+            edges = list(proxy.edge_data)
+            collect(mode, 'betweenness', (city.metrics.betweenness_centrality(k)[n] for n in nodes))
+            collect(mode, 'zombies', (true_state['zombies'][n] for n in nodes))
+            for indicator in proxy.node_data[nodes[0]]:
+                collect(mode, f'node:{indicator}', (proxy.node_data[n][indicator] for n in nodes))
+            for indicator in proxy.edge_data[edges[0]]:
+                collect(mode, f'edge:{indicator}', (proxy.edge_data[e][indicator] for e in edges))
+
+    report = {
+        name: _compare(np.array(values['exact'][name]), np.array(values['approx'][name]))
+        for name in ('betweenness', 'zombies')
+    }
+    report['proxies'] = {
+        name: _compare(np.array(values['exact'][name]), np.array(values['approx'][name]))
+        for name in values['exact'] if ':' in name
+    }
+    report['exact_time'] = timings['exact']
+    report['approx_time'] = timings['approx']
+    return report
@@ -0,0 +1,107 @@
+import numpy as np
+from typing import Dict, Tuple
+
+from public.lib.interfaces import CityGraph
+from public.lib.sparse import EdgeMap, SparseAdjacency
+from hidden.rng import component_rngs
+from hidden.generation.obstacles_gen import true_state_arrays
+
+class HazardDynamics:
+    """
+    True state that evolves over discrete time steps (ticks): zombie hordes
+    migrate, radiation spreads and roads collapse.
+
+    State is kept as arrays in adjacency order. Every event touches one node
+    or edge and its draws are O(number of events), so a tick costs the same
+    on a 30-node city as on a million-node one with the same event count.
+    Rates are per node (per edge for collapses) and per tick.
+    """
+
+    def __init__(self, adjacency: SparseAdjacency, radiation: np.ndarray, zombies: np.ndarray,
+                 blocked: np.ndarray, seed: int = None, migration_rate: float = 0.002,
+                 spread_rate: float = 0.002, collapse_rate: float = 0.0005):
+        """
+        Args:
+            adjacency: City layout
+            radiation, zombies: Initial true state per node index (copied)
+            blocked: Initial true blockages per edge id (copied)
+            seed: Random seed for reproducibility
+            migration_rate: Chance a node's horde moves towards a neighbour
+            spread_rate: Chance a node's radiation leaks to a neighbour
+            collapse_rate: Chance a road collapses
+        """
+        self.adjacency = adjacency
+        self.radiation = np.array(radiation, dtype=float)
+        self.zombies = np.array(zombies, dtype=float)
+        self.blocked = np.array(blocked, dtype=float)
+        self.migration_rate = migration_rate
+        self.spread_rate = spread_rate
+        self.collapse_rate = collapse_rate
+        self.tick = 0
+        self.reseed(seed)
+
+    @classmethod
+    def from_true_state(cls, city: CityGraph, true_state: Dict, seed: int = None,
+                        **rates) -> "HazardDynamics":
+        """Dynamics starting from the output of TrueStateGenerator.generate"""
+        return cls(city.metrics.adjacency, *true_state_arrays(city, true_state), seed=seed, **rates)
+
+    def reseed(self, seed: int = None):
+        """Restart this component's private random streams from `seed`"""
+        self.rng, self.np_rng = component_rngs(seed, 'dynamics')
+
+    def _draw(self, n: int, rate: float) -> np.ndarray:
+        """Sorted distinct indices in [0, n), each drawn with chance ~rate"""
+        return np.unique(self.np_rng.integers(n, size=self.np_rng.binomial(n, rate)))
+
+    def _random_neighbors(self, nodes: np.ndarray) -> np.ndarray:
+        """One uniformly chosen neighbour of every node (all must have one)"""
+        adjacency = self.adjacency
+        offsets = (self.np_rng.random(len(nodes)) * adjacency.degree[nodes]).astype(np.int64)
+        return adjacency.indices[adjacency.indptr[nodes] + offsets]
+
+    def step(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Advance one tick
+
+        Returns:
+            Tuple of (node indices whose radiation or zombies changed,
+                      edge ids that became blocked)
+        """
+        n_nodes, degree = self.adjacency.n_nodes, self.adjacency.degree
+        self.tick += 1
+
+        # Zombie migration: a horde moves 20-50% of its number to a neighbour
+        movers = self._draw(n_nodes, self.migration_rate)
+        movers = movers[(self.zombies[movers] > 0.45) & (degree[movers] > 0)]
+        destinations = self._random_neighbors(movers)
+        share = self.zombies[movers] * self.np_rng.uniform(0.2, 0.5, len(movers))
+        np.subtract.at(self.zombies, movers, share)
+        np.add.at(self.zombies, destinations, share)
+        self.zombies[destinations] = np.minimum(self.zombies[destinations], 1.0)
+
+        # Radiation spread: a contaminated node raises a neighbour to 80% of its level
+        sources = self._draw(n_nodes, self.spread_rate)
+        sources = sources[(self.radiation[sources] > 0) & (degree[sources] > 0)]
+        reached = self._random_neighbors(sources)
+        before = self.radiation[reached]
+        np.maximum.at(self.radiation, reached, 0.8 * self.radiation[sources])
+        contaminated = reached[self.radiation[reached] > before]
+
+        # Collapses: roads that were open become blocked
+        collapsed = self._draw(self.adjacency.n_edges, self.collapse_rate)
+        collapsed = collapsed[self.blocked[collapsed] == 0]
+        self.blocked[collapsed] = 1.0
+
+        return np.unique(np.concatenate([movers, destinations, contaminated])), collapsed
+
+    def true_state(self) -> Dict:
+        """Current state in TrueStateGenerator.generate's format (e.g. for PathEvaluator)"""
+        nodes = self.adjacency.nodes
+        blocked = self.blocked > 0
+        return {
+            'radiation': dict(zip(nodes, self.radiation.tolist())),
+            'zombies': dict(zip(nodes, self.zombies.tolist())),
+            'blockages': EdgeMap(self.adjacency, blocked, only_set=True),
+            'blocked': blocked
+        }
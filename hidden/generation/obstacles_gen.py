@@ -1,54 +1,93 @@
-import random
-import networkx as nx
 import numpy as np
 from typing import Dict, Tuple, List
 
 from public.lib.interfaces import CityGraph
+from public.lib.sparse import EdgeMap, SparseAdjacency, dijkstra, path_to
+from hidden.rng import component_rngs
+
+def true_state_arrays(city: CityGraph, true_state: Dict) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    True state as arrays: radiation and zombies per node (adjacency node
+    order) and blockages per edge id
+    """
+    adjacency = city.metrics.adjacency
+    nodes = adjacency.nodes
+    radiation = np.array([true_state['radiation'].get(n, 0) for n in nodes], dtype=float)
+    zombies = np.array([true_state['zombies'].get(n, 0) for n in nodes], dtype=float)
+    if 'blocked' in true_state:
+        return radiation, zombies, np.asarray(true_state['blocked'], dtype=float)
+    # Hand-built states only hold the blockages mapping
+    edges = [edge for edge, is_blocked in true_state['blockages'].items() if is_blocked]
+    ids = city.edge_ids([u for u, _ in edges], [v for _, v in edges])
+    blocked = np.zeros(adjacency.n_edges)
+    blocked[ids[ids >= 0]] = 1.0
+    return radiation, zombies, blocked
 
 class TrueStateGenerator:
     """Generates the true state of obstacles in the city"""
     
-    def __init__(self, seed: int = None):
-        if seed is not None:
-            random.seed(seed)
-            np.random.seed(seed)
+    def __init__(self, seed: int = None, betweenness_samples: int = None,
+                 betweenness_processes: int = None):
+        """
+        Args:
+            seed: Random seed for reproducibility
+            betweenness_samples: Estimate betweenness from this many sampled
+                                 source nodes instead of computing it exactly
+            betweenness_processes: Compute exact betweenness on this many
+                                   processes (None = serial, 0 = all cores)
+        """
+        self.betweenness_samples = betweenness_samples
+        self.betweenness_processes = betweenness_processes
+        self.reseed(seed)
+
+    def reseed(self, seed: int = None):
+        """Restart this generator's private random streams from `seed`"""
+        self.rng, self.np_rng = component_rngs(seed, 'true_state')
             
-    def _generate_blockages(self, city: CityGraph) -> Dict[Tuple[int, int], bool]:
+    def _blocked_edges(self, adjacency: SparseAdjacency, weights: np.ndarray, starting_node: int,
+                       targets: List[int]) -> np.ndarray:
+        """
+        Blockages as a bool array per adjacency edge id. Start and targets are
+        node indices; unreachable targets add no looks.
+        Pattern: Blockages tend to form barriers around important paths.
+        """
+        n_nodes = adjacency.n_nodes
+        ids = np.asarray(adjacency.nodes)
+        
+        # Shortest paths to every target from one Dijkstra tree
+        predecessor = {}
+        if targets:
+            _, predecessor = dijkstra(adjacency.indptr, adjacency.indices, weights[adjacency.entry_edge],
+                                      starting_node, targets=targets)
+        
+        # Count how often every edge is looked at next to a path: each path step
+        # looks at all edges of both its endpoints, so interior path nodes
+        # count twice. Edges of the path itself are left alone.
+        looks = np.zeros(adjacency.n_edges, dtype=np.int64)
+        for target in targets:
+            path = np.array(path_to(predecessor, starting_node, target), dtype=np.int64)
+            visits = (np.bincount(path[:-1], minlength=n_nodes) +
+                      np.bincount(path[1:], minlength=n_nodes))
+            path_looks = visits[adjacency.edge_u] + visits[adjacency.edge_v]
+            # Don't block the actual path. As before, steps are matched in
+            # walking order, so only steps towards a higher node id are spared
+            ascending = ids[path[:-1]] < ids[path[1:]]
+            path_looks[adjacency.edge_ids(path[:-1][ascending], path[1:][ascending])] = 0
+            looks += path_looks
+        
+        # Every look blocks with 50% chance (increased from 0.4), then 25%
+        # chance of random blockage; one draw per edge for the combined odds
+        return self.np_rng.random(adjacency.n_edges) < 1 - 0.75 * 0.5 ** looks
+    
+    def _generate_blockages(self, city: CityGraph) -> np.ndarray:
         """
-        Generate blockages that require explosives.
+        Generate blockages that require explosives, as a bool array per edge id.
         Pattern: Blockages tend to form barriers around important paths.
         """
-        blockages = {}
-        
-        # Calculate shortest paths to extraction points
-        paths = []
-        for target in city.extraction_nodes:
-            try:
-                path = nx.shortest_path(city.graph, city.starting_node, target, 
-                                      weight='weight')
-                paths.append(path)
-            except nx.NetworkXNoPath:
-                continue
-                
-        # Block edges near but not on these paths
-        for path in paths:
-            path_edges = set(zip(path[:-1], path[1:]))
-            for i in range(len(path) - 1):
-                # Look at edges adjacent to path
-                for node in (path[i], path[i+1]):
-                    for neighbor in city.graph.neighbors(node):
-                        edge = tuple(sorted((node, neighbor)))
-                        if edge not in path_edges:  # Don't block the actual path
-                            if random.random() < 0.5:  # Increased from 0.4
-                                blockages[edge] = True
-                                
-        # Add random blockages throughout the graph
-        for edge in city.graph.edges():
-            edge = tuple(sorted(edge))
-            if edge not in blockages and random.random() < 0.25:  # 25% chance of random blockage
-                blockages[edge] = True
-                                
-        return blockages
+        adjacency = city.metrics.adjacency
+        targets = [target for target in city.extraction_nodes if city.is_reachable(city.starting_node, target)]
+        starting_node, *targets = adjacency.node_indices([city.starting_node] + targets).tolist()
+        return self._blocked_edges(adjacency, city.metrics.weights, starting_node, targets)
         
     def _generate_zombie_zones(self, city: CityGraph) -> Dict[int, float]:
         """
@@ -58,17 +97,18 @@ class TrueStateGenerator:
         zombies = {}
         
         # Calculate betweenness centrality (identifies chokepoints)
-        centrality = nx.betweenness_centrality(city.graph)
+        centrality = city.metrics.betweenness_centrality(
+            self.betweenness_samples, processes=self.betweenness_processes)
         
         # Higher zombie concentration in high-centrality nodes
-        for node in city.graph.nodes():
+        for node in city.nodes():
             base_prob = centrality[node] * 3  # Tripled to get higher values
             # Add more randomness for unpredictability
-            zombies[node] = min(1.0, max(0.0, base_prob + random.uniform(-0.1, 0.3)))
+            zombies[node] = min(1.0, max(0.0, base_prob + self.rng.uniform(-0.1, 0.3)))
             
             # 30% chance of zombie horde regardless of centrality
-            if random.random() < 0.3:
-                zombies[node] = max(zombies[node], random.uniform(0.5, 0.9))
+            if self.rng.random() < 0.3:
+                zombies[node] = max(zombies[node], self.rng.uniform(0.5, 0.9))
         
         return zombies
         
@@ -77,34 +117,69 @@ class TrueStateGenerator:
         Generate radiation zones that require suits.
         Pattern: Radiation forms in connected regions, often near extraction points.
         """
-        radiation = {node: 0.0 for node in city.graph.nodes()}
+        adjacency = city.metrics.adjacency
+        nodes = list(adjacency.nodes)
         
         # Start with extraction points as potential radiation sources
         candidates = set(city.extraction_nodes)
         
         # Add more random nodes to candidates
-        n_extra = max(2, len(city.graph.nodes) // 8)  # Increased number of radiation sources
-        candidates.update(random.sample(list(city.graph.nodes()), n_extra))
+        n_extra = max(2, len(nodes) // 8)  # Increased number of radiation sources
+        candidates.update(self.rng.sample(nodes, n_extra))
         
         # Select actual sources (more sources than before)
-        sources = random.sample(list(candidates), 
+        sources = self.rng.sample(list(candidates), 
                               k=max(2, len(candidates) * 2 // 3))
         
-        # Calculate radiation spread (increased spread distance)
+        # Calculate radiation spread (increased spread distance). Intensity
+        # only falls with distance, so every node takes it from its nearest
+        # source: one multi-source BFS that stops at the cutoff
         max_distance = 4  # Increased from 3
-        for source in sources:
-            # Get all nodes within max_distance
-            for node in city.graph.nodes():
-                try:
-                    distance = nx.shortest_path_length(city.graph, source, node)
-                    if distance <= max_distance:
-                        # Radiation decays less with distance
-                        intensity = 1.0 * (1 - distance/max_distance)**1.5  # Reduced power for slower decay
-                        radiation[node] = max(radiation[node], intensity)
-                except nx.NetworkXNoPath:
-                    continue
-                    
-        return radiation
+        index = {node: i for i, node in enumerate(nodes)}
+        distance = adjacency.bfs_distances([index[source] for source in sources], cutoff=max_distance)
+        # Radiation decays less with distance (reduced power for slower decay)
+        intensity = np.array([1.0 * (1 - d/max_distance)**1.5 for d in range(max_distance + 1)] + [0.0])
+        return dict(zip(nodes, intensity[distance].tolist()))  # distance -1 (unreached) -> 0.0
+        
+    def generate_arrays(self, adjacency: SparseAdjacency, weights: np.ndarray, starting_node: int,
+                        extraction_nodes: List[int],
+                        centrality: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Array version of generate for layouts held only as CSR arrays (no
+        networkx graph), e.g. streamed metropolitan cities. Same patterns and
+        odds as generate, with vectorized draws from the numpy stream.
+        
+        Args:
+            adjacency: CSR layout over dense node indices
+            weights: Length of every edge (adjacency edge id order)
+            starting_node: Evacuation start (node index)
+            extraction_nodes: Extraction points (node indices)
+            centrality: Betweenness centrality of every node
+            
+        Returns:
+            Tuple of (radiation per node, zombies per node, blocked per edge)
+        """
+        n_nodes = adjacency.n_nodes
+        
+        # Radiation: intensity only depends on the distance to the nearest
+        # source, so one multi-source BFS replaces a BFS per source
+        max_distance = 4
+        n_extra = min(n_nodes, max(2, n_nodes // 8))
+        candidates = np.union1d(extraction_nodes, self.np_rng.choice(n_nodes, n_extra, replace=False))
+        sources = self.np_rng.choice(candidates, replace=False,
+                                     size=min(len(candidates), max(2, len(candidates) * 2 // 3)))
+        distance = adjacency.bfs_distances(sources, cutoff=max_distance)
+        radiation = np.where(distance >= 0, (1 - distance / max_distance) ** 1.5, 0.0)
+        
+        # Zombies: chokepoints plus a 30% chance of a horde anywhere
+        zombies = np.clip(centrality * 3 + self.np_rng.uniform(-0.1, 0.3, n_nodes), 0.0, 1.0)
+        horde = self.np_rng.random(n_nodes) < 0.3
+        zombies = np.where(horde, np.maximum(zombies, self.np_rng.uniform(0.5, 0.9, n_nodes)), zombies)
+        
+        # Blockages: looks around the shortest paths, as in _generate_blockages
+        blocked = self._blocked_edges(adjacency, weights, starting_node, extraction_nodes)
+        
+        return radiation, zombies, blocked
         
     def generate(self, city: CityGraph) -> Dict:
         """
@@ -119,17 +194,20 @@ class TrueStateGenerator:
             
         Returns:
             Dict containing:
-            - blockages: Dict[Tuple[int, int], bool]
+            - blockages: Mapping[Tuple[int, int], bool], the blocked edges
+            - blocked: bool array per edge id (see CityGraph.edge_ids), the
+                       array the blockages mapping reads
             - zombies: Dict[int, float]
             - radiation: Dict[int, float]
         """
         # Generate each type of obstacle
         radiation = self._generate_radiation_zones(city)
         zombies = self._generate_zombie_zones(city)
-        blockages = self._generate_blockages(city)
+        blocked = self._generate_blockages(city)
         
         return {
-            'blockages': blockages,
+            'blockages': EdgeMap(city.metrics.adjacency, blocked, only_set=True),
+            'blocked': blocked,
             'zombies': zombies,
             'radiation': radiation
         } 
\ No newline at end of file
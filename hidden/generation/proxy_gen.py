@@ -1,126 +1,218 @@
-import random
-import networkx as nx
-from typing import Dict, Tuple
+import numpy as np
+from typing import Dict, Iterator, List, Sequence, Tuple
 
 from public.lib.interfaces import CityGraph, ProxyData
+from public.lib.sparse import SparseAdjacency
+from hidden.rng import component_rngs
+from hidden.generation.obstacles_gen import true_state_arrays
+from hidden.generation.dynamics import HazardDynamics
+
+class ProxyIndicators:
+    """
+    Noise-free proxy indicators of one scenario, ready to be observed many times.
+
+    Node values are a (n_indicators, n_nodes) array aligned with `nodes`;
+    edge values a (n_indicators, n_edges) array aligned with `edges`.
+    The layout and its structural metrics are kept for incremental updates
+    (see ProxyGenerator.update_indicators).
+    """
+    def __init__(self, nodes: List[int], node_names: List[str], node_values: np.ndarray,
+                 edges: List[Tuple[int, int]], edge_names: List[str], edge_values: np.ndarray,
+                 adjacency: SparseAdjacency = None, centrality: np.ndarray = None,
+                 clustering: np.ndarray = None):
+        self.nodes = nodes
+        self.node_names = node_names
+        self.node_values = node_values
+        self.edges = edges  # Sorted (node1, node2) keys, by edge id
+        self.edge_names = edge_names
+        self.edge_values = edge_values
+        self.adjacency = adjacency
+        self.centrality = centrality
+        self.clustering = clustering
+
+    def observe(self, node_noise: np.ndarray, edge_noise: np.ndarray, dtype=np.float64) -> ProxyData:
+        """ProxyData with the given noise added, clipped to [0,1] and stored as `dtype`"""
+        return ProxyData(self.nodes, self.node_names, np.clip(self.node_values + node_noise, 0.0, 1.0),
+                         self.edges, self.edge_names, np.clip(self.edge_values + edge_noise, 0.0, 1.0),
+                         dtype=dtype)
+
+class IndicatorUpdate:
+    """
+    Noisy observations of the indicators that changed during one tick.
+    Values are (n_changed, n_indicators) lists aligned with nodes / edges.
+    """
+    def __init__(self, tick: int, nodes: List[int], node_names: List[str], node_values: List[List[float]],
+                 edges: List[Tuple[int, int]], edge_names: List[str], edge_values: List[List[float]]):
+        self.tick = tick
+        self.nodes = nodes
+        self.node_names = node_names
+        self.node_values = node_values
+        self.edges = edges
+        self.edge_names = edge_names
+        self.edge_values = edge_values
+
+    def apply(self, proxy: ProxyData):
+        """Overwrite the changed indicators of a ProxyData in place"""
+        proxy.node_data.assign(self.nodes, self.node_names, self.node_values)
+        proxy.edge_data.assign(self.edges, self.edge_names, self.edge_values)
 
 class ProxyGenerator:
     """Generates environmental indicators based on complex patterns of true events"""
     
-    def __init__(self, noise_level: float = 0.1, seed: int = None):
+    def __init__(self, noise_level: float = 0.1, seed: int = None,
+                 betweenness_samples: int = None, betweenness_processes: int = None,
+                 dtype=np.float64):
         """
         Args:
             noise_level: Uncertainty in observations (0-1)
             seed: Random seed for reproducibility
+            betweenness_samples: Estimate betweenness from this many sampled
+                                 source nodes instead of computing it exactly
+            betweenness_processes: Compute exact betweenness on this many
+                                   processes (None = serial, 0 = all cores)
+            dtype: Storage type of the observed indicators (np.float32
+                   halves the memory of every ProxyData)
         """
         self.noise_level = noise_level
-        if seed is not None:
-            random.seed(seed)
+        self.dtype = dtype
+        self.betweenness_samples = betweenness_samples
+        self.betweenness_processes = betweenness_processes
+        self.reseed(seed)
+
+    def reseed(self, seed: int = None):
+        """Restart this generator's private random streams from `seed`"""
+        self.rng, self.np_rng = component_rngs(seed, 'proxy')
             
-    def _add_noise(self, value: float) -> float:
-        """Add uncertainty to observations while keeping in [0,1]"""
-        noise = random.uniform(-self.noise_level, self.noise_level)
-        return max(0.0, min(1.0, value + noise))
-    
-    def _calculate_node_metrics(self, city: CityGraph, true_state: Dict) -> Dict[int, Dict]:
-        """Calculate complex node metrics based on neighborhood patterns"""
-        metrics = {}
-        
-        # Calculate base network metrics
-        centrality = nx.betweenness_centrality(city.graph)
-        clustering = nx.clustering(city.graph)
-        
-        for node in city.graph.nodes():
-            neighbors = list(city.graph.neighbors(node))
-            metrics[node] = {
-                # Infrastructure metrics
-                'centrality': centrality[node],
-                'clustering': clustering.get(node, 0),
-                
-                # Neighborhood radiation analysis
-                'radiation_zone': any(
-                    true_state['radiation'].get(n, 0) > 0.6
-                    for n in neighbors + [node]
-                ),
-                'radiation_gradient': sum(
-                    true_state['radiation'].get(n, 0)
-                    for n in neighbors + [node]
-                ) / (len(neighbors) + 1),
-                
-                # Zombie activity patterns
-                'zombie_presence': sum(
-                    1 for n in neighbors + [node]
-                    if true_state['zombies'].get(n, 0) > 0.7
-                ) / (len(neighbors) + 1),
-                'zombie_cluster': any(
-                    true_state['zombies'].get(n1, 0) > 0.5 and
-                    true_state['zombies'].get(n2, 0) > 0.5
-                    for n1 in neighbors
-                    for n2 in set(city.graph.neighbors(n1)) & set(neighbors)
-                ),
-                
-                # Structural analysis
-                'blocked_paths': sum(
-                    1 for n in neighbors
-                    if true_state['blockages'].get(tuple(sorted([node, n])), False)
-                ),
-                'access_routes': len(neighbors),
-                'isolation_risk': sum(
-                    1 for n in neighbors
-                    if sum(1 for nn in city.graph.neighbors(n)
-                        if true_state['blockages'].get(tuple(sorted([n, nn])), False)
-                    ) > len(list(city.graph.neighbors(n))) / 2
-                ) / max(1, len(neighbors))
-            }
-        
-        return metrics
+    def _calculate_node_metrics(self, adjacency: SparseAdjacency, centrality: np.ndarray,
+                                clustering: np.ndarray, radiation: np.ndarray, zombies: np.ndarray,
+                                blocked: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Calculate complex node metrics based on neighborhood patterns.
+        Every metric is an array aligned with the adjacency node indices.
+        """
+        degree = adjacency.degree
+        
+        # Zombie clusters: a triangle through the node whose two other
+        # corners both have zombies (sparse A @ A over hot-hot edges)
+        hot = zombies > 0.5
+        hot_edges = np.flatnonzero(hot[adjacency.edge_u] & hot[adjacency.edge_v])
+        _, corners = adjacency.triangles(hot_edges)
+        zombie_cluster = np.zeros(adjacency.n_nodes, dtype=bool)
+        zombie_cluster[corners] = True
+        
+        # Structural analysis
+        blocked_paths = adjacency.incident_sum(blocked)
+        mostly_blocked = blocked_paths > degree / 2
+        
+        return {
+            # Infrastructure metrics
+            'centrality': centrality,
+            'clustering': clustering,
+            
+            # Neighborhood radiation analysis (neighbours and the node itself)
+            'radiation': radiation,
+            'radiation_zone': (adjacency.neighbor_sum(radiation > 0.6) + (radiation > 0.6)) > 0,
+            'radiation_gradient': (adjacency.neighbor_sum(radiation) + radiation) / (degree + 1),
+            
+            # Zombie activity patterns
+            'zombie_presence': (adjacency.neighbor_sum(zombies > 0.7) + (zombies > 0.7)) / (degree + 1),
+            'zombie_cluster': zombie_cluster,
+            
+            # Structural analysis
+            'blocked_paths': blocked_paths,
+            'access_routes': degree,
+            'isolation_risk': adjacency.neighbor_sum(mostly_blocked) / np.maximum(1, degree)
+        }
     
-    def _calculate_edge_metrics(self, city: CityGraph, true_state: Dict, node_metrics: Dict) -> Dict[Tuple[int, int], Dict]:
-        """Calculate complex edge metrics based on endpoint patterns"""
-        edge_metrics = {}
-        
-        for edge in city.graph.edges():
-            n1, n2 = edge
-            edge_key = tuple(sorted(edge))
-            
-            # Get common neighbors between endpoints
-            common_neighbors = set(city.graph.neighbors(n1)) & set(city.graph.neighbors(n2))
-            
-            edge_metrics[edge_key] = {
-                # Structural integrity
-                'is_blocked': true_state['blockages'].get(edge_key, False),
-                'nearby_blockages': sum(
-                    1 for n in common_neighbors
-                    if any(true_state['blockages'].get(tuple(sorted([n, end])), False)
-                          for end in [n1, n2])
-                ) / max(1, len(common_neighbors)),
-                
-                # Environmental hazards
-                'radiation_exposure': max(
-                    true_state['radiation'].get(n1, 0),
-                    true_state['radiation'].get(n2, 0)
-                ),
-                'radiation_gradient': abs(
-                    true_state['radiation'].get(n1, 0) -
-                    true_state['radiation'].get(n2, 0)
-                ),
-                
-                # Activity patterns
-                'zombie_movement': (
-                    true_state['zombies'].get(n1, 0) +
-                    true_state['zombies'].get(n2, 0)
-                ) / 2,
-                'activity_cluster': sum(
-                    1 for n in common_neighbors
-                    if true_state['zombies'].get(n, 0) > 0.4
-                ) / max(1, len(common_neighbors))
-            }
-            
-        return edge_metrics
+    def _calculate_edge_metrics(self, adjacency: SparseAdjacency, radiation: np.ndarray,
+                                zombies: np.ndarray, blocked: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Calculate complex edge metrics based on endpoint patterns.
+        Every metric is an array aligned with the adjacency edge ids.
+        """
+        u, v = adjacency.edge_u, adjacency.edge_v
+        
+        # Common neighbours of the endpoints: one triangle per (edge, third corner)
+        edge, third = adjacency.triangles()
+        n_common = np.maximum(1, np.bincount(edge, minlength=adjacency.n_edges))
+        side_blocked = np.maximum(blocked[adjacency.edge_ids(third, u[edge])],
+                                  blocked[adjacency.edge_ids(third, v[edge])])
+        
+        return {
+            # Structural integrity
+            'is_blocked': blocked,
+            'nearby_blockages': np.bincount(edge, weights=side_blocked,
+                                            minlength=adjacency.n_edges) / n_common,
+            
+            # Environmental hazards
+            'radiation_exposure': np.maximum(radiation[u], radiation[v]),
+            'radiation_gradient': np.abs(radiation[u] - radiation[v]),
+            
+            # Activity patterns
+            'zombie_movement': (zombies[u] + zombies[v]) / 2,
+            'activity_cluster': np.bincount(edge, weights=zombies[third] > 0.4,
+                                            minlength=adjacency.n_edges) / n_common
+        }
             
     def generate(self, city: CityGraph, true_state: Dict) -> ProxyData:
         """
-        Generate proxy indicators based on complex environmental patterns
+        Generate proxy indicators based on complex environmental patterns,
+        observed with this generator's noise level (see compute_indicators)
+        """
+        return self.sample(self.compute_indicators(city, true_state))[0]
+    
+    def sample(self, indicators: ProxyIndicators, n_samples: int = 1,
+               noise_level: float = None) -> List[ProxyData]:
+        """
+        Independent noisy observations of precomputed indicators. Only the
+        noise is drawn, so K samples cost a fraction of K generate calls.
+        
+        Args:
+            indicators: Output of compute_indicators
+            n_samples: Number of realizations
+            noise_level: Uncertainty of the observations (default: self.noise_level)
+            
+        Returns:
+            List of n_samples ProxyData
+        """
+        level = self.noise_level if noise_level is None else noise_level
+        return [
+            indicators.observe(
+                self.np_rng.uniform(-level, level, size=indicators.node_values.shape),
+                self.np_rng.uniform(-level, level, size=indicators.edge_values.shape),
+                self.dtype
+            )
+            for _ in range(n_samples)
+        ]
+    
+    def sweep(self, indicators: ProxyIndicators, noise_levels: Sequence[float],
+              n_samples: int = 1) -> Dict[float, List[ProxyData]]:
+        """
+        Noisy observations of precomputed indicators over a range of noise levels.
+        
+        Realization k shares its underlying uniform draws across all levels
+        (only their scale changes), so differences between levels come from
+        the noise level alone and not from different draws.
+        
+        Args:
+            indicators: Output of compute_indicators
+            noise_levels: Uncertainty levels to observe at
+            n_samples: Realizations per level
+            
+        Returns:
+            Dict mapping noise level -> list of n_samples ProxyData
+        """
+        sweep = {level: [] for level in noise_levels}
+        for _ in range(n_samples):
+            node_draws = self.np_rng.uniform(-1.0, 1.0, size=indicators.node_values.shape)
+            edge_draws = self.np_rng.uniform(-1.0, 1.0, size=indicators.edge_values.shape)
+            for level in noise_levels:
+                sweep[level].append(indicators.observe(level * node_draws, level * edge_draws, self.dtype))
+        return sweep
+    
+    def compute_indicators(self, city: CityGraph, true_state: Dict) -> ProxyIndicators:
+        """
+        Noise-free proxy indicators based on complex environmental patterns
         
         Node Indicators:
             - seismic_activity: Based on nearby blockages and structural patterns
@@ -138,112 +230,185 @@ class ProxyGenerator:
             - debris_density: Route blockage assessment
             - hazard_gradient: Change in environmental conditions
         """
-        proxy = ProxyData()
+        # Base network metrics (shared with the other generators)
+        structure = city.metrics
+        adjacency = structure.adjacency
+        centrality = structure.betweenness_centrality(
+            self.betweenness_samples, processes=self.betweenness_processes)
+        clustering = structure.clustering
+        
+        centrality = np.array([centrality[n] for n in adjacency.nodes], dtype=float)
+        clustering = np.array([clustering.get(n, 0) for n in adjacency.nodes], dtype=float)
+        node_names, node_values, edge_names, edge_values = self.indicator_arrays(
+            adjacency, centrality, clustering, *true_state_arrays(city, true_state))
+        return ProxyIndicators(adjacency.nodes, node_names, node_values, structure.edge_keys, edge_names,
+                               edge_values, adjacency, centrality, clustering)
+    
+    def update_indicators(self, indicators: ProxyIndicators, radiation: np.ndarray, zombies: np.ndarray,
+                          blocked: np.ndarray, nodes: np.ndarray,
+                          edges: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Recompute in place the indicators that depend on changed true state.
+        
+        A node indicator reads the node's neighbours and their incident
+        edges; an edge indicator reads both endpoints' neighbourhoods. So
+        only nodes within one hop of a change and their edges can change.
+        Those edges reach one hop further, and their endpoints' inputs two
+        more, so they are recomputed on the subgraph within three hops of
+        the change. Results equal a full recomputation exactly.
+        
+        Args:
+            indicators: Output of compute_indicators, updated in place
+            radiation, zombies: Current true state per node index
+            blocked: Current true blockages per edge id
+            nodes: Node indices whose radiation or zombies changed
+            edges: Edge ids whose blockage changed
+            
+        Returns:
+            Tuple of (recomputed node indices, recomputed edge ids)
+        """
+        adjacency = indicators.adjacency
+        changed = np.union1d(nodes, np.concatenate([adjacency.edge_u[edges], adjacency.edge_v[edges]]))
+        if len(changed) == 0:
+            return changed, np.empty(0, dtype=np.int64)
+        affected = np.union1d(changed, adjacency.indices[adjacency.entries(changed)])
+        region = affected
+        for _ in range(2):
+            region = np.union1d(region, adjacency.indices[adjacency.entries(region)])
+        subgraph, region_edges = adjacency.subgraph(region)
         
+        _, node_values, _, edge_values = self.indicator_arrays(
+            subgraph, indicators.centrality[region], indicators.clustering[region],
+            radiation[region], zombies[region], blocked[region_edges])
+        affected_edges = np.unique(adjacency.entry_edge[adjacency.entries(affected)])
+        indicators.node_values[:, affected] = node_values[:, np.searchsorted(region, affected)]
+        indicators.edge_values[:, affected_edges] = edge_values[:, np.searchsorted(region_edges, affected_edges)]
+        return affected, affected_edges
+    
+    def evolve(self, indicators: ProxyIndicators, dynamics: HazardDynamics, n_ticks: int,
+               noise_level: float = None) -> Iterator[IndicatorUpdate]:
+        """
+        Advance the hazards tick by tick, yielding the indicators that changed.
+        Only changed indicators get fresh noise; apply every update to a
+        ProxyData from sample() to keep it current.
+        
+        Args:
+            indicators: Output of compute_indicators for the dynamics' city,
+                        kept current in place
+            dynamics: Evolving true state
+            n_ticks: Number of time steps
+            noise_level: Uncertainty of the observations (default: self.noise_level)
+        """
+        level = self.noise_level if noise_level is None else noise_level
+        for _ in range(n_ticks):
+            nodes, edges = self.update_indicators(indicators, dynamics.radiation, dynamics.zombies,
+                                                  dynamics.blocked, *dynamics.step())
+            node_values = np.clip(indicators.node_values[:, nodes] +
+                                  self.np_rng.uniform(-level, level, size=(len(indicators.node_names), len(nodes))),
+                                  0.0, 1.0)
+            edge_values = np.clip(indicators.edge_values[:, edges] +
+                                  self.np_rng.uniform(-level, level, size=(len(indicators.edge_names), len(edges))),
+                                  0.0, 1.0)
+            yield IndicatorUpdate(dynamics.tick,
+                                  [indicators.nodes[i] for i in nodes.tolist()], indicators.node_names,
+                                  node_values.T.tolist(),
+                                  [indicators.edges[e] for e in edges.tolist()], indicators.edge_names,
+                                  edge_values.T.tolist())
+    
+    def indicator_arrays(self, adjacency: SparseAdjacency, centrality: np.ndarray, clustering: np.ndarray,
+                         radiation: np.ndarray, zombies: np.ndarray,
+                         blocked: np.ndarray) -> Tuple[List[str], np.ndarray, List[str], np.ndarray]:
+        """
+        Noise-free indicators of a layout held as arrays (see compute_indicators).
+        
+        Args:
+            adjacency: CSR layout over dense node indices
+            centrality, clustering: Structural metrics per node
+            radiation, zombies: True state per node
+            blocked: True blockages per edge (adjacency edge id order)
+            
+        Returns:
+            Tuple of (node indicator names, (n_names, n_nodes) values,
+                      edge indicator names, (n_names, n_edges) values)
+        """
         # Calculate complex metrics
-        node_metrics = self._calculate_node_metrics(city, true_state)
-        edge_metrics = self._calculate_edge_metrics(city, true_state, node_metrics)
-        
-        # Generate node indicators
-        for node, metrics in node_metrics.items():
-            # Seismic activity (structural patterns)
-            seismic = (
-                0.7 * (metrics['blocked_paths'] / max(1, metrics['access_routes'])) +
-                0.3 * metrics['isolation_risk']
-            )
-            proxy.add_node_indicator(node, 'seismic_activity', self._add_noise(seismic))
+        state = (radiation, zombies, blocked)
+        node_metrics = self._calculate_node_metrics(adjacency, centrality, clustering, *state)
+        edge_metrics = self._calculate_edge_metrics(adjacency, *state)
+        
+        # Generate node indicators, one array per indicator
+        m = node_metrics
+        blocked_ratio = m['blocked_paths'] / np.maximum(1, m['access_routes'])
+        
+        # Seismic activity (structural patterns)
+        seismic = 0.7 * blocked_ratio + 0.3 * m['isolation_risk']
+        node_indicators = {
+            'seismic_activity': seismic,
             
             # Radiation readings (with detection patterns)
-            radiation = (
-                0.8 * true_state['radiation'].get(node, 0) +
-                0.2 * metrics['radiation_gradient']
-            )
-            proxy.add_node_indicator(node, 'radiation_readings', self._add_noise(radiation))
+            'radiation_readings': 0.8 * m['radiation'] + 0.2 * m['radiation_gradient'],
             
             # Population density (pre-event patterns)
-            density = (
-                0.4 * metrics['clustering'] * metrics['centrality'] * 2 +
-                0.6 * metrics['zombie_presence']
-            )
-            proxy.add_node_indicator(node, 'population_density', self._add_noise(density))
+            'population_density': (0.4 * m['clustering'] * m['centrality'] * 2 +
+                                   0.6 * m['zombie_presence']),
             
             # Emergency calls (historical patterns)
-            emergency = max(
-                metrics['zombie_cluster'] * 0.8,
-                metrics['radiation_zone'] * 0.9,
-                metrics['isolation_risk'] * 0.7
-            )
-            proxy.add_node_indicator(node, 'emergency_calls', self._add_noise(emergency))
+            'emergency_calls': np.maximum.reduce([
+                m['zombie_cluster'] * 0.8,
+                m['radiation_zone'] * 0.9,
+                m['isolation_risk'] * 0.7
+            ]),
             
             # Thermal readings (current activity)
-            thermal = (
-                0.7 * metrics['zombie_presence'] +
-                0.3 * metrics['clustering']
-            )
-            proxy.add_node_indicator(node, 'thermal_readings', self._add_noise(thermal))
+            'thermal_readings': 0.7 * m['zombie_presence'] + 0.3 * m['clustering'],
             
             # Signal strength (infrastructure status)
-            signal = max(0, 1 - (
-                0.4 * metrics['radiation_gradient'] +
-                0.3 * (metrics['blocked_paths'] / max(1, metrics['access_routes'])) +
-                0.3 * metrics['isolation_risk']
-            ))
-            proxy.add_node_indicator(node, 'signal_strength', self._add_noise(signal))
+            'signal_strength': np.maximum(0, 1 - (
+                0.4 * m['radiation_gradient'] +
+                0.3 * blocked_ratio +
+                0.3 * m['isolation_risk']
+            )),
             
             # Structural integrity
-            structural = max(0, 1 - (
-                0.5 * (metrics['blocked_paths'] / max(1, metrics['access_routes'])) +
-                0.3 * metrics['isolation_risk'] +
+            'structural_integrity': np.maximum(0, 1 - (
+                0.5 * blocked_ratio +
+                0.3 * m['isolation_risk'] +
                 0.2 * seismic
             ))
-            proxy.add_node_indicator(node, 'structural_integrity', self._add_noise(structural))
+        }
         
-        # Generate edge indicators
-        for edge in city.graph.edges():
-            edge_key = tuple(sorted(edge))
-            metrics = edge_metrics[edge_key]
-            
-            # Structural damage
-            damage = (
-                0.6 * float(metrics['is_blocked']) +
-                0.4 * metrics['nearby_blockages']
-            )
-            proxy.add_edge_indicator(edge[0], edge[1], 'structural_damage',
-                                   self._add_noise(damage))
-            
-            # Signal interference
-            interference = (
-                0.4 * metrics['radiation_exposure'] +
-                0.4 * metrics['radiation_gradient'] +
-                0.2 * float(metrics['is_blocked'])
-            )
-            proxy.add_edge_indicator(edge[0], edge[1], 'signal_interference',
-                                   self._add_noise(interference))
+        # Generate edge indicators, one array per indicator
+        e = edge_metrics
+        
+        # Structural damage
+        damage = 0.6 * e['is_blocked'] + 0.4 * e['nearby_blockages']
+        
+        # Signal interference
+        interference = (
+            0.4 * e['radiation_exposure'] +
+            0.4 * e['radiation_gradient'] +
+            0.2 * e['is_blocked']
+        )
+        edge_indicators = {
+            'structural_damage': damage,
+            'signal_interference': interference,
             
             # Movement sightings
-            movement = (
-                0.6 * metrics['zombie_movement'] +
-                0.4 * metrics['activity_cluster']
-            )
-            proxy.add_edge_indicator(edge[0], edge[1], 'movement_sightings',
-                                   self._add_noise(movement))
+            'movement_sightings': 0.6 * e['zombie_movement'] + 0.4 * e['activity_cluster'],
             
             # Debris density
-            debris = (
+            'debris_density': (
                 0.5 * damage +
-                0.3 * metrics['nearby_blockages'] +
+                0.3 * e['nearby_blockages'] +
                 0.2 * interference
-            )
-            proxy.add_edge_indicator(edge[0], edge[1], 'debris_density',
-                                   self._add_noise(debris))
+            ),
             
             # Hazard gradient
-            hazard = max(
-                metrics['radiation_gradient'],
-                abs(node_metrics[edge[0]]['zombie_presence'] -
-                    node_metrics[edge[1]]['zombie_presence'])
+            'hazard_gradient': np.maximum(
+                e['radiation_gradient'],
+                np.abs(m['zombie_presence'][adjacency.edge_u] - m['zombie_presence'][adjacency.edge_v])
             )
-            proxy.add_edge_indicator(edge[0], edge[1], 'hazard_gradient',
-                                   self._add_noise(hazard))
-            
-        return proxy 
\ No newline at end of file
+        }
+        
+        return (list(node_indicators), np.stack(list(node_indicators.values())),
+                list(edge_indicators), np.stack(list(edge_indicators.values())))
@@ -0,0 +1,235 @@
+import numpy as np
+from typing import Tuple
+
+from public.lib.components import component_labels
+
+# Below this size a full distance matrix is cheaper than building the grid
+BRUTE_FORCE_MAX_NODES = 256
+
+
+def _brute_force_neighbors(positions: np.ndarray, queries: np.ndarray, k: int,
+                           chunk_size: int = 256) -> Tuple[np.ndarray, np.ndarray]:
+    """k nearest neighbours of `queries` (point ids) against every point"""
+    nearest = np.empty((len(queries), k), dtype=np.int64)
+    distances = np.empty((len(queries), k), dtype=np.float64)
+    for start in range(0, len(queries), chunk_size):
+        rows = queries[start:start + chunk_size]
+        dist = np.sqrt((positions[rows, 0, None] - positions[None, :, 0])**2 +
+                       (positions[rows, 1, None] - positions[None, :, 1])**2)
+        dist[np.arange(len(rows)), rows] = np.inf  # A node is not its own neighbour
+        # Stable sort over ids in ascending order breaks ties by the lower id
+        order = np.argsort(dist, axis=1, kind='stable')[:, :k]
+        nearest[start:start + chunk_size] = order
+        distances[start:start + chunk_size] = np.take_along_axis(dist, order, axis=1)
+    return nearest, distances
+
+
+def k_nearest_neighbors(positions: np.ndarray, k: int = 3, max_candidates: int = 262_144,
+                        queries: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the k nearest neighbours of every point using grid bucketing.
+
+    Points are bucketed into square cells holding ~k/2 points each (at least
+    2). Every point first searches the 3x3 block of cells around it; points
+    whose k-th neighbour is not provably inside that block are searched again
+    with a wider ring until the answer is exact. The result is identical to sorting
+    all pairwise distances, including ties (broken by the lower node id).
+
+    Args:
+        positions: Array of shape (n, 2) with node coordinates
+        k: Number of neighbours per node (capped at n - 1)
+        max_candidates: Upper bound on distances computed per batch, limits memory
+        queries: Only search the neighbours of these point ids (default all)
+
+    Returns:
+        Tuple of (nearest, distances), both of shape (n_queries, k), sorted by distance
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    n = len(positions)
+    queries = np.arange(n) if queries is None else np.asarray(queries, dtype=np.int64)
+    k = max(0, min(k, n - 1))
+    if k == 0:
+        return np.empty((len(queries), 0), dtype=np.int64), np.empty((len(queries), 0), dtype=np.float64)
+    if n <= BRUTE_FORCE_MAX_NODES:
+        return _brute_force_neighbors(positions, queries, k)
+
+    # Bucket points into a grid of square cells
+    lo = positions.min(axis=0)
+    extent = positions.max(axis=0) - lo
+    per_cell = max(2, k // 2)
+    cell_size = max(float(extent.max()) / max(1, int(np.sqrt(n / per_cell))), 1e-12)
+    grid_shape = np.maximum(1, np.ceil(extent / cell_size).astype(np.int64))
+    cells = np.minimum(((positions - lo) / cell_size).astype(np.int64), grid_shape - 1)
+    cell_id = cells[:, 0] * grid_shape[1] + cells[:, 1]
+
+    # Padded cell -> point table; points of a cell are stored in ascending id order
+    order = np.argsort(cell_id, kind='stable')
+    counts = np.bincount(cell_id, minlength=int(grid_shape.prod()))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    table = np.full((len(counts), counts.max()), n, dtype=np.int64)
+    table[cell_id[order], np.arange(n) - starts[cell_id[order]]] = order
+
+    nearest = np.empty((len(queries), k), dtype=np.int64)
+    distances = np.empty((len(queries), k), dtype=np.float64)
+    slot = np.empty(n, dtype=np.int64)  # Output row of every query point
+    slot[queries] = np.arange(len(queries))
+    # Cell order keeps neighbouring lookups close in memory
+    pending = queries[np.argsort(cell_id[queries], kind='stable')]
+    ring = 1
+    while len(pending):
+        if ring > grid_shape.max():
+            # The block already covers the whole grid; fall back to a full scan
+            nearest[slot[pending]], distances[slot[pending]] = _brute_force_neighbors(positions, pending, k)
+            break
+
+        offsets = np.arange(-ring, ring + 1)
+        width = len(offsets) ** 2 * table.shape[1]
+        chunk_size = max(1, max_candidates // width)
+        unresolved = []
+        for start in range(0, len(pending), chunk_size):
+            rows = pending[start:start + chunk_size]
+            cx = cells[rows, 0, None, None] + offsets[None, :, None]
+            cy = cells[rows, 1, None, None] + offsets[None, None, :]
+            inside = (cx >= 0) & (cx < grid_shape[0]) & (cy >= 0) & (cy < grid_shape[1])
+            block = np.where(inside, cx * grid_shape[1] + cy, 0).reshape(len(rows), -1)
+            candidates = np.where(inside.reshape(len(rows), -1, 1), table[block], n)
+            candidates = np.sort(candidates.reshape(len(rows), -1), axis=1)
+
+            valid = (candidates != n) & (candidates != rows[:, None])
+            safe = np.where(valid, candidates, 0)
+            dist = np.sqrt((positions[rows, 0, None] - positions[safe, 0])**2 +
+                           (positions[rows, 1, None] - positions[safe, 1])**2)
+            dist[~valid] = np.inf
+            best = np.argsort(dist, axis=1, kind='stable')[:, :k]
+            best_dist = np.take_along_axis(dist, best, axis=1)
+
+            # Nothing outside the block can be closer than its nearest border;
+            # borders on the edge of the grid have no points beyond them
+            low = cells[rows] - ring
+            high = cells[rows] + ring + 1
+            margin_low = np.where(low > 0, positions[rows] - (lo + low * cell_size), np.inf)
+            margin_high = np.where(high < grid_shape, (lo + high * cell_size) - positions[rows], np.inf)
+            margin = np.minimum(margin_low.min(axis=1), margin_high.min(axis=1))
+            exact = best_dist[:, -1] < margin - 1e-9 * cell_size  # Slack for cell rounding
+
+            nearest[slot[rows[exact]]] = np.take_along_axis(candidates, best, axis=1)[exact]
+            distances[slot[rows[exact]]] = best_dist[exact]
+            unresolved.append(rows[~exact])
+
+        pending = np.concatenate(unresolved)
+        ring += 1
+
+    return nearest, distances
+
+
+def batched_k_nearest_neighbors(positions: np.ndarray, sizes: np.ndarray, k: int = 3,
+                                max_candidates: int = 262_144) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    k nearest neighbours for many independent point sets at once.
+
+    Point sets are stored back to back in `positions`; neighbours are only
+    searched within the same set. Small sets are padded to a common size and
+    solved together with one distance tensor, larger ones go through the grid
+    search of `k_nearest_neighbors`. Results match calling
+    `k_nearest_neighbors` on every set separately.
+
+    Args:
+        positions: Array of shape (sum(sizes), 2) with the concatenated coordinates
+        sizes: Number of points in every set
+        k: Number of neighbours per node
+        max_candidates: Upper bound on distances computed per batch, limits memory
+
+    Returns:
+        Tuple of (nearest, distances), both of shape (sum(sizes), k). Neighbour
+        ids are local to their set; sets with fewer than k + 1 points are
+        padded with -1 and inf.
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    sizes = np.asarray(sizes, dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(sizes)))
+    nearest = np.full((offsets[-1], k), -1, dtype=np.int64)
+    distances = np.full((offsets[-1], k), np.inf)
+
+    for s in np.flatnonzero(sizes > BRUTE_FORCE_MAX_NODES):
+        nodes = slice(offsets[s], offsets[s + 1])
+        nn, dist = k_nearest_neighbors(positions[nodes], k, max_candidates)
+        nearest[nodes, :nn.shape[1]] = nn
+        distances[nodes, :nn.shape[1]] = dist
+
+    small = np.flatnonzero(sizes <= BRUTE_FORCE_MAX_NODES)
+    if len(small) == 0:
+        return nearest, distances
+    width = int(sizes[small].max())
+    local = np.arange(width)
+    chunk_size = max(1, max_candidates // (width * width))
+    for start in range(0, len(small), chunk_size):
+        sets = small[start:start + chunk_size]
+        valid = local[None, :] < sizes[sets, None]
+        ids = np.where(valid, offsets[sets, None] + local, 0)
+        x, y = positions[ids, 0], positions[ids, 1]
+        dist = np.sqrt((x[:, :, None] - x[:, None, :])**2 +
+                       (y[:, :, None] - y[:, None, :])**2)
+        dist[~np.broadcast_to(valid[:, None, :], dist.shape)] = np.inf  # Padding
+        dist[:, local, local] = np.inf  # A node is not its own neighbour
+        order = np.argsort(dist, axis=2, kind='stable')[:, :, :k]
+        best_dist = np.take_along_axis(dist, order, axis=2)
+        found = min(k, width)
+        nearest[ids[valid], :found] = np.where(np.isinf(best_dist), -1, order)[valid]
+        distances[ids[valid], :found] = best_dist[valid]
+
+    return nearest, distances
+
+def link_components(positions: np.ndarray, labels: np.ndarray,
+                    k: int = 8) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Short edges that join every connected component into one (Boruvka rounds).
+
+    Each round, every component but the largest adds its shortest edge
+    towards another component among its nodes' k nearest neighbours, which
+    at least halves the number of smaller components. Components with no
+    outside candidate make the next round search twice as many neighbours.
+
+    Args:
+        positions: Array of shape (n, 2) with node coordinates
+        labels: Component root of every node (see component_labels)
+        k: Initial number of neighbour candidates per node
+
+    Returns:
+        Tuple of (edge_u, edge_v, distances) of the added edges
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    n = len(positions)
+    links_u, links_v, links_dist = [], [], []
+    k = min(k, n - 1)
+    while True:
+        sizes = np.bincount(labels, minlength=n)
+        n_components = np.count_nonzero(sizes)
+        if n_components <= 1:
+            break
+        queries = np.flatnonzero(labels != np.argmax(sizes))
+        nearest, distances = k_nearest_neighbors(positions, k=k, queries=queries)
+
+        # Nearest outside candidate of every node, then the shortest per component
+        cross = labels[nearest] != labels[queries, None]
+        has_cross = cross.any(axis=1)
+        nodes = queries[has_cross]
+        first = cross[has_cross].argmax(axis=1)
+        targets, dist = nearest[has_cross, first], distances[has_cross, first]
+        components = labels[nodes]
+        order = np.lexsort((dist, components))
+        shortest = np.ones(len(order), dtype=bool)
+        shortest[1:] = components[order][1:] != components[order][:-1]
+        picked = order[shortest]
+        if len(picked) < n_components - 1:
+            k = min(2 * k, n - 1)
+
+        links_u.append(nodes[picked])
+        links_v.append(targets[picked])
+        links_dist.append(dist[picked])
+        # Merge the joined components: node -> old root edges plus the new links
+        labels = component_labels(n, np.concatenate([np.arange(n), nodes[picked]]),
+                                  np.concatenate([labels, targets[picked]]))
+
+    if not links_u:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+    return np.concatenate(links_u), np.concatenate(links_v), np.concatenate(links_dist)
@@ -0,0 +1,168 @@
+import json
+import os
+import numpy as np
+from typing import Dict, Tuple
+
+from public.lib.centrality import sampled_betweenness_centrality
+from public.lib.sparse import SparseAdjacency
+from public.lib.stored import META_FILE, StoredCity, StoredEdgeMap, StoredProxyData, open_array, read_meta
+from hidden.rng import component_rngs
+from hidden.generation.city_gen import CityGenerator, index_components
+from hidden.generation.obstacles_gen import TrueStateGenerator
+from hidden.generation.proxy_gen import ProxyGenerator
+from hidden.generation.spatial import k_nearest_neighbors
+from hidden.generation.topologies import TOPOLOGIES, unique_edges
+
+def _write_array(directory: str, name: str, array: np.ndarray, chunk_size: int):
+    """Write an array to `name`.npy through a memory map, chunk by chunk along its longest axis"""
+    out = np.lib.format.open_memmap(os.path.join(directory, f'{name}.npy'), mode='w+',
+                                    dtype=array.dtype, shape=array.shape)
+    axis = int(np.argmax(array.shape))
+    for start in range(0, array.shape[axis], chunk_size):
+        chunk = (slice(None),) * axis + (slice(start, start + chunk_size),)
+        out[chunk] = array[chunk]
+    out.flush()
+
+class StreamingScenarioGenerator:
+    """
+    Generates whole scenarios (layout, true state and proxies) for
+    metropolitan cities straight into a directory of memory-mappable .npy
+    arrays, without building a networkx graph or per-node dicts.
+
+    Everything runs on numpy arrays over dense node indices, so a 1M-node
+    city needs a few hundred MB instead of many GB. Patterns follow
+    CityGenerator, TrueStateGenerator and ProxyGenerator, but draws come from
+    vectorized numpy streams, so a streamed scenario never equals the
+    in-memory one generated from the same seed. Betweenness is always
+    estimated from `betweenness_samples` sources (exact is out of reach at
+    this scale).
+
+    Read scenarios back with load_scenario.
+    """
+
+    def __init__(self, seed: int = None, topology: str = 'delaunay', connected: bool = True,
+                 noise_level: float = 0.1, betweenness_samples: int = 16,
+                 chunk_size: int = 1 << 20):
+        """
+        Args:
+            seed: Random seed for reproducibility
+            topology: 'random' (3 nearest neighbours) or one of TOPOLOGIES
+            connected: Join disconnected parts of the city with short roads
+            noise_level: Uncertainty of the proxy observations (0-1)
+            betweenness_samples: Source nodes of the betweenness estimate
+            chunk_size: Nodes or edges written (and noise drawn) per chunk
+        """
+        if topology != 'random' and topology not in TOPOLOGIES:
+            raise ValueError(f"Unknown topology '{topology}', expected 'random' or one of "
+                             f"{sorted(TOPOLOGIES)}")
+        self.topology = topology
+        self.connected = connected
+        self.noise_level = noise_level
+        self.betweenness_samples = betweenness_samples
+        self.chunk_size = chunk_size
+        self.true_state_gen = TrueStateGenerator()
+        self.proxy_gen = ProxyGenerator(noise_level=noise_level)
+        self.reseed(seed)
+
+    def reseed(self, seed: int = None):
+        """Restart this generator's private random streams from `seed`"""
+        self.rng, self.np_rng = component_rngs(seed, 'streaming')
+        self.true_state_gen.reseed(seed)
+        self.proxy_gen.reseed(seed)
+
+    def _layout(self, n_nodes: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Positions and edges of the configured topology"""
+        if self.topology != 'random':
+            return TOPOLOGIES[self.topology](n_nodes, self.np_rng)
+        positions = self.np_rng.uniform(0, 100, size=(n_nodes, 2))
+        nearest, _ = k_nearest_neighbors(positions, k=3)
+        return (positions,) + unique_edges(np.repeat(np.arange(n_nodes), nearest.shape[1]),
+                                           nearest.ravel(), n_nodes)
+
+    def generate(self, directory: str, n_nodes: int) -> Dict:
+        """
+        Generate one scenario into `directory` (created if needed)
+
+        Returns:
+            Scenario metadata, as saved in meta.json
+        """
+        if n_nodes < 3:
+            raise ValueError("Cities need at least 3 nodes (start + 2 extraction points)")
+        os.makedirs(directory, exist_ok=True)
+        write = lambda name, array: _write_array(directory, name, array, self.chunk_size)
+
+        # 1. Layout
+        positions, edge_u, edge_v = self._layout(n_nodes)
+        components, link_u, link_v, _ = index_components(positions, edge_u, edge_v, self.connected)
+        edge_u, edge_v = np.concatenate([edge_u, link_u]), np.concatenate([edge_v, link_v])
+        weights = np.hypot(*(positions[edge_u] - positions[edge_v]).T)
+        adjacency = SparseAdjacency.from_edges(n_nodes, edge_u, edge_v)
+        write('positions', positions)
+        write('edge_u', edge_u)
+        write('edge_v', edge_v)
+        write('weights', weights)
+        write('indptr', adjacency.indptr)
+        write('indices', adjacency.indices)
+        write('entry_edge', adjacency.entry_edge)
+        write('components', components.labels)
+        del positions
+
+        # Start, 2 extraction points and resources
+        start, *extraction = self.np_rng.choice(n_nodes, 3, replace=False).tolist()
+        max_resources = int(CityGenerator._max_resources_from_draws(
+            np.array([n_nodes]), *self.np_rng.random((2, 1)))[0])
+
+        # 2. True state
+        sources = self.np_rng.choice(n_nodes, min(n_nodes, self.betweenness_samples), replace=False)
+        centrality = sampled_betweenness_centrality(adjacency, sources)
+        radiation, zombies, blocked = self.true_state_gen.generate_arrays(
+            adjacency, weights, start, extraction, centrality)
+        write('radiation', radiation)
+        write('zombies', zombies)
+        write('blocked', blocked)
+
+        # 3. Proxies, with noise drawn one chunk at a time
+        node_names, node_values, edge_names, edge_values = self.proxy_gen.indicator_arrays(
+            adjacency, centrality, adjacency.clustering(), radiation, zombies, blocked.astype(float))
+        level = self.noise_level
+        for values in (node_values, edge_values):
+            for begin in range(0, values.shape[1], self.chunk_size):
+                chunk = values[:, begin:begin + self.chunk_size]
+                noise = self.proxy_gen.np_rng.uniform(-level, level, size=chunk.shape)
+                np.clip(chunk + noise, 0.0, 1.0, out=chunk)
+        write('node_indicators', node_values)
+        write('edge_indicators', edge_values)
+
+        meta = {
+            'n_nodes': n_nodes,
+            'n_edges': int(adjacency.n_edges),
+            'topology': self.topology,
+            'starting_node': start,
+            'extraction_nodes': extraction,
+            'max_resources': max_resources,
+            'node_indicators': node_names,
+            'edge_indicators': edge_names
+        }
+        with open(os.path.join(directory, META_FILE), 'w') as f:
+            json.dump(meta, f, indent=4)
+        return meta
+
+def load_scenario(directory: str) -> Tuple[StoredCity, Dict, StoredProxyData, int]:
+    """
+    Open a scenario written by StreamingScenarioGenerator, memory-mapped.
+
+    Returns:
+        Tuple of (StoredCity, true_state, StoredProxyData, max_resources).
+        true_state has TrueStateGenerator.generate's keys: radiation and
+        zombies are arrays indexed by node, blockages a mapping holding
+        only the blocked edges and blocked the array it reads, by edge id
+    """
+    city = StoredCity(directory)
+    blocked = open_array(directory, 'blocked')
+    true_state = {
+        'radiation': open_array(directory, 'radiation'),
+        'zombies': open_array(directory, 'zombies'),
+        'blockages': StoredEdgeMap(city, blocked, only_set=True),
+        'blocked': blocked
+    }
+    return city, true_state, StoredProxyData(city), read_meta(directory)['max_resources']
@@ -0,0 +1,123 @@
+import numpy as np
+from typing import Callable, Dict, Tuple
+
+from public.lib.components import component_labels
+from hidden.generation.spatial import k_nearest_neighbors, link_components
+
+# A topology maps (n_nodes, rng) to (positions (n, 2) in [0, 100]^2, edge_u, edge_v)
+Topology = Callable[[int, np.random.Generator], Tuple[np.ndarray, np.ndarray, np.ndarray]]
+
+def unique_edges(edge_u: np.ndarray, edge_v: np.ndarray, n_nodes: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Drop self loops and repeated undirected edges, keeping first occurrences in order"""
+    edge_u, edge_v = np.asarray(edge_u, dtype=np.int64), np.asarray(edge_v, dtype=np.int64)
+    keys = np.minimum(edge_u, edge_v) * n_nodes + np.maximum(edge_u, edge_v)
+    _, first = np.unique(keys, return_index=True)
+    first = np.sort(first[edge_u[first] != edge_v[first]])
+    return edge_u[first], edge_v[first]
+
+def grid_city(n_nodes: int, rng: np.random.Generator, jitter: float = 0.2) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Manhattan layout: nodes fill a square grid row by row and every node is
+    joined to its right and lower neighbours. Intersections are jittered by
+    up to `jitter` block sizes so blocks are not all identical.
+    """
+    side = max(1, int(np.ceil(np.sqrt(n_nodes))))
+    spacing = 100 / side
+    index = np.arange(n_nodes)
+    row, col = np.divmod(index, side)
+    positions = (np.stack([col, row], axis=1) + 0.5 +
+                 rng.uniform(-jitter, jitter, size=(n_nodes, 2))) * spacing
+
+    right = index[(col < side - 1) & (index + 1 < n_nodes)]
+    down = index[index + side < n_nodes]
+    return positions, np.concatenate([right, down]), np.concatenate([right + 1, down + side])
+
+def gabriel_edges(positions: np.ndarray, candidates: int = 8,
+                  chunk_size: int = 8192) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Gabriel graph edges among each node's `candidates` nearest neighbours:
+    i-j is kept when no other point lies inside the circle with diameter
+    i-j. Any point inside that circle is closer to i than j is, so it is
+    always among the candidates ranked before j and every kept edge is a
+    true Gabriel edge.
+
+    Gabriel edges to farther neighbours are not found, so this is a planar
+    subgraph of the Gabriel graph that can be disconnected where dense
+    clusters lie far apart (see join_parts).
+    """
+    n_nodes = len(positions)
+    nearest, distances = k_nearest_neighbors(positions, k=candidates)
+    k = nearest.shape[1]
+    ranked_before = np.arange(k)[None, :] < np.arange(k)[:, None]  # [edge rank, witness rank]
+
+    keep = np.empty(nearest.shape, dtype=bool)
+    x, y = positions[:, 0], positions[:, 1]
+    for start in range(0, n_nodes, chunk_size):
+        rows = slice(start, start + chunk_size)
+        near_x, near_y = x[nearest[rows]], y[nearest[rows]]  # (c, k)
+        centre_x, centre_y = (x[rows, None] + near_x) / 2, (y[rows, None] + near_y) / 2
+        # Squared distance from every edge's circle centre to every closer candidate
+        dx = near_x[:, None, :] - centre_x[:, :, None]
+        dy = near_y[:, None, :] - centre_y[:, :, None]
+        inside = (dx * dx + dy * dy < ((distances[rows] / 2) ** 2)[:, :, None]) & ranked_before
+        keep[rows] = ~inside.any(axis=2)
+
+    sources = np.repeat(np.arange(n_nodes), k).reshape(n_nodes, k)
+    return unique_edges(sources[keep], nearest[keep], n_nodes)
+
+def join_parts(positions: np.ndarray, edge_u: np.ndarray, edge_v: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Edges plus the short links (link_components) that join all their parts into one"""
+    labels = component_labels(len(positions), edge_u, edge_v)
+    link_u, link_v, _ = link_components(positions, labels)
+    return np.concatenate([edge_u, link_u]), np.concatenate([edge_v, link_v])
+
+def delaunay_city(n_nodes: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Connected mesh over uniform random points: Gabriel graph edges among
+    near neighbours, plus short links wherever those leave parts apart
+    """
+    positions = rng.uniform(0, 100, size=(n_nodes, 2))
+    return (positions,) + join_parts(positions, *gabriel_edges(positions))
+
+def district_city(n_nodes: int, rng: np.random.Generator, nodes_per_district: int = 2000,
+                  spread: float = 0.35) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Clustered city: dense districts of local streets joined by arterial roads.
+
+    Nodes gather around random district centres and are joined by a
+    street mesh (Gabriel graph edges among near neighbours). The node
+    closest to each centre is the district hub; arterials join every hub to
+    its 3 nearest hubs. Short links join any parts still apart, so the
+    city is always connected.
+    """
+    n_districts = max(2, int(round(n_nodes / nodes_per_district)))
+    centres = rng.uniform(10, 90, size=(n_districts, 2))
+    radius = spread * 100 / np.sqrt(n_districts)  # Districts roughly tile the map
+    district = rng.integers(n_districts, size=n_nodes)
+    positions = np.clip(centres[district] + rng.normal(0, radius, size=(n_nodes, 2)), 0, 100)
+
+    # Local streets
+    local_u, local_v = gabriel_edges(positions)
+
+    # Hubs: first node of every district once sorted by distance to its centre
+    to_centre = np.hypot(*(positions - centres[district]).T)
+    order = np.lexsort((to_centre, district))
+    is_first = np.ones(n_nodes, dtype=bool)
+    is_first[1:] = district[order][1:] != district[order][:-1]
+    hubs = order[is_first]
+
+    # Arterials
+    hub_nearest, _ = k_nearest_neighbors(positions[hubs], k=3)
+    arterial_u = np.repeat(hubs, hub_nearest.shape[1])
+    arterial_v = hubs[hub_nearest.ravel()]
+
+    edge_u, edge_v = unique_edges(np.concatenate([local_u, arterial_u]),
+                                  np.concatenate([local_v, arterial_v]), n_nodes)
+    return (positions,) + join_parts(positions, edge_u, edge_v)
+
+# Array topologies selectable by name (CityGenerator's own 'random' layout aside)
+TOPOLOGIES: Dict[str, Topology] = {
+    'grid': grid_city,
+    'delaunay': delaunay_city,
+    'districts': district_city
+}
@@ -0,0 +1,32 @@
+import random
+import zlib
+import numpy as np
+from typing import Tuple
+
+def component_rngs(seed: int, component: str) -> Tuple[random.Random, np.random.Generator]:
+    """
+    Private random streams for one simulation component.
+
+    Streams are derived from (seed, component) through numpy's SeedSequence, so
+    components never share state with each other, with the policy or with the
+    global `random` / `np.random` modules. The same seed gives the same draws
+    in any process and on any machine; seed=None draws fresh OS entropy.
+
+    Returns:
+        Tuple of (random.Random, numpy.random.Generator)
+    """
+    sequence = np.random.SeedSequence(seed, spawn_key=(zlib.crc32(component.encode()),))
+    py_sequence, np_sequence = sequence.spawn(2)
+    py_seed = int.from_bytes(py_sequence.generate_state(4, np.uint32).tobytes(), 'little')
+    return random.Random(py_seed), np.random.default_rng(np_sequence)
+
+def keyed_rng(seed: int, component: str, *key: int) -> random.Random:
+    """
+    Random stream of one call of a component, derived from (seed, component,
+    key) only, e.g. key = (run, plan). Unlike the shared streams of
+    component_rngs, its draws do not depend on how many calls came before,
+    so calls made from threads or tasks in any order give the same results.
+    Keys are non-negative ints; seed=None draws fresh OS entropy.
+    """
+    sequence = np.random.SeedSequence(seed, spawn_key=(zlib.crc32(component.encode()), *key))
+    return random.Random(int.from_bytes(sequence.generate_state(4, np.uint32).tobytes(), 'little'))
@@ -0,0 +1,198 @@
+import os
+from collections import deque
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Sequence
+import numpy as np
+import networkx as nx
+
+from public.lib.sparse import SparseAdjacency
+
+# Adjacency lists of the graph being processed, set once per worker process
+_adjacency: List[List[int]] = None
+
+# Most per-source dependency values one chunk returns in ordered mode (32 MB)
+ORDERED_CHUNK_VALUES = 1 << 22
+
+# Largest graph reduced in ordered mode by default: ordered pools ship and
+# add n * n values (32 MB here), chunked ones n_chunks * n
+ORDERED_MAX_NODES = 2048
+
+def _set_adjacency(indptr: np.ndarray, indices: np.ndarray):
+    """Pool initializer: rebuild adjacency lists from CSR arrays"""
+    global _adjacency
+    _adjacency = [indices[indptr[i]:indptr[i + 1]].tolist() for i in range(len(indptr) - 1)]
+
+def _dependency_sums(sources: Sequence[int], per_source: bool = False) -> np.ndarray:
+    """
+    Brandes dependency sums of a chunk of source nodes (unweighted, no
+    endpoints). Visiting and accumulation order follow networkx, so every
+    per-source contribution is computed exactly as nx.betweenness_centrality does.
+    With `per_source`, returns one row of dependencies per source instead
+    of their sum, for the caller to add in source order.
+    """
+    adjacency = _adjacency
+    n = len(adjacency)
+    total = [0.0] * n
+    rows = np.zeros((len(sources), n)) if per_source else None
+    sigma = [0.0] * n
+    dist = [-1] * n
+    delta = [0.0] * n
+    preds: List[List[int]] = [[] for _ in range(n)]
+    for row, s in enumerate(sources):
+        # BFS counting shortest paths
+        order = []
+        sigma[s] = 1.0
+        dist[s] = 0
+        queue = deque([s])
+        while queue:
+            v = queue.popleft()
+            order.append(v)
+            next_dist = dist[v] + 1
+            sigma_v = sigma[v]
+            for w in adjacency[v]:
+                if dist[w] < 0:
+                    queue.append(w)
+                    dist[w] = next_dist
+                if dist[w] == next_dist:
+                    sigma[w] += sigma_v
+                    preds[w].append(v)
+
+        # Back-propagate dependencies, farthest nodes first
+        for w in reversed(order):
+            coeff = (1 + delta[w]) / sigma[w]
+            for v in preds[w]:
+                delta[v] += sigma[v] * coeff
+            if w != s:
+                if per_source:
+                    rows[row, w] = delta[w]
+                else:
+                    total[w] += delta[w]
+
+        # Reset only what this source touched
+        for v in order:
+            sigma[v] = 0.0
+            dist[v] = -1
+            delta[v] = 0.0
+            preds[v] = []
+    return rows if per_source else np.array(total)
+
+def parallel_betweenness_centrality(graph: nx.Graph, processes: int = None,
+                                    n_chunks: int = 256, ordered: bool = None) -> Dict[int, float]:
+    """
+    Exact betweenness centrality, equivalent to nx.betweenness_centrality(graph),
+    with the source nodes split across a process pool.
+
+    Sources are cut into `n_chunks` fixed chunks. In chunked mode every
+    worker sums the dependencies of its chunk and the partial sums are
+    added in chunk order: each chunk returns n values, and the result is
+    bit-identical for any number of processes, but differs from networkx
+    by the reassociation of the per-node sums (~1e-15 relative). In
+    `ordered` mode every chunk returns its per-source dependencies and they
+    are added source by source, as networkx adds them: the result is
+    bit-identical to networkx, but n * n values cross the pool and are
+    added in this process, which only pays off on small graphs.
+
+    Args:
+        graph: Undirected graph
+        processes: Worker processes (None or 1 = run in this process, 0 = all cores)
+        n_chunks: Number of source chunks; more chunks balance load better
+        ordered: Reduce per-source dependencies in source order (exact);
+                 None = only up to ORDERED_MAX_NODES nodes
+
+    Returns:
+        Dict mapping node -> normalized betweenness centrality
+    """
+    nodes = list(graph)
+    index = {node: i for i, node in enumerate(nodes)}
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(graph.adj[node]) for node in nodes])
+    indices = np.fromiter((index[w] for node in nodes for w in graph.adj[node]),
+                          dtype=np.int64, count=indptr[-1])
+    return dict(zip(nodes, csr_betweenness_centrality(indptr, indices, processes, n_chunks, ordered).tolist()))
+
+def csr_betweenness_centrality(indptr: np.ndarray, indices: np.ndarray, processes: int = None,
+                               n_chunks: int = 256, ordered: bool = None) -> np.ndarray:
+    """
+    Exact betweenness centrality of a graph held as CSR arrays (see
+    parallel_betweenness_centrality for the arguments). Serially, or in
+    `ordered` mode on any pool, the per-node sums are accumulated source by
+    source in node order, exactly as networkx does, so the result is
+    bit-identical to nx.betweenness_centrality. A serial run with
+    ordered=False gives the chunked result of the pools.
+
+    Returns:
+        Array of normalized betweenness per node index
+    """
+    global _adjacency
+    n = len(indptr) - 1
+    processes = (os.cpu_count() or 1) if processes == 0 else (processes or 1)
+    if ordered is None:
+        ordered = processes == 1 or n <= ORDERED_MAX_NODES
+    if ordered:
+        n_chunks = max(n_chunks, -(-n * n // ORDERED_CHUNK_VALUES))  # Bound the rows a chunk returns
+    bounds = np.linspace(0, n, min(n, n_chunks) + 1).astype(np.int64)
+    chunks = [range(start, stop) for start, stop in zip(bounds[:-1], bounds[1:])]
+    total = np.zeros(n)
+    if processes == 1 or len(chunks) <= 1:
+        previous = _adjacency
+        _set_adjacency(indptr, indices)
+        try:
+            # Ordered: one running sum over all the sources, as networkx keeps it
+            for chunk in ([range(n)] if ordered else chunks):
+                total += _dependency_sums(chunk)
+        finally:
+            _adjacency = previous
+    else:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_set_adjacency,
+                                 initargs=(indptr, indices)) as pool:
+            for result in pool.map(partial(_dependency_sums, per_source=ordered), chunks):
+                for row in (result if ordered else (result,)):  # Sources in order
+                    total += row
+
+    # Normalize by the number of (s, t) pairs that can pass through a node
+    if n > 2:
+        total *= 1 / ((n - 1) * (n - 2))
+    return total
+
+def sampled_betweenness_centrality(adjacency: SparseAdjacency, sources: Sequence[int]) -> np.ndarray:
+    """
+    Betweenness centrality estimated from the given source nodes with
+    level-synchronous array BFS, for layouts held only as CSR arrays.
+    Scaled like nx.betweenness_centrality(k=len(sources)).
+
+    Returns:
+        Array of betweenness per dense node index
+    """
+    n = adjacency.n_nodes
+    total = np.zeros(n)
+    for source in sources:
+        distance = np.full(n, -1, dtype=np.int64)
+        sigma = np.zeros(n)
+        distance[source] = 0
+        sigma[source] = 1.0
+        # Shortest-path DAG, one (predecessor, successor) array pair per level
+        levels = []
+        frontier = np.array([source])
+        while len(frontier):
+            entries = adjacency.entries(frontier)
+            v, w = adjacency.rows[entries], adjacency.indices[entries]
+            new = w[distance[w] < 0]
+            distance[new] = len(levels) + 1
+            on_path = distance[w] == len(levels) + 1
+            v, w = v[on_path], w[on_path]
+            np.add.at(sigma, w, sigma[v])
+            levels.append((v, w))
+            frontier = np.unique(new)
+
+        # Back-propagate dependencies, farthest level first
+        delta = np.zeros(n)
+        for v, w in reversed(levels):
+            np.add.at(delta, v, sigma[v] / sigma[w] * (1 + delta[w]))
+        delta[source] = 0.0
+        total += delta
+
+    # Same normalization as networkx for k sampled sources
+    if n > 2 and len(sources):
+        total *= n / len(sources) / ((n - 1) * (n - 2))
+    return total
@@ -0,0 +1,70 @@
+from typing import Dict, List
+import numpy as np
+
+def component_labels(n_nodes: int, edge_u: np.ndarray, edge_v: np.ndarray) -> np.ndarray:
+    """
+    Vectorized union-find over dense node indices.
+
+    Every round hooks the larger root of each edge under the smaller one,
+    then compresses paths until every node points at its root. Returns the
+    root of every node, which is the smallest index in its component.
+    """
+    parent = np.arange(n_nodes)
+    edge_u = np.asarray(edge_u, dtype=np.int64)
+    edge_v = np.asarray(edge_v, dtype=np.int64)
+    while True:
+        root_u, root_v = parent[edge_u], parent[edge_v]
+        split = root_u != root_v
+        if not split.any():
+            return parent
+        # Union: hook roots (lower index wins, so no cycles can form)
+        np.minimum.at(parent, np.maximum(root_u, root_v)[split], np.minimum(root_u, root_v)[split])
+        # Find: path compression by pointer jumping
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+        # Edges already inside one component never need another look
+        edge_u, edge_v = edge_u[split], edge_v[split]
+
+class ComponentIndex:
+    """
+    Connected components of a city layout with O(1) reachability queries.
+
+    Nodes are either the dense indices 0..n-1 (`nodes` None, as in generated
+    cities) or the given node ids in index order.
+    """
+
+    def __init__(self, labels: np.ndarray, nodes: List[int] = None):
+        self.labels = labels  # Root index of every node (see component_labels)
+        self.n_nodes = len(labels)
+        self.nodes = nodes
+        self._index: Dict[int, int] = None if nodes is None else {node: i for i, node in enumerate(nodes)}
+        self.sizes = np.bincount(labels, minlength=self.n_nodes)  # Component size by root index
+        self.n_components = int(np.count_nonzero(self.sizes))
+
+    @classmethod
+    def from_edges(cls, n_nodes: int, edge_u: np.ndarray, edge_v: np.ndarray,
+                   nodes: List[int] = None) -> "ComponentIndex":
+        """Index of the graph with these edges between dense node indices"""
+        return cls(component_labels(n_nodes, edge_u, edge_v), nodes)
+
+    def _position(self, node: int) -> int:
+        return node if self._index is None else self._index[node]
+
+    def component(self, node: int) -> int:
+        """Id of the node's component (the index of its root node)"""
+        return int(self.labels[self._position(node)])
+
+    def component_size(self, node: int) -> int:
+        """Number of nodes reachable from `node`, itself included"""
+        return int(self.sizes[self.labels[self._position(node)]])
+
+    def connected(self, node1: int, node2: int) -> bool:
+        """Whether a path joins the two nodes"""
+        return bool(self.labels[self._position(node1)] == self.labels[self._position(node2)])
+
+    @property
+    def is_connected(self) -> bool:
+        return self.n_components <= 1
@@ -1,7 +1,6 @@
 import os
 import json
 import datetime
-import uuid
 from typing import Dict, Any
 
 class DataManager:
@@ -53,7 +52,11 @@ class DataManager:
         
     def save_city_scenario(self, city_id: str, city_data: Dict, proxy_data: Dict, 
                           policy_result: Dict, sim_result: Dict, max_resources: int) -> str:
-        """Save all data for a single city scenario"""
+        """
+        Save all data for a single city scenario. `city_id` is the scenario's
+        content hash (see public.lib.hashing); a scenario met again in the
+        same experiment gets a numbered directory next to the first one.
+        """
         if not self.current_experiment:
             raise ValueError("No active experiment")
             
@@ -63,14 +66,21 @@ class DataManager:
             self.current_experiment, "cities",
             f"city_{city_id}"
         )
-        os.makedirs(city_dir, exist_ok=True)
+        repeat = 1
+        while os.path.exists(city_dir + (f"_{repeat}" if repeat > 1 else "")):
+            repeat += 1
+        if repeat > 1:
+            city_dir += f"_{repeat}"
+        os.makedirs(city_dir)
         
         # Save city definition (only layout and configuration)
         city_def = {
             "metadata": {
                 "timestamp": datetime.datetime.now().isoformat(),
                 "n_nodes": city_data['metadata']['n_nodes'],
-                "max_resources": max_resources
+                "max_resources": max_resources,
+                "scenario_hash": city_id,
+                "city_hash": city_data['metadata'].get('city_hash')
             },
             "graph": city_data['graph'],
             "configuration": {
@@ -84,7 +94,9 @@ class DataManager:
         # Save proxy data (what the team can observe)
         proxy_info = {
             "metadata": {
-                "timestamp": datetime.datetime.now().isoformat()
+                "timestamp": datetime.datetime.now().isoformat(),
+                "scenario_hash": city_id,
+                "proxy_hash": proxy_data.get('proxy_hash')
             },
             "indicators": proxy_data['indicators']
         }
@@ -95,7 +107,8 @@ class DataManager:
         mission_results = {
             "metadata": {
                 "timestamp": datetime.datetime.now().isoformat(),
-                "solution_class": self.policy_name
+                "solution_class": self.policy_name,
+                "scenario_hash": city_id
             },
             "plan": {
                 "path": policy_result['path'],
@@ -108,7 +121,7 @@ class DataManager:
                 "resources": {
                     "initial": policy_result['resources'],
                     "remaining": {
-                        rt: policy_result['resources'][rt] - sim_result['resources']['used'][rt]
+                        rt: policy_result['resources'][rt] - sim_result['resources']['used'].get(rt, 0)
                         for rt in policy_result['resources']
                     }
                 }
@@ -126,6 +139,8 @@ class DataManager:
                 }
             }
         }
+        if 'trace' in sim_result:  # Walk recorded by the evaluator
+            mission_results['events']['trace'] = sim_result['trace']
         with open(os.path.join(city_dir, "mission_results.json"), "w") as f:
             json.dump(mission_results, f, indent=4)
             
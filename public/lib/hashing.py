@@ -0,0 +1,51 @@
+import hashlib
+import numpy as np
+
+# Scenario hashes are BLAKE2b digests of this many bytes (twice as many hex digits):
+# 128 bits keep collisions out of reach across any number of stored scenarios
+DIGEST_SIZE = 16
+
+def digest(*parts) -> bytes:
+    """
+    Hash of a sequence of parts. numpy arrays contribute their dtype, shape
+    and raw buffer (read in place when contiguous), bytes are taken as they
+    are (e.g. nested digests) and anything else by its repr. Every part is
+    length-prefixed, so different splits of the same bytes never collide.
+    """
+    h = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    for part in parts:
+        if isinstance(part, np.ndarray) and part.dtype.kind not in 'OUS':
+            h.update(f'{part.dtype.str}{part.shape}'.encode())
+            data = memoryview(np.ascontiguousarray(part)).cast('B')
+        elif isinstance(part, bytes):
+            data = part
+        else:
+            data = repr(part.tolist() if isinstance(part, np.ndarray) else part).encode()
+        h.update(len(data).to_bytes(8, 'little'))
+        h.update(data)
+    return h.digest()
+
+def layout_digest(ids: np.ndarray, positions: np.ndarray, edge_u: np.ndarray, edge_v: np.ndarray,
+                  weights: np.ndarray) -> bytes:
+    """
+    Hash of a city layout: node ids with their positions and edges with
+    their weights, both sorted by node id so insertion order does not
+    matter. Edges are given as node indices into `ids`.
+    """
+    ids = np.asarray(ids)
+    u, v = ids[edge_u], ids[edge_v]
+    low, high = np.minimum(u, v), np.maximum(u, v)
+    nodes, edges = np.argsort(ids, kind='stable'), np.lexsort((high, low))
+    return digest(ids[nodes], np.asarray(positions).reshape(-1, 2)[nodes], low[edges], high[edges],
+                  np.asarray(weights)[edges])
+
+def scenario_hash(city, max_resources: int, proxy_data, radiation: np.ndarray, zombies: np.ndarray,
+                  blocked: np.ndarray) -> str:
+    """
+    Content hash of a whole scenario: layout, start and extraction nodes,
+    resource budget, true state (as true_state_arrays returns it) and the
+    proxies given to the policy. Equal scenarios get equal hashes across
+    runs, policies and experiments.
+    """
+    return digest(bytes.fromhex(city.content_hash()), int(max_resources), radiation, zombies,
+                  np.asarray(blocked, dtype=bool), bytes.fromhex(proxy_data.content_hash())).hex()
@@ -1,7 +1,18 @@
-from typing import Dict, List, Tuple
+from array import array
+from collections.abc import Mapping, MutableMapping
+from enum import IntEnum
+from typing import Dict, Hashable, Iterator, List, Sequence, Set, Tuple
+import numpy as np
 import networkx as nx
+import pandas as pd
 import copy
 
+from public.lib.centrality import ORDERED_MAX_NODES, csr_betweenness_centrality, sampled_betweenness_centrality
+from public.lib.sparse import SparseAdjacency, dijkstra, path_to
+from public.lib.components import ComponentIndex
+from public.lib.hashing import digest, layout_digest
+from public.lib.layout import CityLayout
+
 class ResourceTypes:
     """Constants for resource types"""
     EXPLOSIVES = 'explosives'
@@ -12,78 +23,749 @@ class ResourceTypes:
     def all_types(cls) -> List[str]:
         return [cls.EXPLOSIVES, cls.AMMO, cls.RADIATION_SUITS]
 
+class ResourceType(IntEnum):
+    """Compact codes of the resource types, in ResourceTypes.all_types() order"""
+    EXPLOSIVES = 0
+    AMMO = 1
+    RADIATION_SUITS = 2
+
+    @property
+    def label(self) -> str:
+        """Name used in resource dicts, e.g. 'radiation_suits'"""
+        return self.name.lower()
+
+    @classmethod
+    def parse(cls, key) -> "ResourceType":
+        """Code of a resource type given by label or code; KeyError if unknown"""
+        return _RESOURCE_CODES[key]
+
+_RESOURCE_CODES = {key: rt for rt in ResourceType for key in (rt.label, int(rt))}
+
+class FailureReason(IntEnum):
+    """Compact codes of the mission outcomes, rendered to messages on demand"""
+    NONE = 0
+    SUCCESS = 1
+    EXCESS_RESOURCES = 2
+    MISSING_EDGE = 3
+    NO_RADIATION_SUITS = 4
+    NO_AMMO = 5
+    NO_EXPLOSIVES = 6
+    NO_EXTRACTION = 7
+    OTHER = 8  # Free text message
+
+    def message(self, *args) -> str:
+        """Message of this outcome; args are its node ids (the text for OTHER)"""
+        return _FAILURE_MESSAGES[self].format(*args) if self is not FailureReason.NONE else None
+
+_FAILURE_MESSAGES = {
+    FailureReason.SUCCESS: "Successfully reached extraction point",
+    FailureReason.EXCESS_RESOURCES: "Your team was killed due to excesive greed by the population in at the start",
+    FailureReason.MISSING_EDGE: "Unexistent path from node {0} to {1}",
+    FailureReason.NO_RADIATION_SUITS: "Ran out of radiation suits at node {0}",
+    FailureReason.NO_AMMO: "Ran out of ammo at node {0}",
+    FailureReason.NO_EXPLOSIVES: "Ran out of explosives at edge ({0}, {1})",
+    FailureReason.NO_EXTRACTION: "Path does not reach extraction point",
+    FailureReason.OTHER: "{0}"
+}
+
+def _read_only_arrays(value):
+    """`value` with the numpy arrays it is or holds as attributes marked read-only"""
+    for array in (value, *getattr(value, '__dict__', {}).values()):
+        if isinstance(array, np.ndarray):
+            array.setflags(write=False)
+    return value
+
+class CityMetrics:
+    """
+    Structural metrics of a city layout, computed lazily and at most once.
+    Shared by every stage that analyses the same layout. Cities with an
+    array layout get their metrics from the arrays; the networkx view is
+    only built for sampled betweenness. Cached arrays (weights, adjacency,
+    component labels) are read-only, as they are shared.
+    """
+
+    def __init__(self, city: "CityGraph"):
+        self.city = city
+        self._cache: Dict[str, Dict] = {}
+
+    @property
+    def graph(self) -> nx.Graph:
+        return self.city.graph
+
+    def _get(self, name: str, compute) -> Dict:
+        if name not in self._cache:
+            self._cache[name] = _read_only_arrays(compute())
+        return self._cache[name]
+
+    def _exact_betweenness(self) -> Dict[int, float]:
+        layout = self.city.layout
+        if layout is None:
+            return nx.betweenness_centrality(self.graph)
+        # Serial and in one chunk it accumulates exactly like networkx
+        return dict(zip(range(layout.n_nodes),
+                        csr_betweenness_centrality(layout.indptr, layout.indices, 1, n_chunks=1).tolist()))
+
+    @property
+    def betweenness(self) -> Dict[int, float]:
+        """Betweenness centrality of every node"""
+        return self._get('betweenness', self._exact_betweenness)
+
+    def betweenness_centrality(self, samples: int = None, seed: int = None,
+                               processes: int = None) -> Dict[int, float]:
+        """
+        Betweenness centrality of every node. With `samples`, it is estimated
+        from that many randomly chosen source nodes (exact if samples >= n),
+        on the CSR adjacency so array cities never build their graph. The
+        sources are drawn from `seed`, by default one derived from the
+        layout digest: every city gets its own sources, and all the
+        generators of a scenario share one cache entry.
+        With `processes` (None = serial, 0 = all cores), the exact value is
+        computed on a process pool: bit-identical to the serial one up to
+        ORDERED_MAX_NODES nodes, and on larger cities reduced by chunk
+        (same for any number of processes, ~1e-15 from the serial one, and
+        cached apart from it; see parallel_betweenness_centrality).
+        """
+        if samples is not None and samples < self.city.n_nodes:
+            if seed is None:
+                seed = int.from_bytes(self.digest, 'little')
+            def compute():
+                adjacency = self.adjacency
+                sources = np.random.default_rng(seed).choice(adjacency.n_nodes, samples, replace=False)
+                return dict(zip(adjacency.nodes, sampled_betweenness_centrality(adjacency, sources).tolist()))
+            return self._get(f'betweenness_k{samples}_seed{seed}', compute)
+        if processes is not None:
+            # Ordered values are the serial ones, so they share its cache entry
+            adjacency = self.adjacency
+            ordered = adjacency.n_nodes <= ORDERED_MAX_NODES
+            return self._get('betweenness' if ordered else 'betweenness_chunked', lambda: dict(zip(
+                adjacency.nodes, csr_betweenness_centrality(adjacency.indptr, adjacency.indices, processes,
+                                                            ordered=ordered).tolist())))
+        return self.betweenness
+
+    @property
+    def clustering(self) -> Dict[int, float]:
+        """Clustering coefficient of every node"""
+        return self._get('clustering', lambda: dict(zip(self.adjacency.nodes,
+                                                        self.adjacency.clustering().tolist())))
+
+    @property
+    def degree(self) -> Dict[int, int]:
+        """Number of neighbours of every node"""
+        return self._get('degree', lambda: dict(zip(self.adjacency.nodes, self.adjacency.degree.tolist())))
+
+    def _neighbor_lists(self) -> Dict[int, List[int]]:
+        adjacency = self.adjacency
+        nodes = adjacency.nodes
+        return {node: [nodes[w] for w in adjacency.indices[start:stop].tolist()]
+                for node, start, stop in zip(nodes, adjacency.indptr[:-1].tolist(), adjacency.indptr[1:].tolist())}
+
+    @property
+    def neighbors(self) -> Dict[int, List[int]]:
+        """Neighbours of every node, in adjacency order"""
+        return self._get('neighbors', self._neighbor_lists)
+
+    @property
+    def neighbor_sets(self) -> Dict[int, Set[int]]:
+        """Neighbours of every node as sets, for intersections"""
+        return self._get('neighbor_sets', lambda: {n: set(nbrs) for n, nbrs in self.neighbors.items()})
+
+    @property
+    def adjacency(self) -> SparseAdjacency:
+        """CSR adjacency arrays for vectorized neighbourhood computations"""
+        layout = self.city.layout
+        return self._get('adjacency', lambda: SparseAdjacency(self.graph) if layout is None else layout.adjacency())
+
+    @property
+    def weights(self) -> np.ndarray:
+        """Length of every edge, by adjacency edge id"""
+        def compute():
+            adjacency = self.adjacency
+            layout = self.city.layout
+            if layout is not None:
+                forward = adjacency.indices >= adjacency.rows  # Entries of the adjacency edges, in id order
+                return layout.weights[layout.entry_edge[forward]]
+            return np.array([w for _, _, w in self.graph.edges(data='weight')], dtype=float)
+        return self._get('weights', compute)
+
+    @property
+    def edge_keys(self) -> List[Tuple[int, int]]:
+        """(node1, node2) key of every edge by id, node1 < node2 (ProxyData's edge keys)"""
+        def compute():
+            adjacency = self.adjacency
+            nodes = adjacency.nodes
+            keys = ((nodes[u], nodes[v]) for u, v in zip(adjacency.edge_u.tolist(), adjacency.edge_v.tolist()))
+            return [(u, v) if u < v else (v, u) for u, v in keys]
+        return self._get('edge_keys', compute)
+
+    @property
+    def digest(self) -> bytes:
+        """
+        Hash of the layout: nodes with their positions and edges with their
+        weights, both sorted by node id so insertion order does not matter
+        """
+        def compute():
+            adjacency = self.adjacency
+            layout = self.city.layout
+            if layout is not None:
+                positions = layout.positions
+            else:
+                positions = np.array([self.graph.nodes[n]['pos'] for n in adjacency.nodes], dtype=float)
+            return layout_digest(adjacency.nodes, positions, adjacency.edge_u, adjacency.edge_v, self.weights)
+        return self._get('digest', compute)
+
+    @property
+    def components(self) -> ComponentIndex:
+        """Connected components, for O(1) reachability queries"""
+        layout = self.city.layout
+        if layout is not None:
+            return self._get('components', lambda: ComponentIndex.from_edges(
+                layout.n_nodes, layout.edge_u, layout.edge_v))
+        return self._get('components', lambda: ComponentIndex.from_edges(
+            self.adjacency.n_nodes, self.adjacency.edge_u, self.adjacency.edge_v, self.adjacency.nodes))
+
+    def set_components(self, components: ComponentIndex):
+        """Use a component index already built from this layout (e.g. during generation)"""
+        self._cache['components'] = _read_only_arrays(components)
+
+
 class CityGraph:
-    """Represents the city layout with nodes and edges"""
+    """
+    Represents the city layout with nodes and edges.
+
+    Cities are stored either as a networkx graph (built node by node with
+    add_node / add_edge) or as a compact CityLayout of arrays (from_arrays,
+    used by the generators). For the latter, `graph` is a networkx view
+    built on first access; the query methods below never need it.
+    """
 
     def __init__(self):
-        self.graph: nx.Graph = nx.Graph()
+        self._graph: nx.Graph = nx.Graph()
+        self._layout: CityLayout = None
         self.starting_node: int = None
         self.extraction_nodes: List[int] = []
+        self._metrics: CityMetrics = None
+
+    @classmethod
+    def from_arrays(cls, positions: np.ndarray, edge_u: np.ndarray, edge_v: np.ndarray,
+                    weights: np.ndarray) -> "CityGraph":
+        """
+        City on nodes 0..n-1 backed by arrays (see CityLayout). Equivalent to
+        adding the nodes, then the edges in the given order, one by one.
+        """
+        city = cls()
+        city._graph = None
+        city._layout = CityLayout(positions, edge_u, edge_v, weights)
+        return city
+
+    @property
+    def layout(self) -> CityLayout:
+        """Array layout of this city, None if it is only held as a networkx graph"""
+        return self._layout
+
+    @property
+    def graph(self) -> nx.Graph:
+        """networkx graph of the layout (built on first access for array cities)"""
+        if self._graph is None:
+            self._graph = self._layout.to_networkx()
+        return self._graph
+
+    @graph.setter
+    def graph(self, graph: nx.Graph):
+        self._graph = graph
+        self._layout = None
+        self._metrics = None
+
+    @property
+    def metrics(self) -> CityMetrics:
+        """
+        Structural metrics cache for this layout. Reset by add_node/add_edge;
+        call reset_metrics() after editing self.graph directly.
+        """
+        if self._metrics is None:
+            self._metrics = CityMetrics(self)
+        return self._metrics
+
+    def reset_metrics(self):
+        """Drop cached structural metrics (and the arrays, if the graph view may have been edited)"""
+        if self._graph is not None:
+            self._layout = None
+        self._metrics = None
+
+    @property
+    def n_nodes(self) -> int:
+        return self._layout.n_nodes if self._layout is not None else self._graph.number_of_nodes()
+
+    def nodes(self) -> List[int]:
+        """Node ids, in insertion order"""
+        return list(range(self._layout.n_nodes)) if self._layout is not None else list(self._graph)
+
+    def has_node(self, node_id: int) -> bool:
+        return self._layout.has_node(node_id) if self._layout is not None else node_id in self._graph
+
+    def position(self, node: int) -> Tuple[float, float]:
+        """Coordinates of a node"""
+        if self._layout is not None:
+            return tuple(self._layout.positions[node].tolist())
+        return self._graph.nodes[node]['pos']
+
+    def edges(self) -> List[Tuple[int, int, float]]:
+        """(node1, node2, weight) of every edge, in networkx graph.edges() order"""
+        adjacency = self.metrics.adjacency
+        nodes = adjacency.nodes
+        return [(nodes[u], nodes[v], w) for u, v, w in zip(adjacency.edge_u.tolist(), adjacency.edge_v.tolist(),
+                                                           self.metrics.weights.tolist())]
+
+    @property
+    def components(self) -> ComponentIndex:
+        """Connected component index of this layout"""
+        return self.metrics.components
+
+    def is_reachable(self, node1: int, node2: int) -> bool:
+        """Whether any path joins the two nodes, in O(1)"""
+        return self.components.connected(node1, node2)
+
+    def neighbors(self, node: int) -> List[int]:
+        """Neighbours of a node"""
+        if self._layout is not None:
+            return self._layout.neighbors(node)
+        return list(self._graph.adj[node])
+
+    def edge_weight(self, node1: int, node2: int) -> float:
+        """Length of the edge joining two nodes, None if there is no such edge"""
+        if self._layout is not None:
+            known = self.has_node(node1) and self.has_node(node2)
+            weight = self._layout.edge_weights([node1], [node2])[0] if known else np.nan
+            return None if np.isnan(weight) else float(weight)
+        edge = self._graph.adj[node1].get(node2) if node1 in self._graph else None
+        return None if edge is None else edge['weight']
+
+    def edge_weights(self, nodes1: List[int], nodes2: List[int]) -> np.ndarray:
+        """Length of every (nodes1[i], nodes2[i]) edge, NaN where there is none"""
+        if self._layout is not None:
+            ids1, ids2 = np.asarray(nodes1), np.asarray(nodes2)
+            if ids1.dtype.kind in 'iu' and ids2.dtype.kind in 'iu':  # Node ids: out of range ones get NaN
+                return self._layout.edge_weights(ids1, ids2)
+        weights = (self.edge_weight(n1, n2) for n1, n2 in zip(nodes1, nodes2))
+        return np.array([np.nan if w is None else w for w in weights], dtype=float)
+
+    def content_hash(self) -> str:
+        """
+        Stable hash of the layout, start and extraction nodes, read from the
+        array buffers. Equal cities hash equal whether they are held as
+        arrays or as a networkx graph, whatever order they were built in.
+        """
+        return digest(self.metrics.digest, self.starting_node, list(self.extraction_nodes)).hex()
+
+    def edge_ids(self, nodes1: List[int], nodes2: List[int]) -> np.ndarray:
+        """
+        Id of every (nodes1[i], nodes2[i]) edge, -1 where there is none.
+        Edge ids are those of metrics.adjacency and index every per-edge
+        array of the city (metrics.weights, the true state's 'blocked').
+        """
+        return self.metrics.adjacency.node_edge_ids(nodes1, nodes2)
+
+    def shortest_path(self, source: int, target: int) -> List[int]:
+        """Shortest weighted path between two nodes, [] if unreachable"""
+        if not self.is_reachable(source, target):
+            return []
+        if self._layout is not None:
+            layout = self._layout
+            _, predecessor = dijkstra(layout.indptr, layout.indices, layout.weights[layout.entry_edge],
+                                      source, targets=[target])
+            return path_to(predecessor, source, target)
+        return nx.shortest_path(self._graph, source, target, weight='weight')
 
     def add_node(self, node_id: int, pos: Tuple[float, float]):
         """Add a node with its position"""
         self.graph.add_node(node_id, pos=pos)
+        self._layout = None  # The graph is the layout from now on
+        self._metrics = None
 
     def add_edge(self, node1: int, node2: int, weight: float):
         """Add an edge between nodes with its weight (distance)"""
         self.graph.add_edge(node1, node2, weight=weight)
+        self._layout = None
+        self._metrics = None
 
     def set_starting_node(self, node_id: int):
         """Set the evacuation starting point"""
-        if node_id in self.graph.nodes:
+        if self.has_node(node_id):
             self.starting_node = node_id
 
     def add_extraction_node(self, node_id: int):
         """Add a possible extraction point"""
-        if node_id in self.graph.nodes:
+        if self.has_node(node_id):
             self.extraction_nodes.append(node_id)
 
     def copy(self) -> "CityGraph":
         """Creates a deep copy of the CityGraph object"""
         new_copy = CityGraph()
-        new_copy.graph = self.graph.copy()  # Deep copy the graph
+        if self._layout is not None:
+            new_copy._graph = None
+            new_copy._layout = self._layout  # Read-only arrays, safe to share
+        else:
+            new_copy._graph = self._graph.copy()  # Deep copy the graph
         new_copy.starting_node = self.starting_node
-        new_copy.extraction_nodes = self.extraction_nodes.copy()  # Copy list to avoid mutation
+        new_copy.extraction_nodes = list(self.extraction_nodes)  # Copy list to avoid mutation
+        metrics = self._metrics
+        if metrics is not None and 'components' in metrics._cache:
+            new_copy.metrics.set_components(self.components)  # Same layout, same components
         return new_copy
 
 
+    def view(self) -> "CityView":
+        """Read-only view of this city that shares its data instead of copying it"""
+        return CityView(self)
+
+
+def _read_only(*args, **kwargs):
+    raise TypeError("This city is a read-only view; use city.copy() to get one that can be modified")
+
+class _FrozenAttributes(dict):
+    """Attribute dict of a CityView graph: reads like a dict, writes raise TypeError; copies are plain dicts"""
+    __setitem__ = __delitem__ = __ior__ = update = pop = popitem = clear = setdefault = _read_only
+
+    def copy(self) -> Dict:
+        return dict(self)
+
+    def __copy__(self) -> Dict:
+        return dict(self)
+
+    def __deepcopy__(self, memo) -> Dict:
+        return copy.deepcopy(dict(self), memo)
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+def _frozen_graph(graph: nx.Graph) -> nx.Graph:
+    """
+    Frozen graph with the structure and adjacency order of `graph` whose
+    graph, node and edge attribute dicts are read-only copies, so no write
+    through it can reach `graph`
+    """
+    edge_data: Dict[int, _FrozenAttributes] = {}  # Both directions of an edge share one dict
+
+    def frozen_edge(data: Dict) -> _FrozenAttributes:
+        if id(data) not in edge_data:
+            edge_data[id(data)] = _FrozenAttributes(data)
+        return edge_data[id(data)]
+
+    frozen = nx.Graph()
+    frozen.graph = _FrozenAttributes(graph.graph)
+    frozen._node = {node: _FrozenAttributes(data) for node, data in graph._node.items()}
+    frozen._adj = {node: {neighbor: frozen_edge(data) for neighbor, data in neighbors.items()}
+                   for node, neighbors in graph._adj.items()}
+    return nx.freeze(frozen)
+
+def _frozen_layout_graph(layout: CityLayout) -> nx.Graph:
+    """_frozen_graph(layout.to_networkx()), built straight from the arrays"""
+    frozen = nx.Graph()
+    frozen.graph = _FrozenAttributes()
+    frozen._node = {node: _FrozenAttributes(pos=pos)
+                    for node, pos in enumerate(map(tuple, layout.positions.tolist()))}
+    frozen._adj = adjacency = {node: {} for node in frozen._node}
+    for u, v, weight in zip(layout.edge_u.tolist(), layout.edge_v.tolist(), layout.weights.tolist()):
+        adjacency[u][v] = adjacency[v][u] = _FrozenAttributes(weight=weight)
+    return nx.freeze(frozen)
+
+class CityView(CityGraph):
+    """
+    Read-only CityGraph over another city's data, for handing a city to
+    code that must not change it (e.g. a policy) without a deep copy.
+
+    The layout arrays, cached metrics and (for graph-built cities) the
+    graph read by the query methods are shared with the source city.
+    `graph` is a separate frozen graph with read-only attribute dicts,
+    built on first access and then shared by every view of the city. Any mutation, of the city or of its graph,
+    raises TypeError, and the shared arrays are read-only (writes raise
+    ValueError). Cached metric dicts (e.g. metrics.betweenness) are shared
+    as they are and must not be modified. Call copy() for a city that can
+    be modified.
+    """
+
+    def __init__(self, city: CityGraph):
+        object.__setattr__(self, 'starting_node', city.starting_node)
+        object.__setattr__(self, 'extraction_nodes', tuple(city.extraction_nodes))
+        self._layout = city._layout
+        self._graph = city._graph  # Source graph, only read by the query methods
+        self._metrics = city.metrics
+
+    add_node = add_edge = set_starting_node = add_extraction_node = staticmethod(_read_only)
+
+    def __setattr__(self, name: str, value):
+        if not name.startswith('_'):  # Private caches (graph view, metrics) may still be filled in
+            _read_only()
+        object.__setattr__(self, name, value)
+
+    @property
+    def graph(self) -> nx.Graph:
+        """Frozen networkx graph of the layout with read-only attributes, one per source city"""
+        if self._graph is not None:
+            return self._metrics._get('frozen_graph', lambda: _frozen_graph(self._graph))
+        return self._metrics._get('frozen_graph', lambda: _frozen_layout_graph(self._layout))
+
+    @graph.setter
+    def graph(self, graph: nx.Graph):
+        _read_only()
+
+    def reset_metrics(self):
+        """Nothing to reset: the layout cannot change"""
+
+    def view(self) -> "CityView":
+        return self
+
+def indicator_frame(names: List[str], values: np.ndarray, labels: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """
+    DataFrame over a (n_indicators, n) array without copying it: one
+    column per label array, then one per indicator. Writing to the
+    indicator columns writes to `values`.
+    """
+    frame = pd.DataFrame(values.T, columns=list(names), copy=False)
+    for i, (column, label) in enumerate(labels.items()):
+        frame.insert(i, column, label)
+    return frame
+
+class IndicatorTable(MutableMapping):
+    """
+    Indicators of a set of nodes or edges stored by column: row i of
+    `array` holds indicator names[i] of every key, in key order.
+
+    Behaves as the Dict[key, Dict[str, float]] it replaces: reading a key
+    builds its indicator dict, assigning one writes it into the columns.
+    Indicators a key never got are NaN in the array and absent from its dict.
+    """
+
+    def __init__(self, keys: Sequence[Hashable] = (), names: Sequence[str] = (),
+                 values: np.ndarray = None, dtype=np.float64):
+        """
+        Args:
+            keys: Node ids or (node1, node2) edges
+            names: Indicator names
+            values: (len(names), len(keys)) indicator values (default: all NaN)
+            dtype: Storage type, e.g. np.float32 to halve the memory
+        """
+        self.names: List[str] = list(names)
+        self._keys: List[Hashable] = list(keys)
+        if values is None:
+            values = np.full((len(self.names), len(self._keys)), np.nan, dtype=dtype)
+        self._values = np.asarray(values, dtype=dtype)  # Spare columns past len(keys) when grown
+        if self._values.shape != (len(self.names), len(self._keys)):
+            raise ValueError(f"Expected {len(self.names)}x{len(self._keys)} indicator values, "
+                             f"got {self._values.shape}")
+        self._index: Dict[Hashable, int] = None  # key -> column, built on first lookup
+        self._labels: np.ndarray = None  # Keys as an array, built on first frame
+
+    @property
+    def array(self) -> np.ndarray:
+        """(n_indicators, n_keys) view of the values"""
+        return self._values[:, :len(self._keys)]
+
+    @property
+    def index(self) -> Dict[Hashable, int]:
+        """Column of every key"""
+        if self._index is None:
+            self._index = {key: i for i, key in enumerate(self._keys)}
+        return self._index
+
+    def digest(self) -> bytes:
+        """Hash of the keys, indicator names and values"""
+        return digest(np.array(self._keys), self.names, self.array)
+
+    def column(self, name: str) -> np.ndarray:
+        """Values of one indicator for every key, in key order (a view)"""
+        return self.array[self.names.index(name)]
+
+    def frame(self, label_columns: List[str]) -> pd.DataFrame:
+        """
+        DataFrame view with the keys in `label_columns` (one column per key
+        part) followed by one column per indicator
+        """
+        if self._labels is None:
+            self._labels = np.array(self._keys, dtype=np.int64).reshape(len(self._keys), len(label_columns))
+        return indicator_frame(self.names, self.array,
+                               {column: self._labels[:, i] for i, column in enumerate(label_columns)})
+
+    def to_dict(self) -> Dict[Hashable, Dict[str, float]]:
+        """Plain dict of every key's indicators"""
+        return dict(zip(self._keys, map(self._row_dict, self.array.T.tolist())))
+
+    def _row_dict(self, row: List[float]) -> Dict[str, float]:
+        return {name: value for name, value in zip(self.names, row) if value == value}  # Drop NaN
+
+    def _add_key(self, key: Hashable) -> int:
+        column = self.index.get(key)
+        if column is None:
+            column = len(self._keys)
+            if column == self._values.shape[1]:
+                grown = np.full((len(self.names), max(16, 2 * column)), np.nan, dtype=self._values.dtype)
+                grown[:, :column] = self._values
+                self._values = grown
+            else:
+                self._values[:, column] = np.nan
+            self._keys.append(key)
+            self._index[key] = column
+            self._labels = None
+        return column
+
+    def _add_name(self, name: str) -> int:
+        if name not in self.names:
+            self.names.append(name)
+            self._values = np.vstack([self._values, np.full((1, self._values.shape[1]), np.nan,
+                                                            dtype=self._values.dtype)])
+        return self.names.index(name)
+
+    def set(self, key: Hashable, name: str, value: float):
+        """Set one indicator of one key, adding either if new"""
+        column, row = self._add_key(key), self._add_name(name)
+        self._values[row, column] = value
+
+    def assign(self, keys: Sequence[Hashable], names: Sequence[str], values):
+        """
+        Set the indicators of many keys at once, as `self[keys[i]] = dict(zip(names, values[i]))`
+        with values a (len(keys), len(names)) array or nested list
+        """
+        columns = [self._add_key(key) for key in keys]
+        rows = [self._add_name(name) for name in names]
+        self._values[:, columns] = np.nan
+        self._values[np.ix_(rows, columns)] = np.asarray(values, dtype=self._values.dtype).reshape(
+            len(columns), len(rows)).T
+
+    def __getitem__(self, key) -> Dict[str, float]:
+        return self._row_dict(self._values[:, self.index[key]].tolist())
+
+    def __setitem__(self, key, indicators: Mapping):
+        self.assign([key], list(indicators), [list(indicators.values())])
+
+    def __delitem__(self, key):
+        column = self.index[key]
+        self._values = np.delete(self.array, column, axis=1)
+        del self._keys[column]
+        self._index = None
+        self._labels = None
+
+    def __contains__(self, key) -> bool:
+        return key in self.index
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __repr__(self) -> str:
+        return f"IndicatorTable({len(self._keys)} keys x {self.names})"
+
 class ProxyData:
-    """Contains proxy indicators for nodes and edges"""
-    def __init__(self):
-        self.node_data: Dict[int, Dict] = {}  # node_id -> indicators
-        self.edge_data: Dict[Tuple[int, int], Dict] = {}  # (node1, node2) -> indicators
+    """
+    Contains proxy indicators for nodes and edges, stored by column.
+
+    `node_data` (node_id -> indicators) and `edge_data` ((node1, node2) ->
+    indicators, node1 < node2) work as the dicts they used to be;
+    node_frame() and edge_frame() give the same data as DataFrames without
+    copying it.
+    """
+    def __init__(self, nodes: Sequence[int] = (), node_names: Sequence[str] = (),
+                 node_values: np.ndarray = None, edges: Sequence[Tuple[int, int]] = (),
+                 edge_names: Sequence[str] = (), edge_values: np.ndarray = None, dtype=np.float64):
+        """
+        Args:
+            nodes, edges: Keys, edges as sorted (node1, node2) tuples
+            node_names, edge_names: Indicator names
+            node_values, edge_values: (n_indicators, n_keys) values (default: none set)
+            dtype: Storage type, e.g. np.float32 to halve the memory
+        """
+        self.node_data = IndicatorTable(nodes, node_names, node_values, dtype)  # node_id -> indicators
+        self.edge_data = IndicatorTable(edges, edge_names, edge_values, dtype)  # (node1, node2) -> indicators
         
     def add_node_indicator(self, node_id: int, indicator_type: str, value: float):
         """Add an indicator for a node"""
-        if node_id not in self.node_data:
-            self.node_data[node_id] = {}
-        self.node_data[node_id][indicator_type] = value
+        self.node_data.set(node_id, indicator_type, value)
         
     def add_edge_indicator(self, node1: int, node2: int, indicator_type: str, value: float):
         """Add an indicator for an edge"""
-        edge = tuple(sorted([node1, node2]))  # Ensure consistent edge representation
-        if edge not in self.edge_data:
-            self.edge_data[edge] = {}
-        self.edge_data[edge][indicator_type] = value
+        edge = (node1, node2) if node1 < node2 else (node2, node1)  # Ensure consistent edge representation
+        self.edge_data.set(edge, indicator_type, value)
+
+    def content_hash(self) -> str:
+        """Stable hash of the node and edge indicators, read from the array buffers"""
+        return digest(self.node_data.digest(), self.edge_data.digest()).hex()
+
+    def node_frame(self) -> pd.DataFrame:
+        """Node indicators as a DataFrame with a 'node' column (a view, not a copy)"""
+        return self.node_data.frame(['node'])
+
+    def edge_frame(self) -> pd.DataFrame:
+        """Edge indicators as a DataFrame with 'node_1', 'node_2' columns (a view, not a copy)"""
+        return self.edge_data.frame(['node_1', 'node_2'])
+
+class _ResourceCounts(MutableMapping):
+    """Dict-like view resource type -> count over one row of ResourceUsage.counts"""
+    __slots__ = ('row',)
+
+    def __init__(self, row: np.ndarray):
+        self.row = row
+
+    def __getitem__(self, key) -> int:
+        return int(self.row[ResourceType.parse(key)])
+
+    def __setitem__(self, key, value: int):
+        self.row[ResourceType.parse(key)] = value
+
+    def __delitem__(self, key):
+        raise TypeError("Resource types cannot be removed")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(ResourceTypes.all_types())
+
+    def __len__(self) -> int:
+        return len(ResourceType)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
 
 class ResourceUsage:
-    """Tracks resource usage and effectiveness"""
-    def __init__(self):
-        self.allocated: Dict[str, int] = {rt: 0 for rt in ResourceTypes.all_types()}
-        self.used: Dict[str, int] = {rt: 0 for rt in ResourceTypes.all_types()}
-        self.needed: Dict[str, int] = {rt: 0 for rt in ResourceTypes.all_types()}
-        self.effective_uses: Dict[str, int] = {rt: 0 for rt in ResourceTypes.all_types()}
+    """
+    Tracks resource usage and effectiveness.
+
+    Counts live in one (4, n_types) int array, rows ALLOCATED, USED, NEEDED
+    and EFFECTIVE_USES, columns ResourceType codes. `allocated`, `used`,
+    `needed` and `effective_uses` are dict-like views of the rows, keyed by
+    resource label (or code).
+    """
+    __slots__ = ('counts',)
+    ALLOCATED, USED, NEEDED, EFFECTIVE_USES = range(4)
+
+    def __init__(self, counts: np.ndarray = None):
+        self.counts = np.zeros((4, len(ResourceType)), dtype=np.int32) if counts is None else counts
+
+    @property
+    def allocated(self) -> _ResourceCounts:
+        return _ResourceCounts(self.counts[self.ALLOCATED])
+
+    @property
+    def used(self) -> _ResourceCounts:
+        return _ResourceCounts(self.counts[self.USED])
+
+    @property
+    def needed(self) -> _ResourceCounts:
+        return _ResourceCounts(self.counts[self.NEEDED])
+
+    @property
+    def effective_uses(self) -> _ResourceCounts:
+        return _ResourceCounts(self.counts[self.EFFECTIVE_USES])
         
     def to_dict(self) -> Dict:
         """Convert to dictionary for serialization"""
+        labels = ResourceTypes.all_types()
+        allocated, used, needed, effective_uses = self.counts.tolist()
         return {
-            'allocated': self.allocated,
-            'used': self.used,
-            'needed': self.needed,
-            'effective_uses': self.effective_uses,
+            'allocated': dict(zip(labels, allocated)),
+            'used': dict(zip(labels, used)),
+            'needed': dict(zip(labels, needed)),
+            'effective_uses': dict(zip(labels, effective_uses)),
             'efficiency': {
-                rt: (self.effective_uses[rt] / self.used[rt] if self.used[rt] > 0 else 0.0)
-                for rt in ResourceTypes.all_types()
+                rt: (effective / uses if uses > 0 else 0.0)
+                for rt, effective, uses in zip(labels, effective_uses, used)
             }
         }
 
@@ -100,21 +782,205 @@ class PolicyResult:
             'resources': self.resources
         }
 
+class EventTrace:
+    """
+    Numeric record of one mission walk, kept instead of formatted events.
+
+    Step s (1-based) is the arrival at path[s - 1], and every step reached
+    has one entry per array: the hazards met (`flags`, a bitmask of
+    RADIATION, ZOMBIES and BLOCKAGE, the latter for the road checked at
+    that step) and the true hazard levels at the node. `end` is the
+    FailureReason of the walk; resources used follow from the flags.
+    events() renders the messages only when asked for.
+    """
+    __slots__ = ('path', '_flags', '_radiation', '_zombies', 'end', 'reached_extraction')
+    RADIATION, ZOMBIES, BLOCKAGE = 1, 2, 4
+    _HAZARD_RESOURCES = [(RADIATION, ResourceType.RADIATION_SUITS), (ZOMBIES, ResourceType.AMMO),
+                         (BLOCKAGE, ResourceType.EXPLOSIVES)]
+
+    def __init__(self, path: List[int], flags: bytearray, radiation: array, zombies: array,
+                 end: FailureReason, reached_extraction: bool = True):
+        """
+        Args:
+            path: Planned path
+            flags, radiation, zombies: Per step reached, appended by the evaluator
+            end: Outcome of the walk
+            reached_extraction: Whether the path ends at an extraction point
+        """
+        self.path = path
+        self._flags = flags
+        self._radiation = radiation
+        self._zombies = zombies
+        self.end = FailureReason(end)
+        self.reached_extraction = reached_extraction
+
+    @property
+    def n_steps(self) -> int:
+        return len(self._flags)
+
+    @property
+    def flags(self) -> np.ndarray:
+        return np.frombuffer(self._flags, dtype=np.uint8)
+
+    @property
+    def radiation(self) -> np.ndarray:
+        return np.frombuffer(self._radiation, dtype=np.float64)
+
+    @property
+    def zombies(self) -> np.ndarray:
+        return np.frombuffer(self._zombies, dtype=np.float64)
+
+    @property
+    def nodes(self) -> List[int]:
+        """Nodes reached, in order"""
+        return list(self.path[:self.n_steps])
+
+    @property
+    def death_node(self) -> int:
+        """Node where the team died for lack of a resource, None if it did not"""
+        deaths = (FailureReason.NO_RADIATION_SUITS, FailureReason.NO_AMMO, FailureReason.NO_EXPLOSIVES)
+        return self.path[self.n_steps - 1] if self.end in deaths else None
+
+    def resource_use(self) -> np.ndarray:
+        """(n_steps, n_types) resources used at every step, by ResourceType code"""
+        use = np.zeros((self.n_steps, len(ResourceType)), dtype=np.int32)
+        flags = self.flags
+        for flag, rt in self._HAZARD_RESOURCES:
+            use[:, rt] = (flags & flag) > 0
+        if self.death_node is not None:  # The hazard that killed the team used nothing
+            use[-1, {FailureReason.NO_RADIATION_SUITS: ResourceType.RADIATION_SUITS,
+                     FailureReason.NO_AMMO: ResourceType.AMMO,
+                     FailureReason.NO_EXPLOSIVES: ResourceType.EXPLOSIVES}[self.end]] = 0
+        return use
+
+    @property
+    def used(self) -> np.ndarray:
+        """(n_steps, n_types) cumulative resources used after every step"""
+        return np.cumsum(self.resource_use(), axis=0, dtype=np.int32)
+
+    def resources_by_node(self) -> Dict[int, Dict[str, int]]:
+        """node -> {resource: amount} used there, for the nodes reached"""
+        by_node = {}
+        for node, use in zip(self.nodes, self.resource_use().tolist()):
+            counts = by_node.setdefault(node, {})
+            for rt in ResourceType:
+                if use[rt]:
+                    counts[rt.label] = counts.get(rt.label, 0) + use[rt]
+        return by_node
+
+    def events(self) -> List[Tuple[int, str]]:
+        """(step, message) list of the walk, as PathEvaluator used to log it"""
+        path, end = self.path, self.end
+        events = [(0, f"Mission started at node {path[0]}")]
+        if end is FailureReason.EXCESS_RESOURCES:
+            events.append((1, 'Mission Failed, you exceeded the amout of allowed resources and your team '
+                              'was killed by the population due to their greed.'))
+        hazards = [
+            (self.RADIATION, FailureReason.NO_RADIATION_SUITS,
+             lambda s: f"High radiation detected (level: {self._radiation[s - 1]:.2f})",
+             "TEAM DIED - Ran out of radiation suits", "Used radiation suit successfully"),
+            (self.ZOMBIES, FailureReason.NO_AMMO,
+             lambda s: f"Zombie horde encountered (level: {self._zombies[s - 1]:.2f})",
+             "TEAM DIED - Ran out of ammo", "Used ammo successfully against zombies"),
+            (self.BLOCKAGE, FailureReason.NO_EXPLOSIVES,
+             lambda s: f"Path blocked to node {path[s + 1]} (blockage detected)",
+             "TEAM DIED - Ran out of explosives", "Used explosives successfully to clear path")
+        ]
+        for step, flags in enumerate(self._flags, 1):
+            last = step == self.n_steps
+            events.append((step, f"Arrived at node {path[step - 1]}"))
+            if last and end is FailureReason.MISSING_EDGE:
+                events.append((step, f"Unexistent path from node {path[step]} to {path[step + 1]}"))
+                break
+            for flag, death, detected, died, handled in hazards:
+                if flags & flag:
+                    events.append((step, detected(step)))
+                    if last and end is death:
+                        events.append((step, died))
+                        break
+                    events.append((step, handled))
+            else:
+                if step < len(path) - 1:
+                    events.append((step, f"Moving to node {path[step + 1]}"))
+        if end is FailureReason.SUCCESS:
+            events.append((len(path), f"Successfully reached extraction point at node {path[-1]}"))
+        if not self.reached_extraction:
+            events[-1] = (len(path), f"FAILED - Path does not reach extraction point ended at node {path[-1]}")
+        return events
+
+    def to_dict(self) -> Dict:
+        """Convert to dictionary for serialization"""
+        return {
+            'path': list(self.path),
+            'nodes': self.nodes,
+            'flags': list(self._flags),
+            'radiation': self._radiation.tolist(),
+            'zombies': self._zombies.tolist(),
+            'used': self.used.tolist(),
+            'end': self.end.name,
+            'reached_extraction': self.reached_extraction
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'EventTrace':
+        """Rebuild a trace saved with to_dict()"""
+        return cls(data['path'], bytearray(data['flags']), array('d', data['radiation']),
+                   array('d', data['zombies']), FailureReason[data['end']], data['reached_extraction'])
+
 class SimulationResult:
-    """Contains the results of a simulation run"""
+    """
+    Contains the results of a simulation run.
+
+    The failure reason is kept as a FailureReason code plus the node ids
+    it mentions, and the events as an EventTrace; both are only rendered
+    to text when read.
+    """
+    __slots__ = ('success', 'path_length', 'time_taken', 'obstacles_encountered', 'resources',
+                 'failure', 'failure_args', 'trace', '_events')
+
     def __init__(self):
         self.success: bool = False
         self.path_length: float = 0.0
         self.time_taken: float = 0.0
         self.obstacles_encountered: int = 0
         self.resources = ResourceUsage()
-        self.failure_reason: str = None
-        self.events: List[Tuple[int, str]] = []  # List of (step_number, event_description)
+        self.failure = FailureReason.NONE
+        self.failure_args: Tuple = ()  # Node ids of the failure message
+        self.trace: EventTrace = None
+        self._events: List[Tuple[int, str]] = []  # Explicit events, None when rendered from the trace
+
+    @property
+    def events(self) -> List[Tuple[int, str]]:
+        """List of (step_number, event_description)"""
+        return self.trace.events() if self._events is None else self._events
+
+    @events.setter
+    def events(self, events: List[Tuple[int, str]]):
+        self._events = events
+
+    @property
+    def failure_reason(self) -> str:
+        return self.failure.message(*self.failure_args)
+
+    @failure_reason.setter
+    def failure_reason(self, reason):
+        """Set from a FailureReason, a (FailureReason, *node ids) tuple or free text"""
+        if reason is None:
+            self.failure, self.failure_args = FailureReason.NONE, ()
+        elif isinstance(reason, FailureReason):
+            self.failure, self.failure_args = reason, ()
+        elif isinstance(reason, tuple):
+            self.failure, self.failure_args = reason[0], tuple(reason[1:])
+        else:
+            self.failure, self.failure_args = FailureReason.OTHER, (reason,)
         
     def set_metrics(self, success: bool, path_length: float, time: float,
                    obstacles: int, resources: ResourceUsage, 
-                   failure_reason: str = None, events: List[Tuple[int, str]] = None):
-        """Set all metrics at once"""
+                   failure_reason=None, events: List[Tuple[int, str]] = None, trace: EventTrace = None):
+        """
+        Set all metrics at once (failure_reason as accepted by the failure_reason
+        setter). A trace replaces the events, which are then rendered from it.
+        """
         self.success = success
         self.path_length = path_length
         self.time_taken = time
@@ -123,10 +989,12 @@ class SimulationResult:
         self.failure_reason = failure_reason
         if events is not None:
             self.events = events
+        if trace is not None:
+            self.trace, self._events = trace, None
         
     def to_dict(self) -> Dict:
-        """Convert to dictionary for serialization"""
-        return {
+        """Convert to dictionary for serialization ('trace' only if a walk was recorded)"""
+        data = {
             'success': self.success,
             'path_length': self.path_length,
             'time_taken': self.time_taken,
@@ -134,4 +1002,97 @@ class SimulationResult:
             'resources': self.resources.to_dict(),
             'failure_reason': self.failure_reason,
             'events': self.events
-        } 
\ No newline at end of file
+        }
+        if self.trace is not None:
+            data['trace'] = self.trace.to_dict()
+        return data
+
+class SimulationResults:
+    """
+    Many SimulationResults held as fixed-size columns, about 80 bytes per
+    run (a million runs in ~80 MB), for bulk analysis. Events are not kept.
+    """
+    _COLUMNS = [
+        ('success', np.bool_, ()),
+        ('path_length', np.float64, ()),
+        ('time_taken', np.float64, ()),
+        ('obstacles_encountered', np.int32, ()),
+        ('failure', np.uint8, ()),
+        ('failure_args', np.int32, (2,)),  # -1 where unused
+        ('resources', np.int32, (4, len(ResourceType)))  # ResourceUsage.counts
+    ]
+
+    def __init__(self, capacity: int = 1024):
+        self._size = 0
+        self._data = np.zeros(capacity, dtype=self._COLUMNS)
+        self._texts: Dict[int, str] = {}  # Run -> message of FailureReason.OTHER runs
+
+    @classmethod
+    def from_columns(cls, success: np.ndarray, path_length: np.ndarray, time_taken: np.ndarray,
+                     obstacles_encountered: np.ndarray, failure: np.ndarray, failure_args: np.ndarray,
+                     resources: np.ndarray) -> "SimulationResults":
+        """
+        Results filled a whole column at a time (e.g. by
+        PathEvaluator.evaluate_many); failure_args is (n, 2), -1 where unused
+        """
+        results = cls(capacity=max(len(success), 1))
+        results._size = len(success)
+        data = results._data[:results._size]
+        data['success'] = success
+        data['path_length'] = path_length
+        data['time_taken'] = time_taken
+        data['obstacles_encountered'] = obstacles_encountered
+        data['failure'] = failure
+        data['failure_args'] = failure_args
+        data['resources'] = resources
+        return results
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        return self._data[:self._size].nbytes
+
+    def column(self, name: str) -> np.ndarray:
+        """One field of every run, e.g. 'success' or 'resources' (a view)"""
+        return self._data[name][:self._size]
+
+    def append(self, result: SimulationResult):
+        if self._size == len(self._data):
+            self._data = np.concatenate([self._data, np.zeros(len(self._data), dtype=self._COLUMNS)])
+        row = self._data[self._size]
+        row['success'] = result.success
+        row['path_length'] = result.path_length
+        row['time_taken'] = result.time_taken
+        row['obstacles_encountered'] = result.obstacles_encountered
+        row['failure'] = result.failure
+        row['resources'] = result.resources.counts
+        if result.failure is FailureReason.OTHER:
+            self._texts[self._size] = result.failure_args[0]
+            row['failure_args'] = -1
+        else:
+            row['failure_args'] = (list(result.failure_args) + [-1, -1])[:2]
+        self._size += 1
+
+    def __getitem__(self, run: int) -> SimulationResult:
+        """SimulationResult of one run (without events)"""
+        if not -self._size <= run < self._size:
+            raise IndexError(run)
+        run %= self._size
+        row = self._data[run]
+        result = SimulationResult()
+        result.success = bool(row['success'])
+        result.path_length = float(row['path_length'])
+        result.time_taken = float(row['time_taken'])
+        result.obstacles_encountered = int(row['obstacles_encountered'])
+        result.resources = ResourceUsage(row['resources'].copy())
+        result.failure = FailureReason(int(row['failure']))
+        if result.failure is FailureReason.OTHER:
+            result.failure_args = (self._texts[run],)
+        else:
+            result.failure_args = tuple(a for a in row['failure_args'].tolist() if a >= 0)
+        return result
+
+    def __iter__(self) -> Iterator[SimulationResult]:
+        return (self[run] for run in range(self._size))
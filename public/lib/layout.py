@@ -0,0 +1,96 @@
+from typing import List
+import numpy as np
+import networkx as nx
+
+from public.lib.sparse import SparseAdjacency, csr_lookup
+
+class CityLayout:
+    """
+    Compact array storage of a city layout: nodes are the ids 0..n-1,
+    positions an (n, 2) float array and the adjacency CSR arrays with int32
+    node ids. About 10x smaller than the equivalent networkx graph.
+
+    Edges keep their insertion order (repeats dropped, as networkx does), so
+    every node lists its neighbours in the order networkx would and
+    to_networkx() rebuilds the exact graph the same edges would have made.
+    All arrays are read-only, so copies of a city can share them.
+    """
+
+    def __init__(self, positions: np.ndarray, edge_u: np.ndarray, edge_v: np.ndarray,
+                 weights: np.ndarray):
+        """
+        Args:
+            positions: (n, 2) node coordinates
+            edge_u, edge_v: Edge endpoints in insertion order; repeated edges
+                            keep their first position and their last weight
+            weights: Length of every edge
+        """
+        positions = np.array(positions, dtype=np.float64).reshape(-1, 2)
+        n_nodes = len(positions)
+        edge_u = np.asarray(edge_u, dtype=np.int64)
+        edge_v = np.asarray(edge_v, dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.float64)
+        if np.any(edge_u == edge_v):
+            raise ValueError("City layouts cannot have self loops")
+
+        # Drop repeated edges like nx.Graph.add_edge: first position, last weight
+        keys = np.minimum(edge_u, edge_v) * n_nodes + np.maximum(edge_u, edge_v)
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        last = np.zeros(len(first), dtype=np.int64)
+        np.maximum.at(last, inverse, np.arange(len(keys)))
+        order = np.argsort(first)
+        edge_u, edge_v, weights = edge_u[first[order]], edge_v[first[order]], weights[last[order]]
+
+        # CSR with both directions of edge e at entries 2e, 2e + 1 before sorting
+        rows = np.stack([edge_u, edge_v], axis=1).ravel()
+        columns = np.stack([edge_v, edge_u], axis=1).ravel()
+        entries = np.argsort(rows, kind='stable')  # Stable: insertion order within every row
+
+        self.positions = positions
+        self.edge_u = edge_u.astype(np.int32)
+        self.edge_v = edge_v.astype(np.int32)
+        self.weights = weights  # Per edge
+        self.indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=n_nodes))))
+        self.indices = columns[entries].astype(np.int32)
+        self.entry_edge = (entries // 2).astype(np.int32)  # Edge of every CSR entry
+        for array in (self.positions, self.edge_u, self.edge_v, self.weights,
+                      self.indptr, self.indices, self.entry_edge):
+            array.setflags(write=False)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.positions)
+
+    @property
+    def n_edges(self) -> int:
+        return len(self.edge_u)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the layout arrays"""
+        return sum(array.nbytes for array in (self.positions, self.edge_u, self.edge_v, self.weights,
+                                              self.indptr, self.indices, self.entry_edge))
+
+    def has_node(self, node) -> bool:
+        return isinstance(node, (int, np.integer)) and 0 <= node < self.n_nodes
+
+    def neighbors(self, node: int) -> List[int]:
+        """Neighbours of a node, in networkx adjacency order"""
+        return self.indices[self.indptr[node]:self.indptr[node + 1]].tolist()
+
+    def edge_weights(self, nodes1, nodes2) -> np.ndarray:
+        """Length of every (nodes1[i], nodes2[i]) edge, NaN where there is none"""
+        entries = csr_lookup(self.indptr, self.indices, nodes1, nodes2)
+        weights = self.weights[self.entry_edge[np.maximum(entries, 0)]] if len(entries) else np.empty(0)
+        return np.where(entries >= 0, weights, np.nan)
+
+    def adjacency(self) -> SparseAdjacency:
+        """CSR adjacency for the metrics, identical to SparseAdjacency(self.to_networkx())"""
+        return SparseAdjacency.from_csr(range(self.n_nodes), self.indptr, self.indices)
+
+    def to_networkx(self) -> nx.Graph:
+        """networkx graph of the layout, built as CityGraph.add_node / add_edge would"""
+        graph = nx.Graph()
+        graph.add_nodes_from((i, {'pos': pos}) for i, pos in enumerate(map(tuple, self.positions.tolist())))
+        graph.add_weighted_edges_from(zip(self.edge_u.tolist(), self.edge_v.tolist(), self.weights.tolist()))
+        return graph
@@ -0,0 +1,305 @@
+import heapq
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Sequence, Tuple
+import numpy as np
+import networkx as nx
+
+class SparseAdjacency:
+    """
+    CSR adjacency of an undirected graph over dense node indices.
+
+    Node i is `nodes[i]`; its neighbours are `indices[indptr[i]:indptr[i+1]]`
+    in the graph's adjacency order. Edges are numbered in `graph.edges()`
+    order and `entry_edge` maps every CSR entry to its edge id. These edge
+    ids index every per-edge array of a city (weights, true blockages,
+    edge indicators).
+    """
+
+    def __init__(self, graph: nx.Graph):
+        nodes = list(graph)
+        index = {node: i for i, node in enumerate(nodes)}
+        degree = np.fromiter((len(graph.adj[node]) for node in nodes), dtype=np.int64, count=len(nodes))
+        indptr = np.concatenate(([0], np.cumsum(degree)))
+        indices = np.fromiter((index[w] for node in nodes for w in graph.adj[node]),
+                              dtype=np.int64, count=indptr[-1])
+        self._setup_csr(nodes, indptr, indices)
+
+    @classmethod
+    def from_csr(cls, nodes, indptr: np.ndarray, indices: np.ndarray) -> "SparseAdjacency":
+        """
+        Adjacency of a graph already held as CSR arrays in networkx adjacency
+        order (e.g. a CityLayout). Edge ids follow graph.edges() order.
+        """
+        adjacency = cls.__new__(cls)
+        adjacency._setup_csr(nodes, np.asarray(indptr, dtype=np.int64), np.asarray(indices, dtype=np.int64))
+        return adjacency
+
+    def _setup_csr(self, nodes, indptr: np.ndarray, indices: np.ndarray):
+        # graph.edges() yields every edge once, from whichever endpoint comes
+        # first in node order: the CSR entries pointing forward
+        rows = np.repeat(np.arange(len(nodes)), np.diff(indptr))
+        forward = indices >= rows
+        self._setup(nodes, indptr, indices, rows[forward], indices[forward])
+
+    @classmethod
+    def from_edges(cls, n_nodes: int, edge_u: np.ndarray, edge_v: np.ndarray) -> "SparseAdjacency":
+        """
+        CSR adjacency of the graph on nodes 0..n_nodes-1 with these edges,
+        built without a networkx graph. Every node lists its neighbours in
+        edge order, as networkx would after adding the edges in that order.
+        """
+        edge_u = np.asarray(edge_u, dtype=np.int64)
+        edge_v = np.asarray(edge_v, dtype=np.int64)
+        # Both directions of edge e sit at entries 2e and 2e + 1
+        rows = np.stack([edge_u, edge_v], axis=1).ravel()
+        columns = np.stack([edge_v, edge_u], axis=1).ravel()
+        order = np.argsort(rows, kind='stable')  # Stable: edge order within every row
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=n_nodes))))
+        adjacency = cls.__new__(cls)
+        adjacency._setup(range(n_nodes), indptr, columns[order], edge_u, edge_v)
+        return adjacency
+
+    def _setup(self, nodes, indptr: np.ndarray, indices: np.ndarray,
+               edge_u: np.ndarray, edge_v: np.ndarray):
+        self.nodes: List[int] = nodes
+        self.n_nodes = len(nodes)
+        self.indptr = indptr
+        self.indices = indices
+        self.degree = np.diff(indptr)
+        self.rows = np.repeat(np.arange(self.n_nodes), self.degree)  # Source node of every entry
+        self.edge_u, self.edge_v = edge_u, edge_v
+        self.n_edges = len(edge_u)
+
+        # Sorted undirected keys for (u, v) -> edge id lookups
+        keys = self._keys(self.edge_u, self.edge_v)
+        self._key_order = np.argsort(keys, kind='stable')
+        self._sorted_keys = keys[self._key_order]
+        self.entry_edge = self.edge_ids(self.rows, self.indices)
+        self._all_triangles = None  # triangles() of every edge, built on first use
+        self._index: Dict = None  # node id -> index, built on first use unless nodes is a range
+
+    def _keys(self, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+        u, v = u.astype(np.int64, copy=False), v.astype(np.int64, copy=False)  # No int32 overflow
+        return np.minimum(u, v) * self.n_nodes + np.maximum(u, v)
+
+    def edge_ids(self, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+        """Edge id of every (u, v) index pair, -1 where there is no edge"""
+        keys = self._keys(np.asarray(u, dtype=np.int64), np.asarray(v, dtype=np.int64))
+        if self.n_edges == 0:
+            return np.full(keys.shape, -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self._sorted_keys, keys), self.n_edges - 1)
+        return np.where(self._sorted_keys[pos] == keys, self._key_order[pos], -1)
+
+    def node_indices(self, nodes: Sequence) -> np.ndarray:
+        """Index of every node id, -1 for ids not in the graph"""
+        if isinstance(self.nodes, range):  # Dense ids 0..n-1, as in array layouts
+            ids = np.asarray(nodes)
+            if ids.dtype.kind in 'iu':
+                ids = ids.astype(np.int64, copy=False)
+                return np.where((ids >= 0) & (ids < self.n_nodes), ids, -1)
+            return np.fromiter((node if isinstance(node, (int, np.integer)) and 0 <= node < self.n_nodes else -1
+                                for node in nodes), dtype=np.int64, count=len(nodes))
+        if self._index is None:
+            self._index = {node: i for i, node in enumerate(self.nodes)}
+        return np.fromiter((self._index.get(node, -1) for node in nodes), dtype=np.int64, count=len(nodes))
+
+    def node_edge_ids(self, nodes1: Sequence, nodes2: Sequence) -> np.ndarray:
+        """Edge id of every (nodes1[i], nodes2[i]) node id pair, -1 where there is no edge"""
+        u, v = self.node_indices(nodes1), self.node_indices(nodes2)
+        known = (u >= 0) & (v >= 0)
+        return np.where(known, self.edge_ids(np.maximum(u, 0), np.maximum(v, 0)), -1)
+
+    def entries(self, nodes: np.ndarray) -> np.ndarray:
+        """CSR entry positions of all the given nodes' neighbours, node by node"""
+        nodes = np.asarray(nodes, dtype=np.int64)
+        counts = self.degree[nodes]
+        starts = np.repeat(self.indptr[nodes] - np.cumsum(counts) + counts, counts)
+        return starts + np.arange(counts.sum())
+
+    def subgraph(self, nodes: np.ndarray) -> Tuple["SparseAdjacency", np.ndarray]:
+        """
+        Induced subgraph on sorted unique node indices, in O(their degree sum).
+        Neighbour and edge order follow this adjacency, so sums over the
+        subgraph add the same terms in the same order.
+
+        Returns:
+            Tuple of (subgraph adjacency, ids here of its edges); subgraph
+            node i is nodes[i]
+        """
+        nodes = np.asarray(nodes, dtype=np.int64)
+        entries = self.entries(nodes)
+        targets = self.indices[entries]
+        local = np.minimum(np.searchsorted(nodes, targets), len(nodes) - 1)
+        keep = nodes[local] == targets
+        rows = np.repeat(np.arange(len(nodes)), self.degree[nodes])[keep]
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=len(nodes)))))
+        edges = np.unique(self.entry_edge[entries[keep]])
+        subgraph = SparseAdjacency.__new__(SparseAdjacency)
+        subgraph._setup(nodes, indptr, local[keep], np.searchsorted(nodes, self.edge_u[edges]),
+                        np.searchsorted(nodes, self.edge_v[edges]))
+        return subgraph, edges
+
+    def bfs_distances(self, sources: Sequence[int], cutoff: int = None) -> np.ndarray:
+        """
+        Hop distance from the nearest source to every node, one array step
+        per BFS level. -1 for nodes unreachable or beyond `cutoff`.
+        """
+        distance = np.full(self.n_nodes, -1, dtype=np.int64)
+        frontier = np.unique(np.asarray(sources, dtype=np.int64))
+        distance[frontier] = 0
+        level = 0
+        while len(frontier) and (cutoff is None or level < cutoff):
+            level += 1
+            reached = self.indices[self.entries(frontier)]
+            frontier = np.unique(reached[distance[reached] < 0])
+            distance[frontier] = level
+        return distance
+
+    def neighbor_sum(self, values: np.ndarray) -> np.ndarray:
+        """Sum of `values` over every node's neighbours, added in adjacency order"""
+        return np.bincount(self.rows, weights=values[self.indices], minlength=self.n_nodes)
+
+    def incident_sum(self, edge_values: np.ndarray) -> np.ndarray:
+        """Sum of per-edge `edge_values` over every node's incident edges"""
+        return np.bincount(self.rows, weights=edge_values[self.entry_edge], minlength=self.n_nodes)
+
+    def clustering(self) -> np.ndarray:
+        """Clustering coefficient of every node (as nx.clustering)"""
+        _, third = self.triangles()
+        # Every triangle is found once from the edge opposite each corner
+        triangles = np.bincount(third, minlength=self.n_nodes)
+        pairs = self.degree * (self.degree - 1)
+        return np.where(triangles > 0, 2 * triangles / np.maximum(pairs, 1), 0.0)
+
+    def triangles(self, edges: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Triangles through the given edges (all edges by default), i.e. the
+        nonzeros of (A @ A) restricted to those edges.
+
+        Returns:
+            Tuple of (edge, third) arrays: edge id and the common neighbour of
+            its endpoints closing each triangle
+        """
+        if edges is None:
+            if self._all_triangles is None:
+                self._all_triangles = self.triangles(np.arange(self.n_edges))
+            return self._all_triangles
+        edges = np.asarray(edges, dtype=np.int64)
+        u, v = self.edge_u[edges], self.edge_v[edges]
+        # Wedges u-w for every neighbour w of u, kept when v-w is an edge too
+        counts = self.degree[u]
+        wedge_edge = np.repeat(edges, counts)
+        third = self.indices[self.entries(u)]
+        closed = self.edge_ids(np.repeat(v, counts), third) >= 0
+        return wedge_edge[closed], third[closed]
+
+class EdgeMap(Mapping):
+    """
+    Read-only mapping (node1, node2) -> value over a per-edge array of a
+    SparseAdjacency, looked up by node ids in either order; keys iterate as
+    (node1, node2) with node1 < node2. Only the edges whose value is set
+    count as keys when `only_set` is True (e.g. true blockages).
+    """
+
+    def __init__(self, adjacency: SparseAdjacency, values: np.ndarray, only_set: bool = False):
+        self.adjacency = adjacency
+        self.values = values  # By edge id
+        self.only_set = only_set
+
+    def _edge(self, key) -> int:
+        try:
+            node1, node2 = key
+            edge = int(self.adjacency.node_edge_ids([node1], [node2])[0])
+        except (TypeError, ValueError):
+            return -1
+        if edge >= 0 and self.only_set and not self.values[edge]:
+            return -1
+        return edge
+
+    def __getitem__(self, key):
+        edge = self._edge(key)
+        if edge < 0:
+            raise KeyError(key)
+        return self.values[edge].item()  # Plain Python value, as a dict would hold
+
+    def __contains__(self, key) -> bool:
+        return self._edge(key) >= 0
+
+    def _edges(self) -> np.ndarray:
+        return np.flatnonzero(self.values) if self.only_set else np.arange(self.adjacency.n_edges)
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        nodes = self.adjacency.nodes
+        for edge in self._edges().tolist():
+            u, v = nodes[self.adjacency.edge_u[edge]], nodes[self.adjacency.edge_v[edge]]
+            yield (u, v) if u < v else (v, u)
+
+    def __len__(self) -> int:
+        return len(self._edges())
+
+def csr_lookup(indptr: np.ndarray, indices: np.ndarray, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """
+    CSR entry of every (u, v) node index pair, -1 where v is not a neighbour
+    of u or either index is out of range. Costs O(degree sum of u).
+    """
+    n_nodes = len(indptr) - 1
+    u = np.asarray(u, dtype=np.int64).ravel()
+    v = np.asarray(v, dtype=np.int64).ravel()
+    result = np.full(len(u), -1, dtype=np.int64)
+    valid = np.flatnonzero((u >= 0) & (u < n_nodes) & (v >= 0) & (v < n_nodes))
+    starts = indptr[u[valid]]
+    counts = indptr[u[valid] + 1] - starts
+    entries = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+    match = indices[entries] == np.repeat(v[valid], counts)
+    result[np.repeat(valid, counts)[match]] = entries[match]
+    return result
+
+def dijkstra(indptr: np.ndarray, indices: np.ndarray, entry_weights: np.ndarray, source: int,
+             targets: Sequence[int] = None) -> Tuple[Dict[int, float], Dict[int, int]]:
+    """
+    Weighted shortest paths from `source` over CSR arrays (heap-based).
+    Stops as soon as every target is settled when targets are given.
+
+    Args:
+        indptr, indices: CSR adjacency
+        entry_weights: Weight of every CSR entry
+        source: Start node index
+        targets: Optional node indices that end the search once all are settled
+
+    Returns:
+        Tuple of (distance, predecessor) dicts over the settled nodes; the
+        source has no predecessor
+    """
+    indptr, indices, entry_weights = indptr.tolist(), indices.tolist(), entry_weights.tolist()
+    remaining = set(targets) if targets is not None else None
+    distance: Dict[int, float] = {}
+    predecessor: Dict[int, int] = {}
+    best = {source: 0.0}
+    heap = [(0.0, source, -1)]
+    while heap:
+        dist, node, pred = heapq.heappop(heap)
+        if node in distance:
+            continue
+        distance[node] = dist
+        if pred >= 0:
+            predecessor[node] = pred
+        if remaining is not None:
+            remaining.discard(node)
+            if not remaining:
+                break
+        for entry in range(indptr[node], indptr[node + 1]):
+            neighbor = indices[entry]
+            candidate = dist + entry_weights[entry]
+            if neighbor not in distance and candidate < best.get(neighbor, float('inf')):
+                best[neighbor] = candidate
+                heapq.heappush(heap, (candidate, neighbor, node))
+    return distance, predecessor
+
+def path_to(predecessor: Dict[int, int], source: int, target: int) -> List[int]:
+    """Node path from source to target through a predecessor dict, [] if unreachable"""
+    if target != source and target not in predecessor:
+        return []
+    path = [target]
+    while path[-1] != source:
+        path.append(predecessor[path[-1]])
+    return path[::-1]
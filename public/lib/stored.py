@@ -0,0 +1,219 @@
+import json
+import os
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Tuple
+import numpy as np
+
+from public.lib.components import ComponentIndex
+from public.lib.hashing import digest, layout_digest
+from public.lib.interfaces import indicator_frame
+from public.lib.sparse import csr_lookup, dijkstra, path_to
+
+# Scenario directories hold one .npy file per array plus meta.json.
+# Nodes are the dense indices 0..n-1 and edge e joins edge_u[e] and edge_v[e].
+META_FILE = 'meta.json'
+
+def open_array(directory: str, name: str) -> np.ndarray:
+    """Read-only memory map of one array of a scenario directory"""
+    return np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+
+def read_meta(directory: str) -> Dict:
+    with open(os.path.join(directory, META_FILE)) as f:
+        return json.load(f)
+
+class StoredCity:
+    """
+    City layout read from memory-mapped arrays, for cities too large for a
+    networkx graph. Pages are only loaded when touched, so a policy that
+    explores part of the city never reads the rest of it.
+
+    Offers the CityGraph queries policies need (neighbors, edge_weight,
+    edge_weights, is_reachable, shortest_path) but no `graph` attribute.
+    """
+
+    def __init__(self, directory: str):
+        meta = read_meta(directory)
+        self.directory = directory
+        self.n_nodes: int = meta['n_nodes']
+        self.n_edges: int = meta['n_edges']
+        self.starting_node: int = meta['starting_node']
+        self.extraction_nodes: List[int] = meta['extraction_nodes']
+        self.positions = open_array(directory, 'positions')  # (n_nodes, 2)
+        self.edge_u = open_array(directory, 'edge_u')
+        self.edge_v = open_array(directory, 'edge_v')
+        self.weights = open_array(directory, 'weights')  # Per edge
+        self.indptr = open_array(directory, 'indptr')  # CSR adjacency
+        self.indices = open_array(directory, 'indices')
+        self.entry_edge = open_array(directory, 'entry_edge')  # Edge id of every CSR entry
+        self._components: ComponentIndex = None
+
+    def neighbors(self, node: int) -> List[int]:
+        """Neighbours of a node"""
+        return self.indices[self.indptr[node]:self.indptr[node + 1]].tolist()
+
+    def edge_id(self, node1: int, node2: int) -> int:
+        """Id of the edge joining two nodes, -1 if there is none (O(degree))"""
+        start = self.indptr[node1]
+        found = np.flatnonzero(self.indices[start:self.indptr[node1 + 1]] == node2)
+        return int(self.entry_edge[start + found[0]]) if len(found) else -1
+
+    def edge_weight(self, node1: int, node2: int) -> float:
+        """Length of the edge joining two nodes, None if there is no such edge"""
+        edge = self.edge_id(node1, node2)
+        return None if edge < 0 else float(self.weights[edge])
+
+    def edge_weights(self, nodes1: List[int], nodes2: List[int]) -> np.ndarray:
+        """Length of every (nodes1[i], nodes2[i]) edge, NaN where there is none"""
+        edges = self.edge_ids(nodes1, nodes2)
+        return np.where(edges >= 0, self.weights[np.maximum(edges, 0)], np.nan)
+
+    def edge_ids(self, nodes1: List[int], nodes2: List[int]) -> np.ndarray:
+        """Id of every (nodes1[i], nodes2[i]) edge, -1 where there is none (index of the per-edge arrays)"""
+        entries = csr_lookup(self.indptr, self.indices, nodes1, nodes2)
+        edges = self.entry_edge[np.maximum(entries, 0)] if len(entries) else np.empty(0, dtype=np.int64)
+        return np.where(entries >= 0, edges, -1)
+
+    @property
+    def components(self) -> ComponentIndex:
+        """Connected component index, loaded on first use"""
+        if self._components is None:
+            self._components = ComponentIndex(open_array(self.directory, 'components'))
+        return self._components
+
+    def is_reachable(self, node1: int, node2: int) -> bool:
+        """Whether any path joins the two nodes, in O(1)"""
+        return self.components.connected(node1, node2)
+
+    def shortest_path(self, source: int, target: int) -> List[int]:
+        """Shortest weighted path between two nodes, [] if unreachable"""
+        _, predecessor = dijkstra(self.indptr, self.indices, self.weights[self.entry_edge],
+                                  source, targets=[target])
+        return path_to(predecessor, source, target)
+
+    def content_hash(self) -> str:
+        """
+        Stable hash of the layout, start and extraction nodes, read from the
+        memory maps: equal to CityGraph.content_hash() of the same city
+        """
+        layout = layout_digest(np.arange(self.n_nodes), self.positions, self.edge_u, self.edge_v, self.weights)
+        return digest(layout, self.starting_node, list(self.extraction_nodes)).hex()
+
+class StoredEdgeMap(Mapping):
+    """
+    Read-only mapping (node1, node2) -> value over a per-edge array of a
+    StoredCity, looked up in either node order. Only the edges whose value
+    is set count as keys when `only_set` is True (e.g. true blockages).
+    """
+
+    def __init__(self, city: StoredCity, values: np.ndarray, only_set: bool = False):
+        self.city = city
+        self.values = values
+        self.only_set = only_set
+
+    def _edge(self, key) -> int:
+        try:
+            node1, node2 = key
+        except (TypeError, ValueError):
+            return -1
+        if not (0 <= node1 < self.city.n_nodes and 0 <= node2 < self.city.n_nodes):
+            return -1
+        edge = self.city.edge_id(node1, node2)
+        if edge >= 0 and self.only_set and not self.values[edge]:
+            return -1
+        return edge
+
+    def __getitem__(self, key):
+        edge = self._edge(key)
+        if edge < 0:
+            raise KeyError(key)
+        return self.values[edge]
+
+    def __contains__(self, key) -> bool:
+        return self._edge(key) >= 0
+
+    def _edges(self) -> np.ndarray:
+        return np.flatnonzero(self.values) if self.only_set else np.arange(self.city.n_edges)
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        for edge in self._edges().tolist():
+            u, v = int(self.city.edge_u[edge]), int(self.city.edge_v[edge])
+            yield (u, v) if u < v else (v, u)
+
+    def __len__(self) -> int:
+        return len(self._edges())
+
+class _IndicatorMap(Mapping):
+    """Read-only mapping key -> {indicator: value} over columns of a (n_names, n) array"""
+
+    def __init__(self, names: List[str], values: np.ndarray, index: Mapping):
+        self.names = names
+        self.values = values
+        self.index = index  # Mapping key -> column
+
+    def __getitem__(self, key) -> Dict[str, float]:
+        return dict(zip(self.names, self.values[:, self.index[key]].tolist()))
+
+    def __contains__(self, key) -> bool:
+        return key in self.index
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+class _NodeRange(Mapping):
+    """Identity mapping over the dense node indices 0..n-1"""
+
+    def __init__(self, n_nodes: int):
+        self.n_nodes = n_nodes
+
+    def __getitem__(self, node: int) -> int:
+        if not (isinstance(node, (int, np.integer)) and 0 <= node < self.n_nodes):
+            raise KeyError(node)
+        return node
+
+    def __iter__(self):
+        return iter(range(self.n_nodes))
+
+    def __len__(self) -> int:
+        return self.n_nodes
+
+class StoredProxyData:
+    """
+    Proxy indicators read from memory-mapped arrays. `node_data` and
+    `edge_data` are read-only mappings with the same keys and values as
+    ProxyData's dicts, built one entry at a time on access; node_frame()
+    and edge_frame() wrap the memory maps without reading them.
+    """
+
+    def __init__(self, city: StoredCity):
+        meta = read_meta(city.directory)
+        self.node_values = open_array(city.directory, 'node_indicators')  # (n_names, n_nodes)
+        self.edge_values = open_array(city.directory, 'edge_indicators')  # (n_names, n_edges)
+        self.node_data = _IndicatorMap(meta['node_indicators'], self.node_values, _NodeRange(city.n_nodes))
+        self.edge_data = _IndicatorMap(meta['edge_indicators'], self.edge_values,
+                                       StoredEdgeMap(city, np.arange(city.n_edges)))
+        self._city = city
+
+    def content_hash(self) -> str:
+        """
+        Stable hash of the node and edge indicators, read from the memory
+        maps: equal to ProxyData.content_hash() of the same indicators with
+        nodes and edges in the same order
+        """
+        edge_u, edge_v = self._city.edge_u, self._city.edge_v
+        edges = np.stack([np.minimum(edge_u, edge_v), np.maximum(edge_u, edge_v)], axis=1).astype(np.int64)
+        return digest(digest(np.arange(self._city.n_nodes), self.node_data.names, self.node_values),
+                      digest(edges, self.edge_data.names, self.edge_values)).hex()
+
+    def node_frame(self):
+        """Node indicators as a DataFrame with a 'node' column, over the memory map"""
+        return indicator_frame(self.node_data.names, self.node_values,
+                               {'node': np.arange(self._city.n_nodes)})
+
+    def edge_frame(self):
+        """Edge indicators as a DataFrame with 'node_1', 'node_2' columns, over the memory map"""
+        edge_u, edge_v = self._city.edge_u, self._city.edge_v
+        return indicator_frame(self.edge_data.names, self.edge_values,
+                               {'node_1': np.minimum(edge_u, edge_v), 'node_2': np.maximum(edge_u, edge_v)})
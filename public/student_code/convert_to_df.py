@@ -1,8 +1,11 @@
 import pandas as pd
 
+from public.lib.interfaces import IndicatorTable
+
 def convert_node_data_to_df(node_data):
     """
     Convert a node data dictionary into a pandas DataFrame.
+    ProxyData.node_data is wrapped without copying (as ProxyData.node_frame()).
     
     Parameters:
         node_data (dict): A dictionary where each key is a node identifier and the 
@@ -18,6 +21,9 @@ def convert_node_data_to_df(node_data):
         pd.DataFrame: A DataFrame with a column 'node' for node identifiers 
                       and columns for the attributes.
     """
+    if isinstance(node_data, IndicatorTable):
+        return node_data.frame(['node'])
+    
     # Create DataFrame from dictionary and reset index to convert keys into a column.
     df = pd.DataFrame.from_dict(node_data, orient='index').reset_index()
     df = df.rename(columns={'index': 'node'})
@@ -26,6 +32,7 @@ def convert_node_data_to_df(node_data):
 def convert_edge_data_to_df(edge_data):
     """
     Convert an edge data dictionary into a pandas DataFrame.
+    ProxyData.edge_data is wrapped without copying (as ProxyData.edge_frame()).
     
     Parameters:
         edge_data (dict): A dictionary where each key is a tuple representing an edge 
@@ -41,6 +48,9 @@ def convert_edge_data_to_df(edge_data):
     Returns:
         pd.DataFrame: A DataFrame with columns 'node_1', 'node_2', and the edge attributes.
     """
+    if isinstance(edge_data, IndicatorTable):
+        return edge_data.frame(['node_1', 'node_2'])
+    
     records = []
     for edge, attributes in edge_data.items():
         if isinstance(edge, tuple) and len(edge) == 2:
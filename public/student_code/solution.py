@@ -32,7 +32,7 @@ class EvacuationPolicy:
         Planifica la ruta de evacuación y la asignación de recursos.
         
         Args:
-            city: El layout de la ciudad
+            city: El layout de la ciudad (solo lectura: usa city.copy() si necesitas modificarlo)
                  - city.graph: Grafo NetworkX con el layout de la ciudad
                  - city.starting_node: Tu posición inicial
                  - city.extraction_nodes: Lista de puntos de extracción posibles
@@ -40,6 +40,8 @@ class EvacuationPolicy:
             proxy_data: Información sobre el ambiente
                  - proxy_data.node_data[node_id]: Dict con indicadores de nodos
                  - proxy_data.edge_data[(node1,node2)]: Dict con indicadores de aristas
+                 - proxy_data.node_frame() / proxy_data.edge_frame(): los mismos
+                   indicadores como DataFrames (sin copiar los datos)
                  
             max_resources: Máximo total de recursos que puedes asignar
             
@@ -82,10 +84,11 @@ class EvacuationPolicy:
         # TODO: Implementa tu solución aquí
         target = city.extraction_nodes[0]
         
-        try:
+        # city.is_reachable evita buscar rutas imposibles (O(1))
+        if city.is_reachable(city.starting_node, target):
             path = nx.shortest_path(city.graph, city.starting_node, target, 
                                   weight='weight')
-        except nx.NetworkXNoPath:
+        else:
             path = [city.starting_node]
             
         resources = {
@@ -115,10 +118,11 @@ class EvacuationPolicy:
         
         target = city.extraction_nodes[0]
         
-        try:
+        # city.is_reachable evita buscar rutas imposibles (O(1))
+        if city.is_reachable(city.starting_node, target):
             path = nx.shortest_path(city.graph, city.starting_node, target, 
                                   weight='weight')
-        except nx.NetworkXNoPath:
+        else:
             path = [city.starting_node]
             
         resources = {
@@ -144,10 +148,11 @@ class EvacuationPolicy:
         
         target = city.extraction_nodes[0]
         
-        try:
+        # city.is_reachable evita buscar rutas imposibles (O(1))
+        if city.is_reachable(city.starting_node, target):
             path = nx.shortest_path(city.graph, city.starting_node, target, 
                                   weight='weight')
-        except nx.NetworkXNoPath:
+        else:
             path = [city.starting_node]
             
         resources = {
@@ -176,10 +181,11 @@ class EvacuationPolicy:
         
         target = city.extraction_nodes[0]
         
-        try:
+        # city.is_reachable evita buscar rutas imposibles (O(1))
+        if city.is_reachable(city.starting_node, target):
             path = nx.shortest_path(city.graph, city.starting_node, target, 
                                   weight='weight')
-        except nx.NetworkXNoPath:
+        else:
             path = [city.starting_node]
             
         resources = {
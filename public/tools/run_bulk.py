@@ -26,17 +26,33 @@ class BulkRunner:
             config: Dict with:
                 - node_range: Dict with min and max node counts
                 - n_runs: int - Number of runs
+                - batch_generation: bool (optional) - Generate all city layouts
+                  up front with CityGenerator.generate_batch, seeded per run
+                  (the same scenarios as generating them one run at a time)
+                - betweenness_samples: int (optional) - Approximate betweenness
+                  centrality from k sampled source nodes (default exact)
+                - betweenness_processes: int (optional) - Compute exact
+                  betweenness on a process pool (None = serial, 0 = all cores)
+                - topology: str (optional) - City layout: 'random' (default),
+                  'grid', 'delaunay' or 'districts'
+                - connected: bool (optional) - Link disconnected city parts so
+                  no scenario is unwinnable by construction
                 
         Returns:
             Tuple of (results dict, experiment_id)
         """
-        random.seed(self.base_seed)
+        # Private stream for city sizes; the policy may use the global one
+        size_rng = random.Random(self.base_seed)
         
         # Initialize simulator
         simulator = Simulator(
             policy_name=self.policy_name,
             n_nodes=30,  # Will be overridden
-            seed=self.base_seed
+            seed=self.base_seed,
+            betweenness_samples=config.get('betweenness_samples'),
+            betweenness_processes=config.get('betweenness_processes'),
+            topology=config.get('topology', 'random'),
+            connected=config.get('connected', False)
         )
         
         # Start new experiment
@@ -49,11 +65,22 @@ class BulkRunner:
             'by_size': {}  # Group runs by city size
         }
         
+        # Optionally generate every city layout up front, with one neighbour search for the batch
+        city_batch = None
+        if config.get('batch_generation', False):
+            sizes = [size_rng.randint(config['node_range']['min'], config['node_range']['max'])
+                     for _ in range(config['n_runs'])]
+            seeds = [self.base_seed + run for run in range(config['n_runs'])]
+            city_batch = simulator.city_gen.generate_batch(sizes, seeds)
+        
         # Run simulations and collect raw data
         for run in range(config['n_runs']):
             # Generate random node count for this run
-            n_nodes = random.randint(config['node_range']['min'], 
-                                   config['node_range']['max'])
+            if city_batch is not None:
+                n_nodes = int(city_batch.sizes[run])
+            else:
+                n_nodes = size_rng.randint(config['node_range']['min'], 
+                                         config['node_range']['max'])
             
             # Initialize size data if not seen before
             if n_nodes not in raw_data['by_size']:
@@ -64,7 +91,8 @@ class BulkRunner:
             simulator.seed = self.base_seed + run
             
             # Run simulation
-            result, city, proxy_data = simulator.run_simulation(policy)
+            scenario = city_batch[run] if city_batch is not None else None
+            result, city, proxy_data = simulator.run_simulation(policy, scenario=scenario, run=run)
             
             # Get policy result
             max_resources = simulator.city_gen.calculate_max_resources(n_nodes)
@@ -83,13 +111,13 @@ class BulkRunner:
                         str(node_id): {
                             k: float(v) for k, v in indicators.items()
                         }
-                        for node_id, indicators in proxy_data.node_data.items()
+                        for node_id, indicators in proxy_data.node_data.to_dict().items()
                     },
                     'edges': {
                         str(edge_key): {
                             k: float(v) for k, v in indicators.items()
                         }
-                        for edge_key, indicators in proxy_data.edge_data.items()
+                        for edge_key, indicators in proxy_data.edge_data.to_dict().items()
                     }
                 },
                 'policy_allocation': policy_result.resources
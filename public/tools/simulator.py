@@ -1,18 +1,21 @@
-import uuid
 from typing import Tuple, Dict, Any
 
 from public.lib.interfaces import CityGraph, ProxyData, SimulationResult
 from public.lib.data_manager import DataManager
+from public.lib.hashing import scenario_hash
 from hidden.generation.city_gen import CityGenerator
-from hidden.generation.obstacles_gen import TrueStateGenerator
+from hidden.generation.obstacles_gen import TrueStateGenerator, true_state_arrays
 from hidden.generation.proxy_gen import ProxyGenerator
+from hidden.generation.streaming import load_scenario
 from hidden.evaluation.evaluator import PathEvaluator
 import copy
 
 class Simulator:
     """Interface for running evacuation simulations"""
     
-    def __init__(self, policy_name: str, n_nodes: int = 30, seed: int = None):
+    def __init__(self, policy_name: str, n_nodes: int = 30, seed: int = None,
+                 betweenness_samples: int = None, betweenness_processes: int = None,
+                 topology: str = 'random', connected: bool = False):
         """
         Initialize simulator
         
@@ -20,21 +23,56 @@ class Simulator:
             policy_name: Name of the policy being tested
             n_nodes: Number of nodes in the city
             seed: Random seed for reproducibility
+            betweenness_samples: Approximate betweenness centrality from this
+                                 many sampled source nodes (None = exact)
+            betweenness_processes: Compute exact betweenness on a process pool
+                                   of this size (None = serial, 0 = all cores)
+            topology: City layout: 'random', 'grid', 'delaunay' or 'districts'
+            connected: Link disconnected city parts so every extraction
+                       point is reachable from the start
         """
         self.n_nodes = n_nodes
-        self.seed = seed
         
-        # Initialize components
-        self.city_gen = CityGenerator(seed)
-        self.true_state_gen = TrueStateGenerator(seed)
-        self.proxy_gen = ProxyGenerator(seed=seed)
-        self.evaluator = PathEvaluator(seed)
+        # Initialize components (each owns private random streams)
+        self.city_gen = CityGenerator(topology=topology, connected=connected)
+        self.true_state_gen = TrueStateGenerator(betweenness_samples=betweenness_samples,
+                                                 betweenness_processes=betweenness_processes)
+        self.proxy_gen = ProxyGenerator(betweenness_samples=betweenness_samples,
+                                        betweenness_processes=betweenness_processes)
+        self.evaluator = PathEvaluator()
+        self.seed = seed
         
         # Initialize data manager
         self.data_manager = DataManager(policy_name)
         self.data_manager.save_policy_metadata()
+
+    @property
+    def seed(self) -> int:
+        return self._seed
+
+    @seed.setter
+    def seed(self, seed: int):
+        """
+        Setting the seed restarts every component's random streams, so the
+        scenarios that follow depend only on the seed, never on earlier runs
+        or on random calls made by the policy.
+        """
+        self._seed = seed
+        self._runs = 0  # Runs since the seed was set, keys their evaluations' random streams
+        for component in (self.city_gen, self.true_state_gen, self.proxy_gen, self.evaluator):
+            component.reseed(seed)
+
+    def _evaluation_rng(self, run: int = None):
+        """
+        Random stream of one evaluation, keyed by (seed, run) only, so its
+        result never depends on evaluations that came before or ran alongside
+        """
+        if run is None:
+            run, self._runs = self._runs, self._runs + 1
+        return self.evaluator.plan_rng(run)
         
-    def run_simulation(self, policy) -> Tuple[SimulationResult, CityGraph, ProxyData]:
+    def run_simulation(self, policy, scenario: Tuple[CityGraph, int] = None,
+                       run: int = None) -> Tuple[SimulationResult, CityGraph, ProxyData]:
         """
         Run a single simulation following the data flow:
         1. Generate city (nodes, edges)
@@ -44,17 +82,24 @@ class Simulator:
         
         Args:
             policy: Policy object with plan_evacuation method
+            scenario: Optional pre-generated (CityGraph, max_resources), e.g. an
+                      item of CityGenerator.generate_batch. Generated if None.
+            run: Index of this run, keys the evaluation's random stream
+                 (default: number of runs since the seed was set)
             
         Returns:
             Tuple of (SimulationResult, CityGraph used, ProxyData given to policy)
         """
         # 1. Generate city and get max resources
-        city, max_resources = self.city_gen.generate(self.n_nodes)
+        if scenario is None:
+            city, max_resources = self.city_gen.generate(self.n_nodes)
+        else:
+            city, max_resources = scenario
         
         # 2. Generate true state and proxy data
         true_state = self.true_state_gen.generate(city)
         proxy_data = self.proxy_gen.generate(city, true_state)
-        pass_city = city.copy()
+        pass_city = city.view()  # Read-only, shares the layout instead of copying it
         real_max_resources = max_resources
         # 3. Get policy decision
         policy_result = policy.plan_evacuation(pass_city, proxy_data, max_resources)
@@ -65,35 +110,38 @@ class Simulator:
             resources=policy_result.resources,
             city=city,
             true_state=true_state,
-            max_resources=real_max_resources
+            max_resources=real_max_resources,
+            rng=self._evaluation_rng(run)
         )
         
         # Save data if experiment is active
         if self.data_manager.current_experiment:
-            city_id = str(uuid.uuid4())[:8]
+            # Content hash: the same scenario gets the same id in every run and experiment
+            city_id = scenario_hash(city, max_resources, proxy_data, *true_state_arrays(city, true_state))
             
             # Prepare city data
             city_data = {
                 'metadata': {
                     'n_nodes': self.n_nodes,
-                    'seed': self.seed
+                    'seed': self.seed,
+                    'city_hash': city.content_hash()
                 },
                 'graph': {
                     'nodes': [
                         {
                             'id': node,
-                            'x': city.graph.nodes[node]['pos'][0],
-                            'y': city.graph.nodes[node]['pos'][1]
+                            'x': city.position(node)[0],
+                            'y': city.position(node)[1]
                         }
-                        for node in city.graph.nodes()
+                        for node in city.nodes()
                     ],
                     'edges': [
                         {
-                            'source': edge[0],
-                            'target': edge[1],
-                            'weight': city.graph[edge[0]][edge[1]]['weight']
+                            'source': node1,
+                            'target': node2,
+                            'weight': weight
                         }
-                        for edge in city.graph.edges()
+                        for node1, node2, weight in city.edges()
                     ]
                 },
                 'simulation': {
@@ -104,11 +152,12 @@ class Simulator:
             
             # Prepare proxy data
             proxy_info = {
+                'proxy_hash': proxy_data.content_hash(),
                 'indicators': {
-                    'nodes': proxy_data.node_data,
+                    'nodes': proxy_data.node_data.to_dict(),
                     'edges': {
                         f"{edge[0]}_{edge[1]}": indicators
-                        for edge, indicators in proxy_data.edge_data.items()
+                        for edge, indicators in proxy_data.edge_data.to_dict().items()
                     }
                 }
             }
@@ -148,4 +197,28 @@ class Simulator:
                 }
             })
         
-        return result, city, proxy_data 
\ No newline at end of file
+        return result, city, proxy_data
+
+    def run_stored_simulation(self, policy, directory: str, run: int = None) -> Tuple[SimulationResult, Any, Any]:
+        """
+        Run a policy on a scenario streamed to disk by StreamingScenarioGenerator
+        (e.g. a million-node city). The policy receives a memory-mapped
+        StoredCity and StoredProxyData; it must use their query methods
+        (neighbors, edge_weight, shortest_path, ...) as there is no city.graph.
+        Stored scenarios are not saved by the data manager. `run` keys the
+        evaluation's random stream, as in run_simulation.
+        
+        Returns:
+            Tuple of (SimulationResult, StoredCity, StoredProxyData)
+        """
+        city, true_state, proxy_data, max_resources = load_scenario(directory)
+        policy_result = policy.plan_evacuation(city, proxy_data, max_resources)
+        result = self.evaluator.evaluate(
+            path=policy_result.path,
+            resources=policy_result.resources,
+            city=city,
+            true_state=true_state,
+            max_resources=max_resources,
+            rng=self._evaluation_rng(run)
+        )
+        return result, city, proxy_data
@@ -7,6 +7,8 @@ from typing import Dict, Tuple
 import networkx as nx
 import random
 
+from public.lib.interfaces import EventTrace
+
 def save_city_plot(plt, name: str, policy_name: str, experiment_id: str, city_id: str):
     """Save plot to the correct city-specific location"""
     vis_path = os.path.join(
@@ -76,71 +78,81 @@ def plot_city_graph(city_data: Dict, proxy_data: Dict, mission_data: Dict,
     resources_initial = mission_data['outcome']['resources']['initial']
     resources_remaining = mission_data['outcome']['resources']['remaining']
     
-    # Track resource usage at each node
-    resource_usage_at_node = {}  # node -> {resource: amount}
-    death_node = None  # Track where the team died
-    
-    # Log mission start
-    events.append((0, f"Mission started at node {planned_path[0]}"))
-    
-    # Process each node in the path
-    for step, node in enumerate(planned_path, 1):
-        actual_path.append(node)
-        events.append((step, f"Arrived at node {node}"))
-        
-        # Initialize resource tracking for this node
-        resource_usage_at_node[node] = {}
+    saved_trace = mission_data.get('events', {}).get('trace')
+    if saved_trace is not None:  # Walk recorded by the evaluator
+        trace = EventTrace.from_dict(saved_trace)
+        actual_path = trace.nodes or planned_path[:1]  # No step is taken by a greedy team
+        events = [tuple(event) for event in mission_data['events']['chronological']]
+        resource_usage_at_node = trace.resources_by_node()
+        death_node = trace.death_node
+        if death_node is None and not success:
+            death_node = actual_path[-1]
+    else:
+        # Re-walk the path over the proxy indicators, tracking resource usage at each node
+        resource_usage_at_node = {}  # node -> {resource: amount}
+        death_node = None  # Track where the team died
         
-        # Check for hazards at current node
-        radiation_level = proxy_data['indicators']['nodes'].get(str(node), {}).get('radiation_readings', 0)
-        zombie_level = proxy_data['indicators']['nodes'].get(str(node), {}).get('thermal_readings', 0)
+        # Log mission start
+        events.append((0, f"Mission started at node {planned_path[0]}"))
         
-        if radiation_level > 0.4:  # Radiation hazard
-            events.append((step, f"High radiation detected (level: {radiation_level:.2f})"))
-            if resources_remaining['radiation_suits'] <= 0:
-                events.append((step, f"TEAM DIED - No radiation suits available"))
-                death_node = node
-                break
-            resources_remaining['radiation_suits'] -= 1
-            resource_usage_at_node[node]['radiation_suits'] = 1
-            events.append((step, f"Used radiation suit"))
+        # Process each node in the path
+        for step, node in enumerate(planned_path, 1):
+            actual_path.append(node)
+            events.append((step, f"Arrived at node {node}"))
             
-        if zombie_level > 0.5:  # Zombie hazard
-            events.append((step, f"Zombie horde encountered (level: {zombie_level:.2f})"))
-            if resources_remaining['ammo'] <= 0:
-                events.append((step, f"TEAM DIED - No ammo available"))
-                death_node = node
-                break
-            resources_remaining['ammo'] -= 1
-            resource_usage_at_node[node]['ammo'] = 1
-            events.append((step, f"Used ammo against zombies"))
-        
-        # If not last node, check edge to next node
-        if node != planned_path[-1]:
-            next_node = planned_path[planned_path.index(node) + 1]
-            edge_key = f"{node}_{next_node}"
-            blockage_level = proxy_data['indicators']['edges'].get(edge_key, {}).get('structural_damage', 0)
+            # Initialize resource tracking for this node
+            resource_usage_at_node[node] = {}
+            
+            # Check for hazards at current node
+            radiation_level = proxy_data['indicators']['nodes'].get(str(node), {}).get('radiation_readings', 0)
+            zombie_level = proxy_data['indicators']['nodes'].get(str(node), {}).get('thermal_readings', 0)
             
-            if blockage_level > 0.4:  # Blockage hazard
-                events.append((step, f"Path blocked to node {next_node} (damage level: {blockage_level:.2f})"))
-                if resources_remaining['explosives'] <= 0:
-                    events.append((step, f"TEAM DIED - No explosives available"))
+            if radiation_level > 0.4:  # Radiation hazard
+                events.append((step, f"High radiation detected (level: {radiation_level:.2f})"))
+                if resources_remaining['radiation_suits'] <= 0:
+                    events.append((step, f"TEAM DIED - No radiation suits available"))
                     death_node = node
                     break
-                resources_remaining['explosives'] -= 1
-                resource_usage_at_node[node]['explosives'] = 1
-                events.append((step, f"Used explosives to clear path"))
+                resources_remaining['radiation_suits'] -= 1
+                resource_usage_at_node[node]['radiation_suits'] = 1
+                events.append((step, f"Used radiation suit"))
+                
+            if zombie_level > 0.5:  # Zombie hazard
+                events.append((step, f"Zombie horde encountered (level: {zombie_level:.2f})"))
+                if resources_remaining['ammo'] <= 0:
+                    events.append((step, f"TEAM DIED - No ammo available"))
+                    death_node = node
+                    break
+                resources_remaining['ammo'] -= 1
+                resource_usage_at_node[node]['ammo'] = 1
+                events.append((step, f"Used ammo against zombies"))
             
-            events.append((step, f"Moving to node {next_node}"))
-    
-    # Add final outcome
-    final_step = len(actual_path)
-    if death_node is None and not success:
-        death_node = actual_path[-1]
-        events.append((final_step, f"TEAM DIED - {failure_reason}"))
-    elif success:
-        events.append((final_step, f"Successfully reached extraction point at node {actual_path[-1]}"))
-    
+            # If not last node, check edge to next node
+            if node != planned_path[-1]:
+                next_node = planned_path[planned_path.index(node) + 1]
+                edge_key = f"{node}_{next_node}"
+                blockage_level = proxy_data['indicators']['edges'].get(edge_key, {}).get('structural_damage', 0)
+                
+                if blockage_level > 0.4:  # Blockage hazard
+                    events.append((step, f"Path blocked to node {next_node} (damage level: {blockage_level:.2f})"))
+                    if resources_remaining['explosives'] <= 0:
+                        events.append((step, f"TEAM DIED - No explosives available"))
+                        death_node = node
+                        break
+                    resources_remaining['explosives'] -= 1
+                    resource_usage_at_node[node]['explosives'] = 1
+                    events.append((step, f"Used explosives to clear path"))
+                
+                events.append((step, f"Moving to node {next_node}"))
+        
+        # Add final outcome
+        final_step = len(actual_path)
+        if death_node is None and not success:
+            death_node = actual_path[-1]
+            events.append((final_step, f"TEAM DIED - {failure_reason}"))
+        elif success:
+            events.append((final_step, f"Successfully reached extraction point at node {actual_path[-1]}"))
+        
     # Sort events chronologically
     events.sort(key=lambda x: x[0])  # Sort by step number (stable sort preserves order within steps)
     log_text = "Mission Events:\n\n"
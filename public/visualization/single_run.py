@@ -38,68 +38,77 @@ def visualize_simulation(city: CityGraph, proxy_data: ProxyData,
     success = sim_result.success
     failure_reason = sim_result.failure_reason
     
-    # Track resource usage at each node
-    resource_usage_at_node = {}  # node -> {resource: amount}
-    death_node = None  # Track where the team died
-    
-    # Log mission start
-    events.append((0, f"Mission started at node {planned_path[0]}"))
-    
-    # Process each node in the path
-    for step, node in enumerate(planned_path, 1):
-        actual_path.append(node)
-        events.append((step, f"Arrived at node {node}"))
-        
-        # Initialize resource tracking for this node
-        resource_usage_at_node[node] = {}
+    trace = sim_result.trace
+    if trace is not None:  # Walk recorded by the evaluator
+        actual_path = trace.nodes or planned_path[:1]  # No step is taken by a greedy team
+        events = list(sim_result.events)
+        resource_usage_at_node = trace.resources_by_node()
+        death_node = trace.death_node
+        if death_node is None and not success:
+            death_node = actual_path[-1]
+    else:
+        # Re-walk the path over the proxy indicators, tracking resource usage at each node
+        resource_usage_at_node = {}  # node -> {resource: amount}
+        death_node = None  # Track where the team died
         
-        # Check for hazards at current node
-        radiation_level = proxy_data.node_data[node].get('radiation_readings', 0)
-        zombie_level = proxy_data.node_data[node].get('thermal_readings', 0)
+        # Log mission start
+        events.append((0, f"Mission started at node {planned_path[0]}"))
         
-        if radiation_level > 0.35:  # Radiation hazard
-            events.append((step, f"High radiation detected (level: {radiation_level:.2f})"))
-            if sim_result.resources.used['radiation_suits'] >= sim_result.resources.allocated['radiation_suits']:
-                events.append((step, f"TEAM DIED - No radiation suits available"))
-                death_node = node
-                break
-            resource_usage_at_node[node]['radiation_suits'] = 1
-            events.append((step, f"Used radiation suit"))
+        # Process each node in the path
+        for step, node in enumerate(planned_path, 1):
+            actual_path.append(node)
+            events.append((step, f"Arrived at node {node}"))
             
-        if zombie_level > 0.45:  # Zombie hazard
-            events.append((step, f"Zombie horde encountered (level: {zombie_level:.2f})"))
-            if sim_result.resources.used['ammo'] >= sim_result.resources.allocated['ammo']:
-                events.append((step, f"TEAM DIED - No ammo available"))
-                death_node = node
-                break
-            resource_usage_at_node[node]['ammo'] = 1
-            events.append((step, f"Used ammo against zombies"))
-        
-        # If not last node, check edge to next node
-        if node != planned_path[-1]:
-            next_node = planned_path[planned_path.index(node) + 1]
-            edge = tuple(sorted([node, next_node]))
-            blockage_level = proxy_data.edge_data.get(edge, {}).get('structural_damage', 0)
+            # Initialize resource tracking for this node
+            resource_usage_at_node[node] = {}
+            
+            # Check for hazards at current node
+            radiation_level = proxy_data.node_data[node].get('radiation_readings', 0)
+            zombie_level = proxy_data.node_data[node].get('thermal_readings', 0)
             
-            if blockage_level > 0.4:  # Blockage hazard
-                events.append((step, f"Path blocked to node {next_node} (damage level: {blockage_level:.2f})"))
-                if sim_result.resources.used['explosives'] >= sim_result.resources.allocated['explosives']:
-                    events.append((step, f"TEAM DIED - No explosives available"))
+            if radiation_level > 0.35:  # Radiation hazard
+                events.append((step, f"High radiation detected (level: {radiation_level:.2f})"))
+                if sim_result.resources.used['radiation_suits'] >= sim_result.resources.allocated['radiation_suits']:
+                    events.append((step, f"TEAM DIED - No radiation suits available"))
                     death_node = node
                     break
-                resource_usage_at_node[node]['explosives'] = 1
-                events.append((step, f"Used explosives to clear path"))
+                resource_usage_at_node[node]['radiation_suits'] = 1
+                events.append((step, f"Used radiation suit"))
+                
+            if zombie_level > 0.45:  # Zombie hazard
+                events.append((step, f"Zombie horde encountered (level: {zombie_level:.2f})"))
+                if sim_result.resources.used['ammo'] >= sim_result.resources.allocated['ammo']:
+                    events.append((step, f"TEAM DIED - No ammo available"))
+                    death_node = node
+                    break
+                resource_usage_at_node[node]['ammo'] = 1
+                events.append((step, f"Used ammo against zombies"))
             
-            events.append((step, f"Moving to node {next_node}"))
-    
-    # Add final outcome
-    final_step = len(actual_path)
-    if death_node is None and not success:
-        death_node = actual_path[-1]
-        events.append((final_step, f"TEAM DIED - {failure_reason}"))
-    elif success:
-        events.append((final_step, f"Successfully reached extraction point at node {actual_path[-1]}"))
-    
+            # If not last node, check edge to next node
+            if node != planned_path[-1]:
+                next_node = planned_path[planned_path.index(node) + 1]
+                edge = tuple(sorted([node, next_node]))
+                blockage_level = proxy_data.edge_data.get(edge, {}).get('structural_damage', 0)
+                
+                if blockage_level > 0.4:  # Blockage hazard
+                    events.append((step, f"Path blocked to node {next_node} (damage level: {blockage_level:.2f})"))
+                    if sim_result.resources.used['explosives'] >= sim_result.resources.allocated['explosives']:
+                        events.append((step, f"TEAM DIED - No explosives available"))
+                        death_node = node
+                        break
+                    resource_usage_at_node[node]['explosives'] = 1
+                    events.append((step, f"Used explosives to clear path"))
+                
+                events.append((step, f"Moving to node {next_node}"))
+        
+        # Add final outcome
+        final_step = len(actual_path)
+        if death_node is None and not success:
+            death_node = actual_path[-1]
+            events.append((final_step, f"TEAM DIED - {failure_reason}"))
+        elif success:
+            events.append((final_step, f"Successfully reached extraction point at node {actual_path[-1]}"))
+        
     # Sort events chronologically and create event log
     events.sort(key=lambda x: x[0])  # Sort by step number (stable sort preserves order within steps)
     log_text = "Mission Events:\n\n"
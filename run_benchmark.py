@@ -0,0 +1,164 @@
+# Global configuration for the generation benchmark
+CONFIG = {
+    'node_counts': [20, 50, 100, 500, 1000, 5000, 10000, 50000, 100000],
+    'repeats': 3,  # Best of N timings is reported
+    'batch_cities': 1000,  # Cities per generate_batch call
+    'batch_node_range': (20, 50),
+    'drift_nodes': 500,  # City size for the approximate betweenness drift report
+    'drift_cities': 5,
+    'proxy_nodes': 1000,  # City size for the proxy realization benchmark
+    'hazard_nodes': [1000, 10000, 100000],  # City sizes for the hazard tick benchmark
+    'seed': 42
+}
+
+from hidden.generation.city_gen import CityGenerator
+from hidden.generation.dynamics import HazardDynamics
+from hidden.generation.drift import betweenness_drift
+from hidden.generation.obstacles_gen import TrueStateGenerator
+from hidden.generation.proxy_gen import ProxyGenerator
+from hidden.generation.topologies import TOPOLOGIES
+from public.lib.centrality import parallel_betweenness_centrality
+import argparse
+import random
+import time
+
+def time_call(fn, repeats: int) -> float:
+    """Best wall-clock time in seconds of `repeats` calls to fn"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def benchmark_city_generation(node_counts, repeats: int, seed: int, topology: str = 'random'):
+    """Time CityGenerator.generate for every city size"""
+    print(f"{'Nodes':>8} | {'City generation (s)':>20}")
+    print("-" * 32)
+    for n_nodes in node_counts:
+        city_gen = CityGenerator(seed, topology=topology)
+        elapsed = time_call(lambda: city_gen.generate(n_nodes), repeats)
+        print(f"{n_nodes:>8} | {elapsed:>20.4f}")
+
+def benchmark_batch_generation(n_cities: int, node_range, repeats: int, seed: int):
+    """Compare per-city generate calls against one generate_batch call"""
+    rng = random.Random(seed)
+    sizes = [rng.randint(*node_range) for _ in range(n_cities)]
+    seeds = [seed + i for i in range(n_cities)]
+    city_gen = CityGenerator(seed)
+
+    one_by_one = time_call(lambda: [city_gen.generate(n) for n in sizes], repeats)
+    batched = time_call(lambda: city_gen.generate_batch(sizes, seeds), repeats)
+    batch = city_gen.generate_batch(sizes, seeds)
+    materialized = time_call(lambda: list(batch), repeats)
+
+    print(f"{'generate x ' + str(n_cities):>28} | {one_by_one:>8.4f} s")
+    print(f"{'generate_batch':>28} | {batched:>8.4f} s")
+    print(f"{'materialize all CityGraphs':>28} | {materialized:>8.4f} s")
+
+def report_betweenness_drift(n_nodes: int, samples: int, n_cities: int, seed: int):
+    """Print the speed and distribution drift of sampled betweenness"""
+    report = betweenness_drift(n_nodes, samples, n_cities=n_cities, seed=seed)
+    print(f"Exact: {report['exact_time']:.3f} s | Sampled: {report['approx_time']:.3f} s")
+    print(f"{'Quantity':>32} | {'Mean |diff|':>11} | {'Max |diff|':>10} | {'KS':>6}")
+    print("-" * 70)
+    rows = [('betweenness', report['betweenness']), ('zombies', report['zombies'])]
+    rows += sorted(report['proxies'].items())
+    for name, drift in rows:
+        print(f"{name:>32} | {drift['mean_abs_diff']:>11.4f} | "
+              f"{drift['max_abs_diff']:>10.4f} | {drift['ks']:>6.3f}")
+
+def benchmark_parallel_betweenness(node_counts, processes, seed: int):
+    """Time exact betweenness serially and on process pools of each size"""
+    print(f"{'Nodes':>8} | " + " | ".join(f"{p:>3} proc (s)" for p in processes))
+    print("-" * (11 + 15 * len(processes)))
+    for n_nodes in node_counts:
+        city, _ = CityGenerator(seed).generate(n_nodes)
+        timings = [time_call(lambda: parallel_betweenness_centrality(city.graph, p), 1)
+                   for p in processes]
+        print(f"{n_nodes:>8} | " + " | ".join(f"{t:>12.3f}" for t in timings))
+
+def benchmark_proxy_sampling(n_nodes: int, n_samples: int, seed: int):
+    """Compare K full proxy generations against one metric pass plus K samples"""
+    city, _ = CityGenerator(seed).generate(n_nodes)
+    true_state = TrueStateGenerator(seed).generate(city)
+    proxy_gen = ProxyGenerator(seed=seed)
+
+    def full_generations():
+        for _ in range(n_samples):
+            city.reset_metrics()  # Every generation recomputes its metrics
+            proxy_gen.generate(city, true_state)
+
+    def sampled():
+        city.reset_metrics()
+        proxy_gen.sample(proxy_gen.compute_indicators(city, true_state), n_samples)
+
+    print(f"{'generate x ' + str(n_samples):>28} | {time_call(full_generations, 1):>8.4f} s")
+    print(f"{'compute_indicators + sample':>28} | {time_call(sampled, 1):>8.4f} s")
+
+def benchmark_hazard_ticks(node_counts, n_ticks: int, seed: int):
+    """Time incremental indicator updates of evolving hazards (ticks per second)"""
+    print(f"{'Nodes':>8} | {'Ticks/s':>8} | {'Nodes updated/tick':>18}")
+    print("-" * 40)
+    for n_nodes in node_counts:
+        city, _ = CityGenerator(seed, topology='delaunay').generate(n_nodes)
+        samples = min(n_nodes, 32)  # Exact betweenness would dominate setup
+        true_state = TrueStateGenerator(seed, betweenness_samples=samples).generate(city)
+        proxy_gen = ProxyGenerator(seed=seed, betweenness_samples=samples)
+        indicators = proxy_gen.compute_indicators(city, true_state)
+        dynamics = HazardDynamics.from_true_state(city, true_state, seed=seed)
+        updated = []
+        elapsed = time_call(lambda: updated.extend(
+            len(update.nodes) for update in proxy_gen.evolve(indicators, dynamics, n_ticks)), 1)
+        print(f"{n_nodes:>8} | {n_ticks / elapsed:>8.1f} | {sum(updated) / n_ticks:>18.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark scenario generation')
+    parser.add_argument('--nodes', type=int, nargs='+', default=CONFIG['node_counts'],
+                        help='City sizes to benchmark')
+    parser.add_argument('--repeats', type=int, default=CONFIG['repeats'],
+                        help='Timed repetitions per size (best is reported)')
+    parser.add_argument('--topology', default='random',
+                        choices=['random'] + sorted(TOPOLOGIES),
+                        help='City layout for the generation benchmark')
+    parser.add_argument('--batch-cities', type=int, default=CONFIG['batch_cities'],
+                        help='Cities for the batch generation benchmark (0 to skip)')
+    parser.add_argument('--betweenness-samples', type=int, default=None,
+                        help='Report drift of sampled betweenness with k source nodes')
+    parser.add_argument('--betweenness-processes', type=int, nargs='+', default=None,
+                        help='Time parallel exact betweenness with these process counts (0 = all cores)')
+    parser.add_argument('--proxy-samples', type=int, default=None,
+                        help='Time K proxy realizations from one metric pass')
+    parser.add_argument('--hazard-ticks', type=int, default=None,
+                        help='Time this many ticks of evolving hazards with incremental proxies')
+    args = parser.parse_args()
+
+    print(f"\nCity Generation Benchmark ({args.topology}):")
+    benchmark_city_generation(args.nodes, args.repeats, CONFIG['seed'], args.topology)
+
+    if args.batch_cities > 0:
+        print(f"\nBatch Generation Benchmark ({args.batch_cities} cities, "
+              f"{CONFIG['batch_node_range'][0]}-{CONFIG['batch_node_range'][1]} nodes):")
+        benchmark_batch_generation(args.batch_cities, CONFIG['batch_node_range'],
+                                   args.repeats, CONFIG['seed'])
+
+    if args.betweenness_samples:
+        print(f"\nSampled Betweenness Drift (k={args.betweenness_samples}, "
+              f"{CONFIG['drift_cities']} cities x {CONFIG['drift_nodes']} nodes):")
+        report_betweenness_drift(CONFIG['drift_nodes'], args.betweenness_samples,
+                                 CONFIG['drift_cities'], CONFIG['seed'])
+
+    if args.betweenness_processes:
+        print("\nParallel Exact Betweenness:")
+        benchmark_parallel_betweenness(args.nodes, args.betweenness_processes, CONFIG['seed'])
+
+    if args.proxy_samples:
+        print(f"\nProxy Realizations ({args.proxy_samples} samples, {CONFIG['proxy_nodes']} nodes):")
+        benchmark_proxy_sampling(CONFIG['proxy_nodes'], args.proxy_samples, CONFIG['seed'])
+
+    if args.hazard_ticks:
+        print(f"\nEvolving Hazards ({args.hazard_ticks} ticks, delaunay):")
+        benchmark_hazard_ticks(CONFIG['hazard_nodes'], args.hazard_ticks, CONFIG['seed'])
+
+if __name__ == "__main__":
+    main()
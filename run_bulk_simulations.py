@@ -7,7 +7,12 @@ CONFIG = {
             'max': 50
         },
         'n_runs': 100,  # Total number of cities to simulate
-        'base_seed': 7354681  # For reproducibility
+        'base_seed': 7354681,  # For reproducibility
+        'batch_generation': False,  # Generate all city layouts up front in one pass
+        'betweenness_samples': None,  # None = exact centrality, k = sample k source nodes
+        'betweenness_processes': None,  # Exact centrality on a process pool (None = serial, 0 = all cores), same values as serial
+        'topology': 'random',  # 'random', 'grid', 'delaunay' or 'districts'
+        'connected': False  # Link disconnected city parts (no unreachable extraction points)
     }
 
 from public.tools.run_bulk import BulkRunner